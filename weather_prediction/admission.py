@@ -0,0 +1,140 @@
+#admission.py
+import itertools
+import os
+import threading
+import time
+
+class Rejected(Exception):
+    """Raised by AdmissionController.acquire when a request is shed"""
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+class AdmissionController:
+    """Per-route concurrency limits with a small, bounded, priority-ordered wait queue.
+
+    A request is admitted when both the worker-wide `capacity` and its route's limit
+    have a free slot. Otherwise it waits in the queue for at most its route's
+    `queue_timeouts` entry (default `queue_timeout`) seconds. A waiting request still
+    holds a worker thread, so slow low-priority routes should use 0 and be rejected at
+    once rather than hold threads that cheap requests could use. When a slot frees up,
+    the waiter with the best priority (lowest number) goes first, then the oldest. If the
+    queue is full, a new request displaces the worst waiter when it has a better
+    priority. Otherwise it is rejected immediately.
+
+    Limits are per worker process and only bind with threaded workers. With sync workers
+    each process handles one request at a time, so the backlog builds in the listen
+    socket instead. `max_queue_age` covers that case: a request whose X-Request-Start
+    (set by the router) is already older than this is rejected before any work is done.
+    """
+    def __init__(self, capacity, limits, priorities=None, max_queue=32, queue_timeout=0.5,
+                 queue_timeouts=None, max_queue_age=None, retry_after=1):
+        self.capacity = capacity
+        self.limits = dict(limits)
+        self.priorities = dict(priorities or {})
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.queue_timeouts = dict(queue_timeouts or {})
+        self.max_queue_age = max_queue_age
+        self.retry_after = retry_after
+        self.inflight = {route: 0 for route in self.limits}
+        self.total = 0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_env(cls):
+        """ADMISSION_CAPACITY (default 16, 0 disables; keep it below gunicorn --threads so
+        queued /predict requests have threads to wait on), ADMISSION_LIVE_WEATHER_LIMIT
+        (default half the capacity), ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT_MS
+        (/predict only; live weather never waits), ADMISSION_MAX_QUEUE_AGE_MS (0 disables)"""
+        capacity = int(os.environ.get('ADMISSION_CAPACITY', 16))
+        if capacity <= 0:
+            return None
+        live_limit = int(os.environ.get('ADMISSION_LIVE_WEATHER_LIMIT', max(1, capacity // 2)))
+        max_age = float(os.environ.get('ADMISSION_MAX_QUEUE_AGE_MS', 0)) / 1000
+        return cls(capacity,
+                   limits={'/predict': capacity, '/get-live-weather': live_limit},
+                   priorities={'/predict': 0, '/get-live-weather': 1},
+                   max_queue=int(os.environ.get('ADMISSION_QUEUE_SIZE', 32)),
+                   queue_timeout=float(os.environ.get('ADMISSION_QUEUE_TIMEOUT_MS', 500)) / 1000,
+                   queue_timeouts={'/get-live-weather': 0},
+                   max_queue_age=max_age or None)
+
+    def controls(self, route):
+        return route in self.limits
+
+    def _has_slot(self, route):
+        return self.total < self.capacity and self.inflight[route] < self.limits[route]
+
+    def _is_next(self, entry):
+        # No better-placed waiter that could also take a slot right now
+        return all(other is entry or other[:2] > entry[:2] or not self._has_slot(other[2])
+                   for other in self._waiters)
+
+    def _admit(self, route):
+        self.inflight[route] += 1
+        self.total += 1
+
+    def acquire(self, route, request_start=None):
+        """Take a slot for `route` or raise Rejected('queue_age' | 'limit' | 'queue_full' | 'timeout' | 'displaced')"""
+        if self.max_queue_age and request_start and time.time() - request_start > self.max_queue_age:
+            raise Rejected('queue_age')
+
+        with self._cond:
+            if self._has_slot(route) and not any(self._has_slot(w[2]) for w in self._waiters):
+                self._admit(route)
+                return
+            timeout = self.queue_timeouts.get(route, self.queue_timeout)
+            if timeout <= 0:
+                raise Rejected('limit')
+
+            # [priority, seq, route, state]; state is set to 'displaced' when pushed out
+            entry = [self.priorities.get(route, 0), next(self._seq), route, None]
+            if len(self._waiters) >= self.max_queue:
+                worst = max(self._waiters, key=lambda w: w[:2])
+                if worst[0] <= entry[0]:
+                    raise Rejected('queue_full')
+                worst[3] = 'displaced'
+                self._waiters.remove(worst)
+                self._cond.notify_all()
+            self._waiters.append(entry)
+
+            deadline = time.monotonic() + timeout
+            while True:
+                if entry[3] == 'displaced':
+                    raise Rejected('displaced')
+                if self._has_slot(route) and self._is_next(entry):
+                    self._waiters.remove(entry)
+                    self._admit(route)
+                    # Another waiter on a different route may fit in what is left
+                    self._cond.notify_all()
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiters.remove(entry)
+                    self._cond.notify_all()
+                    raise Rejected('timeout')
+                self._cond.wait(remaining)
+
+    def release(self, route):
+        with self._cond:
+            self.inflight[route] -= 1
+            self.total -= 1
+            self._cond.notify_all()
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._waiters)
+
+def parse_request_start(header):
+    """X-Request-Start as set by Heroku/nginx ('t=1700000000.123' or milliseconds) -> unix seconds"""
+    if not header:
+        return None
+    try:
+        value = float(header.strip().lstrip('t='))
+    except ValueError:
+        return None
+    # Heroku sends milliseconds, nginx's ${msec} sends seconds
+    return value / 1000 if value > 1e11 else value
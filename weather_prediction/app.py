@@ -1,42 +1,59 @@
 # app.py - Updated to train model at startup if not found
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, g, Response
 from flask_cors import CORS
+import hashlib
 import pickle
 import requests
 import os
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from backends import SimpleFallbackModel
+from registry import ModelRegistry, RegistryWatcher, warm_up
+from metrics import metrics
+from profiling import timed_stage, server_timing_header, RequestProfiler
+from capture import TrafficCapture
+from structured_logging import configure_logging, get_logger
+from admission import AdmissionController, Rejected, parse_request_start
+from inference import DeadlineInference, request_budget
+from early_exit import EarlyExitForest
+from charts import ChartRenderer, FORMATS
+from live_stream import StreamHub, StreamFull, city_key
+from live_cache import live_cache_from_env
+from prefetch import Prefetcher
+from cities import CityIndex
+from grids import GridPredictor, model_classes
 
 app = Flask(__name__)
 CORS(app)
 
-# Global model variable
-weather_model = None
+configure_logging()
+log = get_logger('app')
+upstream_log = get_logger('upstream')
+request_log = get_logger('request')
+
+# The serving model with its version and load time, replaced as one tuple by swap_model().
+# A request reads `serving` once, so it never pairs a new model with an old version and
+# finishes on the model it started with
+Serving = namedtuple('Serving', 'model version loaded_at')
+serving = Serving(None, None, None)
+model_registry = ModelRegistry()
+request_profiler = RequestProfiler()
+traffic_capture = TrafficCapture.from_env()  # None unless TRAFFIC_CAPTURE_DIR is set
+CAPTURED_ROUTES = {'/predict': 'predict', '/get-live-weather': 'live'}
+admission = AdmissionController.from_env()  # None when ADMISSION_CAPACITY=0
+deadline_inference = DeadlineInference.from_env()
+chart_renderer = ChartRenderer.from_env()  # matplotlib is only imported on first render
+live_cache = live_cache_from_env()  # Shared by all workers through SQLite unless LIVE_CACHE_PATH=''
+grid_predictor = GridPredictor.from_env()
+PREDICT_BUDGET_MS = float(os.environ.get('PREDICT_BUDGET_MS', 250))  # 0 waits for the model however long it takes
+EARLY_EXIT_MODE = os.environ.get('INFERENCE_EARLY_EXIT', '')  # '', 'exact' or 'approx'
+EARLY_EXIT_DELTA = float(os.environ.get('INFERENCE_EARLY_EXIT_DELTA', 0.05))
+STREAM_MAX_SECONDS = float(os.environ.get('STREAM_MAX_SECONDS', 600))  # Clients reconnect after this
 
 # OpenWeatherMap API configuration
 WEATHER_API_KEY = os.environ.get('WEATHER_API_KEY', '8f38a492cf893447c3181c9289354561')  # Fallback key
-WEATHER_API_URL = "https://api.openweathermap.org/data/2.5/weather"
-
-class SimpleFallbackModel:
-    """Simple rule-based weather prediction as fallback"""
-    def __init__(self):
-        self.is_trained = True
-    
-    def predict(self, temperature, humidity, pressure, wind_speed, cloud_cover):
-        """Simple rule-based prediction"""
-        # Basic weather prediction logic
-        if cloud_cover > 80 and humidity > 85:
-            prediction = "Rainy"
-            probabilities = {"Rainy": 0.8, "Cloudy": 0.15, "Sunny": 0.05}
-        elif cloud_cover > 60:
-            prediction = "Cloudy"
-            probabilities = {"Cloudy": 0.6, "Rainy": 0.25, "Sunny": 0.15}
-        elif temperature > 25 and cloud_cover < 30:
-            prediction = "Sunny"
-            probabilities = {"Sunny": 0.7, "Cloudy": 0.25, "Rainy": 0.05}
-        else:
-            prediction = "Clear"
-            probabilities = {"Clear": 0.5, "Cloudy": 0.3, "Sunny": 0.2}
-        
-        return prediction, probabilities
+WEATHER_API_URL = os.environ.get('WEATHER_API_URL', "https://api.openweathermap.org/data/2.5/weather")
 
 def train_model_at_startup():
     """Train model at startup if pre-trained model doesn't exist"""
@@ -45,58 +62,79 @@ def train_model_at_startup():
         from data_generator import generate_weather_data
         from model import WeatherPredictor
         
-        print("🤖 Training new model at startup...")
+        log.info("Training new model at startup")
         
         # Generate training data
         df = generate_weather_data(1000)  # Smaller dataset for faster startup
-        print(f"✅ Generated {len(df)} training samples")
+        log.info("Generated training samples", extra={'rows': len(df)})
         
         # Create and train model
-        model = WeatherPredictor()
+        model = WeatherPredictor()  # Backend chosen by WEATHER_MODEL_BACKEND
         results = model.train(df)
-        print(f"✅ Model trained with {results['accuracy']:.1%} accuracy")
+        log.info("Model trained", extra={'accuracy': round(results['accuracy'], 4)})
         
         return model
         
     except Exception as e:
-        print(f"❌ Failed to train model at startup: {e}")
+        log.exception("Failed to train model at startup")
         return None
 
+def swap_model(model, version):
+    """Atomically make `model` the serving model: one assignment publishes all three fields"""
+    global serving
+    serving = Serving(model, version, datetime.now(timezone.utc).isoformat())
+    ml = is_ml_model(model)
+    metrics.set_gauge('weather_model_active', int(ml), {'type': 'ml'})
+    metrics.set_gauge('weather_model_active', int(not ml), {'type': 'fallback'})
+    log.info("Serving model", extra={'version': version, 'backend': getattr(model, 'backend', 'random_forest')})
+
+def artifact_version(prefix, payload):
+    """A version that changes whenever the artifact does, e.g. 'local-3f2a9c1b7e04'.
+    
+    Cached live predictions (which outlive restarts in the shared cache) and grid tiles are
+    keyed by it, so a deploy with a new weather_model.pkl doesn't serve the old model's.
+    """
+    return f"{prefix}-{hashlib.sha256(payload).hexdigest()[:12]}"
+
 def load_or_train_model():
     """Load pre-trained model or train new one"""
-    global weather_model
-    print("="*50)
-    print("🔄 Initializing weather prediction model...")
-    print("="*50)
+    global serving
+    log.info("Initializing weather prediction model")
     
     model_path = 'models/weather_model.pkl'
+    active_version = model_registry.active_version()
     
     try:
-        # First, try to load pre-trained model
-        if os.path.exists(model_path):
-            print(f"📁 Found pre-trained model at: {model_path}")
+        # The registry's active version wins over the bundled model file
+        if active_version:
+            log.info("Loading registry model", extra={'version': active_version})
+            swap_model(warm_up(model_registry.load(active_version)), active_version)
+        
+        # Otherwise, try to load pre-trained model
+        elif os.path.exists(model_path):
+            log.info("Loading pre-trained model", extra={'path': model_path})
             
             with open(model_path, 'rb') as f:
-                weather_model = pickle.load(f)
-            
-            print("✅ Pre-trained ML model loaded successfully!")
+                payload = f.read()
+            model = pickle.loads(payload)
             
             # Verify model is trained
-            if hasattr(weather_model, 'is_trained') and weather_model.is_trained:
-                print("✅ Model is trained and ready for predictions")
-                if hasattr(weather_model, 'model'):
-                    print("🎯 Available weather classes:", list(weather_model.model.classes_))
+            if hasattr(model, 'is_trained') and model.is_trained:
+                if hasattr(model, 'model'):
+                    log.info("Pre-trained model ready", extra={'classes': list(model.model.classes_)})
             else:
                 raise Exception("Loaded model is not properly trained")
+            swap_model(warm_up(model), artifact_version('local', payload))
         else:
             # Model file doesn't exist, train new one
-            print(f"📁 Pre-trained model not found at: {model_path}")
-            print("🤖 Training new model...")
+            log.info("Pre-trained model not found, training a new one", extra={'path': model_path})
             
-            weather_model = train_model_at_startup()
+            model = train_model_at_startup()
             
-            if weather_model is None:
+            if model is None:
                 raise Exception("Failed to train new model")
+            payload = pickle.dumps(model)
+            swap_model(warm_up(model), artifact_version('startup', payload))
             
             # Try to save the newly trained model
             try:
@@ -104,32 +142,109 @@ def load_or_train_model():
                     os.makedirs('models')
                 
                 with open(model_path, 'wb') as f:
-                    pickle.dump(weather_model, f)
-                print(f"💾 New model saved to: {model_path}")
+                    f.write(payload)
+                log.info("New model saved", extra={'path': model_path})
             except Exception as save_error:
-                print(f"⚠️  Could not save model: {save_error}")
-                print("   (Model will still work for current session)")
-                
-        print("="*50)
-        print("🎉 ML MODEL READY!")
-        print("="*50)
+                # Model will still work for current session
+                log.warning("Could not save model", extra={'error': str(save_error)})
         
     except Exception as e:
-        print(f"❌ Failed to load/train ML model: {e}")
-        print("🔄 Falling back to simple rule-based model...")
+        log.error("Failed to load/train ML model, falling back to rule-based model", extra={'error': str(e)})
         
         try:
-            weather_model = SimpleFallbackModel()
-            print("✅ Fallback model initialized successfully!")
-            print("="*50)
-            print("🎉 FALLBACK MODEL ACTIVE!")
-            print("="*50)
+            swap_model(warm_up(SimpleFallbackModel()), 'fallback')
         except Exception as fallback_error:
-            print(f"❌ Fallback model also failed: {fallback_error}")
-            weather_model = None
-            print("="*50)
-            print("❌ ALL MODELS FAILED!")
-            print("="*50)
+            log.critical("Fallback model also failed, no model available", extra={'error': str(fallback_error)})
+            serving = Serving(None, None, None)
+
+def is_ml_model(model):
+    """True when the serving model is a trained estimator rather than rules"""
+    return hasattr(model, 'model') and getattr(model, 'backend', 'random_forest') != 'rule_based'
+
+def predict_function(model, explain=False):
+    """fn(*features) -> (prediction, probabilities[, extra response fields]).
+    
+    Explanations and early exit need a tree ensemble; other models just predict.
+    """
+    forest = hasattr(model, 'predict_early') and EarlyExitForest.supports(model.model)
+    if explain and forest:
+        def run(*features):
+            prediction, probabilities, explanation = model.predict_explained(*features)
+            return prediction, probabilities, {'explanation': explanation}
+        return run
+    if EARLY_EXIT_MODE and forest:
+        def run(*features):
+            prediction, probabilities, trees_used = model.predict_early(
+                *features, mode=EARLY_EXIT_MODE, delta=EARLY_EXIT_DELTA
+            )
+            return prediction, probabilities, {'trees_used': trees_used}
+        return run
+    return model.predict
+
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    metrics.add_gauge('weather_inflight_requests', 1)
+    if request_profiler.enabled and request_profiler.wants(request):
+        g.profile = request_profiler.start()
+
+@app.before_request
+def admit_request():
+    """Shed load with a fast 503 instead of letting every client queue into a timeout"""
+    route = request.url_rule.rule if request.url_rule else None
+    if not admission or not admission.controls(route):
+        return None
+    try:
+        with timed_stage('admission'):
+            admission.acquire(route, parse_request_start(request.headers.get('X-Request-Start')))
+    except Rejected as e:
+        metrics.inc('weather_admission_rejected_total', {'route': route, 'reason': e.reason})
+        response = jsonify({'success': False, 'error': 'Server is busy, please try again shortly.'})
+        response.headers['Retry-After'] = str(admission.retry_after)
+        return response, 503
+    g.admitted_route = route
+
+@app.after_request
+def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    elapsed = time.perf_counter() - g.request_start
+    metrics.observe('weather_http_request_duration_seconds', elapsed, {'route': route})
+    response.headers['Server-Timing'] = server_timing_header(g.get('server_timing', {}), elapsed)
+    request_log.debug("Request handled", extra={
+        'route': route, 'method': request.method, 'status': response.status_code,
+        'latency_ms': round(elapsed * 1000, 2), 'city': request.args.get('city'),
+    })
+    if traffic_capture and route in CAPTURED_ROUTES and traffic_capture.sampled():
+        capture_request(CAPTURED_ROUTES[route], response.status_code, elapsed)
+    if g.get('profile'):
+        response.headers['X-Profile-File'] = os.path.basename(request_profiler.finish(g.pop('profile'), route))
+    metrics.inc('weather_http_requests_total',
+                {'route': route, 'method': request.method, 'status': str(response.status_code)})
+    return response
+
+def capture_request(route, status, elapsed):
+    """Queue a compact copy of the request for later replay"""
+    if route == 'predict':
+        data = request.get_json(silent=True)
+        fields = ['temperature', 'humidity', 'pressure', 'wind_speed', 'cloud_cover']
+        body = [data.get(f) for f in fields] if isinstance(data, dict) else None
+    else:
+        body = request.args.get('city', 'London')
+    traffic_capture.record(route, body, status, elapsed * 1000)
+
+@app.teardown_request
+def finish_request_metrics(error):
+    metrics.add_gauge('weather_inflight_requests', -1)
+    if g.get('profile'):
+        # The view raised before after_request could stop it; don't leave it profiling the thread
+        request_profiler.finish(g.pop('profile'), request.url_rule.rule if request.url_rule else 'unmatched')
+    if g.get('admitted_route'):
+        admission.release(g.admitted_route)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint, aggregated across gunicorn workers"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/')
 def home():
@@ -139,69 +254,96 @@ def home():
 @app.route('/predict', methods=['POST'])
 def predict():
     """API endpoint for weather prediction"""
+    # Hold one reference for the whole request, even if a reload swaps the global
+    model = serving.model
     try:
-        if weather_model is None:
+        if model is None:
             return jsonify({
                 'success': False,
                 'error': 'Weather prediction model is not available'
             }), 500
             
         # Get data from request
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({
-                'success': False,
-                'error': 'No data provided'
-            }), 400
+        with timed_stage('parse'):
+            data = request.get_json()
         
-        # Validate required fields
-        required_fields = ['temperature', 'humidity', 'pressure', 'wind_speed', 'cloud_cover']
-        for field in required_fields:
-            if field not in data:
+        with timed_stage('validation'):
+            if not data:
                 return jsonify({
                     'success': False,
-                    'error': f'Missing required field: {field}'
+                    'error': 'No data provided'
                 }), 400
-        
-        temperature = float(data['temperature'])
-        humidity = float(data['humidity'])
-        pressure = float(data['pressure'])
-        wind_speed = float(data['wind_speed'])
-        cloud_cover = float(data['cloud_cover'])
-        
-        # Validate ranges
-        if not (0 <= humidity <= 100):
-            return jsonify({
-                'success': False,
-                'error': 'Humidity must be between 0 and 100'
-            }), 400
             
-        if not (0 <= cloud_cover <= 100):
-            return jsonify({
-                'success': False,
-                'error': 'Cloud cover must be between 0 and 100'
-            }), 400
+            # Validate required fields
+            required_fields = ['temperature', 'humidity', 'pressure', 'wind_speed', 'cloud_cover']
+            for field in required_fields:
+                if field not in data:
+                    return jsonify({
+                        'success': False,
+                        'error': f'Missing required field: {field}'
+                    }), 400
             
-        if wind_speed < 0:
-            return jsonify({
-                'success': False,
-                'error': 'Wind speed cannot be negative'
-            }), 400
+            temperature = float(data['temperature'])
+            humidity = float(data['humidity'])
+            pressure = float(data['pressure'])
+            wind_speed = float(data['wind_speed'])
+            cloud_cover = float(data['cloud_cover'])
+            
+            # Validate ranges
+            if not (0 <= humidity <= 100):
+                return jsonify({
+                    'success': False,
+                    'error': 'Humidity must be between 0 and 100'
+                }), 400
+                
+            if not (0 <= cloud_cover <= 100):
+                return jsonify({
+                    'success': False,
+                    'error': 'Cloud cover must be between 0 and 100'
+                }), 400
+                
+            if wind_speed < 0:
+                return jsonify({
+                    'success': False,
+                    'error': 'Wind speed cannot be negative'
+                }), 400
         
-        # Make prediction
-        prediction, probabilities = weather_model.predict(
-            temperature, humidity, pressure, wind_speed, cloud_cover
-        )
+        # Make prediction within the request's latency budget, degrading to the rules if needed
+        features = (temperature, humidity, pressure, wind_speed, cloud_cover)
+        explain = bool(data.get('explain')) or request.args.get('explain') in ('1', 'true')
+        with timed_stage('inference'):
+            if is_ml_model(model):
+                budget = request_budget(request.headers.get('X-Deadline-Ms'), data.get('deadline_ms'),
+                                        PREDICT_BUDGET_MS, time.perf_counter() - g.request_start)
+                result, degraded = deadline_inference.predict(predict_function(model, explain), features, budget)
+            else:
+                result, degraded = model.predict(*features), None
+            prediction, probabilities = result[:2]
+        if degraded:
+            metrics.inc('weather_degraded_predictions_total', {'reason': degraded})
         
         # Convert probabilities to percentages
-        prob_percentages = {k: round(v * 100, 1) for k, v in probabilities.items()}
-        
-        return jsonify({
-            'success': True,
-            'prediction': prediction,
-            'probabilities': prob_percentages
-        })
+        with timed_stage('serialize'):
+            prob_percentages = {k: round(v * 100, 1) for k, v in probabilities.items()}
+            
+            response = {
+                'success': True,
+                'prediction': prediction,
+                'probabilities': prob_percentages,
+                'degraded': degraded is not None
+            }
+            extra = result[2] if len(result) > 2 else {}
+            if 'trees_used' in extra:
+                response['trees_used'] = extra['trees_used']
+                metrics.observe('weather_early_exit_trees', extra['trees_used'])
+            if explain:
+                # Percentage points, like the probabilities; None when the model can't explain
+                explanation = extra.get('explanation')
+                response['explanation'] = explanation and {
+                    'bias': round(explanation['bias'] * 100, 2),
+                    'contributions': {k: round(v * 100, 2) for k, v in explanation['contributions'].items()}
+                }
+            return jsonify(response)
         
     except ValueError as e:
         return jsonify({
@@ -226,8 +368,46 @@ def get_live_weather():
             'error': 'City name is required'
         })
     
-    city = city.strip()
+    resolution = resolve_city(city)
+    if resolution['rejected']:
+        return jsonify(rejected_city(city, resolution))
     
+    city = resolution['query']
+    if prefetcher:
+        prefetcher.record(city_key(city))
+    weather_data, _ = observe_city(city)
+    if not weather_data['success'] and resolution['suggestions']:
+        # e.g. a typo upstream doesn't know either: offer the close matches from the list
+        weather_data = dict(weather_data, suggestions=[s['label'] for s in resolution['suggestions']])
+    with timed_stage('serialize'):
+        return jsonify(weather_data)
+
+# Bundled city list: spelling variants of a listed city resolve to one upstream query,
+# names that can't be a city never reach OpenWeatherMap, and typos get suggestions
+city_index = CityIndex.from_env()
+
+def resolve_city(city):
+    with timed_stage('validation'):
+        resolution = city_index.resolve(city)
+    metrics.inc('weather_city_resolution_total', {'result': resolution['status']})
+    return resolution
+
+def rejected_city(city, resolution):
+    suggestions = [s['label'] for s in resolution['suggestions']]
+    error = 'Please enter a valid city name' if resolution['status'] == 'invalid' else \
+        f'City "{city.strip()}" not found. Please check the spelling and try again.'
+    return {'success': False, 'error': error, 'suggestions': suggestions}
+
+@app.route('/cities')
+def city_suggestions():
+    """City-name autocomplete from the bundled list: ?q=lon&limit=8"""
+    prefix = request.args.get('q', '')
+    limit = min(request.args.get('limit', 8, type=int) or 8, 20)
+    matches = city_index.complete(prefix, limit=limit) if prefix.strip() else []
+    return jsonify({'success': True, 'cities': matches}), 200, {'Cache-Control': 'public, max-age=3600'}
+
+def fetch_live_weather(city):
+    """Current conditions for a city from OpenWeatherMap, as the /get-live-weather payload"""
     try:
         # Make API request to OpenWeatherMap
         params = {
@@ -236,11 +416,15 @@ def get_live_weather():
             'units': 'metric'
         }
         
-        print(f"Fetching weather for: {city}")  # Debug log
-        
-        response = requests.get(WEATHER_API_URL, params=params, timeout=10)
+        upstream_start = time.perf_counter()
+        with timed_stage('upstream'):
+            response = requests.get(WEATHER_API_URL, params=params, timeout=10)
         
-        print(f"API Response Status: {response.status_code}")  # Debug log
+        # Sampled and rate-limited; costs nothing unless LOG_LEVEL=DEBUG
+        upstream_log.debug("Upstream weather fetch", extra={
+            'route': '/get-live-weather', 'city': city, 'status': response.status_code,
+            'latency_ms': round((time.perf_counter() - upstream_start) * 1000, 2)
+        })
         
         if response.status_code == 200:
             data = response.json()
@@ -259,62 +443,215 @@ def get_live_weather():
                     'description': data['weather'][0]['description'],
                     'icon': data['weather'][0]['icon'],
                     'feels_like': round(data['main']['feels_like'], 1),
-                    'visibility': round(data.get('visibility', 0) / 1000, 1) if data.get('visibility') else 0  # Convert to km
+                    'visibility': round(data.get('visibility', 0) / 1000, 1) if data.get('visibility') else 0,  # Convert to km
+                    # Station location, for interpolating regional grids
+                    'lat': data.get('coord', {}).get('lat'),
+                    'lon': data.get('coord', {}).get('lon')
                 }
                 
-                return jsonify(weather_data)
+                return weather_data
                 
             except KeyError as e:
-                return jsonify({
+                return {
                     'success': False,
                     'error': f'Missing data in weather response: {str(e)}'
-                })
+                }
                 
         elif response.status_code == 401:
-            return jsonify({
+            return {
                 'success': False,
                 'error': 'Invalid API key. Please check your OpenWeatherMap API key.'
-            })
+            }
         elif response.status_code == 404:
-            return jsonify({
+            return {
                 'success': False,
                 'error': f'City "{city}" not found. Please check the spelling and try again.'
-            })
+            }
         else:
-            return jsonify({
+            return {
                 'success': False,
                 'error': f'Weather service error: {response.status_code}'
-            })
+            }
             
     except requests.exceptions.Timeout:
-        return jsonify({
+        return {
             'success': False,
             'error': 'Request timeout. Please try again.'
-        })
+        }
     except requests.exceptions.ConnectionError:
-        return jsonify({
+        return {
             'success': False,
             'error': 'Unable to connect to weather service. Please check your internet connection.'
-        })
+        }
     except requests.exceptions.RequestException as e:
-        return jsonify({
+        return {
             'success': False,
             'error': f'Weather API request error: {str(e)}'
-        })
+        }
     except Exception as e:
-        return jsonify({
+        return {
             'success': False,
             'error': f'Unexpected error: {str(e)}'
-        })
+        }
+
+def observe_city(city, predict=False, refresh=False):
+    """(weather payload, prediction or None) for a city, from the live cache while it's fresh.
+    
+    Only successful observations are cached. The prediction is made when first asked for
+    and kept with the observation until the serving model changes.
+    """
+    key = city_key(city)
+    entry = None if refresh else live_cache.get(key)
+    if not refresh:
+        metrics.inc('weather_live_cache_total', {'result': 'hit' if entry else 'miss'})
+    if entry is None:
+        entry = {'weather': fetch_live_weather(city), 'prediction': None, 'fetched_at': time.time()}
+        if entry['weather']['success']:
+            live_cache.put(key, entry)
+    
+    if not (predict and entry['weather']['success']):
+        return entry['weather'], None
+    current = serving
+    if entry['prediction'] is None or entry['prediction']['model_version'] != current.version:
+        entry['prediction'] = live_prediction(entry['weather'], current)
+        live_cache.put(key, entry)  # Keeps its expiry, since that follows fetched_at
+    return entry['weather'], entry['prediction']
+
+def live_prediction(weather_data, current):
+    """Prediction for a live observation, shared by everyone who asks for that city"""
+    model = current.model
+    if model is None:
+        return None
+    features = tuple(float(weather_data[f]) for f in ('temperature', 'humidity', 'pressure', 'wind_speed', 'cloud_cover'))
+    with timed_stage('inference'):
+        prediction, probabilities = (predict_function(model) if is_ml_model(model) else model.predict)(*features)[:2]
+    return {
+        'prediction': prediction,
+        'probabilities': {k: round(v * 100, 1) for k, v in probabilities.items()},
+        'model_version': current.version
+    }
+
+stream_hub = StreamHub.from_env(lambda city: observe_city(city, predict=True))
+# Refreshes the most requested cities before their cache entries expire; None when PREFETCH_TOP_N=0
+prefetcher = Prefetcher.from_env(lambda city: observe_city(city, predict=True, refresh=True)[0]['success'],
+                                 live_cache)
+
+@app.route('/stream')
+def stream():
+    """Server-Sent Events for ?city=London&city=Paris: live weather plus prediction per poll"""
+    cities = request.args.getlist('city') + request.args.get('cities', '').split(',')
+    resolved = []
+    for city in cities:
+        if not city.strip():
+            continue
+        resolution = resolve_city(city)
+        if resolution['rejected']:
+            return jsonify(rejected_city(city, resolution)), 400
+        resolved.append(resolution['query'])
+    cities = resolved
+    try:
+        subscription = stream_hub.subscribe(cities)
+        if prefetcher:
+            for city in subscription.cities:
+                prefetcher.record(city)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except StreamFull as e:
+        return jsonify({'success': False, 'error': str(e)}), 503, {'Retry-After': '10'}
+    
+    return Response(stream_hub.events(subscription, max_seconds=STREAM_MAX_SECONDS),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/charts/<chart>.<fmt>')
+def chart(chart, fmt):
+    """Server-rendered visualizer chart, e.g. /charts/feature-importance.svg?w=800&h=600"""
+    current = serving
+    model, version = current.model, current.version
+    try:
+        key = chart_renderer.key(chart, version, int(request.args.get('w', 800)),
+                                 int(request.args.get('h', 600)), fmt)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except LookupError as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    
+    # The ETag comes from the key, so revalidation never renders anything
+    etag = chart_renderer.etag(key)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        try:
+            with timed_stage('render'):
+                body = chart_renderer.get(key, model)
+        except LookupError as e:
+            return jsonify({'success': False, 'error': str(e)}), 404
+        response = Response(body, mimetype=FORMATS[fmt])
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/grid', methods=['GET', 'POST'])
+def grid():
+    """Predicted conditions over a region, e.g. /grid?bbox=-10,35,30,60&res=0.25
+    
+    GET interpolates the features from cached live observations. POST an .npz of
+    per-cell fields (as the body or a 'fields' file) to supply them; any feature left out
+    is still interpolated. The body is rows × cols uint8 class IDs followed by rows × cols
+    uint8 top probabilities (0-255), rows north to south; the X-Grid-* headers describe it.
+    """
+    current = serving
+    model, version = current.model, current.version
+    if model is None:
+        return jsonify({'success': False, 'error': 'Model not loaded'}), 503
+    try:
+        with timed_stage('parse'):
+            window = grid_predictor.window(request.args.get('bbox'), request.args.get('res', 0.25))
+            fields = None
+            if request.method == 'POST':
+                upload = request.files.get('fields')
+                fields = grid_predictor.load_fields(upload.read() if upload else request.get_data(), window)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    stations = grid_predictor.stations(live_cache.entries) if grid_predictor.needs_stations(fields) else (None, None)
+    # Same model, inputs and region give the same bytes, so revalidation skips inference
+    etag = grid_predictor.etag(window, version, fields, stations)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        try:
+            with timed_stage('inference'):
+                class_ids, confidence, info = grid_predictor.predict(window, model, version, fields, stations)
+        except LookupError as e:
+            return jsonify({'success': False, 'error': str(e)}), 409
+        metrics.inc('weather_grid_tiles_total', {'result': 'hit'}, info['tiles'] - info['tiles_computed'])
+        metrics.inc('weather_grid_tiles_total', {'result': 'computed'}, info['tiles_computed'])
+        with timed_stage('serialize'):
+            response = Response(class_ids.tobytes() + confidence.tobytes(), mimetype='application/octet-stream')
+        response.headers['X-Grid-Tiles'] = f"{info['tiles_computed']}/{info['tiles']} computed"
+        response.headers['X-Grid-Stations'] = str(info['stations'])
+    response.set_etag(etag)
+    response.headers['X-Grid-Shape'] = f'{window.r1 - window.r0},{window.c1 - window.c0}'
+    response.headers['X-Grid-Bounds'] = ','.join(f'{v:g}' for v in grid_predictor.bounds(window))
+    response.headers['X-Grid-Classes'] = ','.join(str(c) for c in model_classes(model))
+    response.headers['X-Model-Version'] = str(version)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/model-info')
 def model_info():
     """Get model information"""
-    if weather_model and hasattr(weather_model, 'is_trained') and weather_model.is_trained:
-        model_type = "Machine Learning" if hasattr(weather_model, 'model') else "Rule-based"
+    current = serving
+    model = current.model
+    if model and hasattr(model, 'is_trained') and model.is_trained:
+        model_type = "Machine Learning" if is_ml_model(model) else "Rule-based"
         return jsonify({
             'trained': True,
             'type': model_type,
+            'backend': getattr(model, 'backend', 'random_forest'),
+            'version': current.version,
+            'loaded_at': current.loaded_at,
             'features': ['temperature', 'humidity', 'pressure', 'wind_speed', 'cloud_cover']
         })
     return jsonify({'trained': False})
@@ -338,23 +675,27 @@ def initialize_app():
     
     # Load or train model
     load_or_train_model()
+    metrics.start_flusher()
+    if prefetcher:
+        prefetcher.start()
     
-    # Show model status
-    if weather_model is None:
-        print("⚠️  WARNING: No model loaded!")
-    else:
-        model_type = "ML Model" if hasattr(weather_model, 'model') else "Fallback Model"
-        print(f"✅ {model_type} loaded and ready!")
+    # Watch the registry's ACTIVE pointer and hot-swap new versions
+    reload_interval = float(os.environ.get('MODEL_RELOAD_INTERVAL', 5))
+    if reload_interval > 0:
+        RegistryWatcher(model_registry, swap_model, reload_interval,
+                        current_version=serving.version).start()
     
-    print("\n" + "="*50)
-    print("🌤️  WEATHER PREDICTION WEB APP")
-    print("="*50)
-    print("📝 API Key Status:")
-    if WEATHER_API_KEY == "8f38a492cf893447c3181c9289354561":
-        print("   ⚠️  Using default/fallback API key")
+    # Show model status
+    current = serving
+    if current.model is None:
+        log.warning("No model loaded")
     else:
-        print("   ✅ Using environment variable API key")
-    print("="*50)
+        log.info("Weather prediction app ready", extra={
+            'model_type': "ml" if is_ml_model(current.model) else "fallback",
+            'backend': getattr(current.model, 'backend', 'random_forest'),
+            'version': current.version,
+            'api_key': 'default' if WEATHER_API_KEY == "8f38a492cf893447c3181c9289354561" else 'environment',
+        })
 
 # Initialize the app when module loads
 initialize_app()
@@ -364,7 +705,6 @@ if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug_mode = os.environ.get('FLASK_ENV') != 'production'
     
-    print(f"🌐 Server starting on port: {port}")
-    print("="*50)
+    log.info("Server starting", extra={'port': port})
     
     app.run(debug=debug_mode, host='0.0.0.0', port=port)
\ No newline at end of file
@@ -0,0 +1,129 @@
+#backends.py
+import os
+import numpy as np
+
+DEFAULT_BACKEND = 'random_forest'
+
+# name -> {'factory': callable(**params), 'defaults': dict, 'param_space': dict}
+BACKENDS = {}
+
+def register_backend(name, defaults=None, param_space=None):
+    """Register an estimator factory under a backend name"""
+    def decorator(factory):
+        BACKENDS[name] = {
+            'factory': factory,
+            'defaults': dict(defaults or {}),
+            'param_space': dict(param_space or {}),
+        }
+        return factory
+    return decorator
+
+def create_backend(name=None, **params):
+    """Create an unfitted estimator for the given backend name"""
+    name = name or get_backend_name()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown model backend: {name} (available: {', '.join(sorted(BACKENDS))})")
+    entry = BACKENDS[name]
+    return entry['factory'](**{**entry['defaults'], **params})
+
+def get_backend_name():
+    """Backend selected by configuration (WEATHER_MODEL_BACKEND)"""
+    return os.environ.get('WEATHER_MODEL_BACKEND', DEFAULT_BACKEND)
+
+def available_backends():
+    return sorted(BACKENDS)
+
+@register_backend(
+    'random_forest',
+    defaults={'n_estimators': 100, 'random_state': 42},
+    param_space={
+        'n_estimators': [50, 100, 200, 400],
+        'max_depth': [None, 8, 12, 16],
+        'min_samples_leaf': [1, 2, 4],
+        'max_features': ['sqrt', 0.6, 1.0],
+    },
+)
+def _random_forest(**params):
+    # sklearn is imported lazily so the rule-based fallback works without it
+    from sklearn.ensemble import RandomForestClassifier
+    return RandomForestClassifier(**params)
+
+@register_backend(
+    'hist_gradient_boosting',
+    defaults={'max_iter': 100, 'random_state': 42},
+    param_space={
+        'max_iter': [50, 100, 200, 400],
+        'learning_rate': [0.03, 0.1, 0.3],
+        'max_leaf_nodes': [15, 31, 63],
+        'min_samples_leaf': [10, 20, 40],
+        'l2_regularization': [0.0, 0.1, 1.0],
+    },
+)
+def _hist_gradient_boosting(**params):
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    return HistGradientBoostingClassifier(**params)
+
+@register_backend('rule_based')
+def _rule_based(**params):
+    return RuleBasedClassifier()
+
+class RuleBasedClassifier:
+    """Vectorized version of the rule-based fallback with an estimator interface"""
+    classes_ = np.array(['Clear', 'Cloudy', 'Rainy', 'Snowy', 'Sunny'])
+
+    # Rule outcomes in evaluation order, with their probability rows in classes_ order
+    _OUTCOMES = np.array(['Rainy', 'Cloudy', 'Sunny', 'Clear'])
+    _PROBA = np.array([
+        [0.0, 0.15, 0.8, 0.0, 0.05],
+        [0.0, 0.6, 0.25, 0.0, 0.15],
+        [0.0, 0.25, 0.05, 0.0, 0.7],
+        [0.5, 0.3, 0.0, 0.0, 0.2],
+    ])
+
+    def __init__(self):
+        self.feature_importances_ = None
+
+    def fit(self, X, y=None):
+        return self
+
+    def _rule_index(self, X):
+        X = np.asarray(X, dtype=float)
+        temperature, humidity, cloud_cover = X[:, 0], X[:, 1], X[:, 4]
+        # Rules are checked in order, so later conditions only apply to unmatched rows
+        return np.select(
+            [
+                (cloud_cover > 80) & (humidity > 85),
+                cloud_cover > 60,
+                (temperature > 25) & (cloud_cover < 30),
+            ],
+            [0, 1, 2],
+            default=3,
+        )
+
+    def predict_proba(self, X):
+        return self._PROBA[self._rule_index(X)]
+
+    def predict(self, X):
+        return self._OUTCOMES[self._rule_index(X)]
+
+class SimpleFallbackModel:
+    """Simple rule-based weather prediction as fallback"""
+    def __init__(self):
+        self.is_trained = True
+        self.backend = 'rule_based'
+        self.rules = RuleBasedClassifier()
+
+    def predict(self, temperature, humidity, pressure, wind_speed, cloud_cover):
+        """Simple rule-based prediction"""
+        input_data = [[temperature, humidity, pressure, wind_speed, cloud_cover]]
+        prediction = self.rules.predict(input_data)[0]
+        probabilities = self.rules.predict_proba(input_data)[0]
+
+        # Only report the classes each rule actually assigns probability to
+        return str(prediction), {
+            str(c): float(p) for c, p in zip(self.rules.classes_, probabilities) if p > 0
+        }
+
+    def predict_batch(self, X):
+        """Labels and class probabilities for many rows, like WeatherPredictor.predict_batch"""
+        return self.rules.predict(X), self.rules.predict_proba(X)
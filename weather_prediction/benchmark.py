@@ -0,0 +1,282 @@
+#benchmark.py
+import argparse
+import json
+import os
+import pickle
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+import numpy as np
+from data_generator import generate_weather_data
+from model import WeatherPredictor, FEATURES
+from backends import available_backends
+
+# name -> function(quick) returning a flat dict of metrics
+BENCHMARKS = {}
+
+def benchmark(name):
+    """Register a benchmark in the suite"""
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000)
+
+def time_single_predictions(model, X, repeats=500):
+    """Latency of WeatherPredictor.predict, one row at a time"""
+    samples = []
+    for i in range(repeats):
+        row = X[i % len(X)]
+        start = time.perf_counter()
+        model.predict(*row)
+        samples.append(time.perf_counter() - start)
+    return {
+        'p50_ms': percentile_ms(samples, 50),
+        'p99_ms': percentile_ms(samples, 99),
+        'mean_ms': float(np.mean(samples) * 1000),
+    }
+
+def time_batch_predictions(model, X, repeats=5):
+    """Throughput of WeatherPredictor.predict_batch over the whole array"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_batch(X)
+        best = min(best, time.perf_counter() - start)
+    return {'rows': len(X), 'seconds': best, 'rows_per_sec': len(X) / best}
+
+def benchmark_backend(backend, df, X, single_repeats=500, batch_repeats=5):
+    """Train, serialize and time one backend on the same data as every other"""
+    model = WeatherPredictor(backend=backend)
+    start = time.perf_counter()
+    results = model.train(df)
+    train_seconds = time.perf_counter() - start
+
+    payload = pickle.dumps(model)
+    start = time.perf_counter()
+    model = pickle.loads(payload)
+    load_seconds = time.perf_counter() - start
+
+    return {
+        'backend': backend,
+        'accuracy': float(results['accuracy']),
+        'train_seconds': train_seconds,
+        'pickle_bytes': len(payload),
+        'load_seconds': load_seconds,
+        'single': time_single_predictions(model, X, single_repeats),
+        'batch': time_batch_predictions(model, X, batch_repeats),
+    }
+
+def compare_backends(backends=None, n_samples=2000, batch_rows=10000):
+    df = generate_weather_data(n_samples)
+    X = generate_weather_data(batch_rows)[FEATURES].to_numpy()
+    return [benchmark_backend(b, df, X) for b in (backends or available_backends())]
+
+def print_comparison(rows):
+    print("="*86)
+    print(f"{'Backend':<24}{'Accuracy':>9}{'Train s':>9}{'Pickle KB':>11}"
+          f"{'p50 ms':>9}{'p99 ms':>9}{'Batch rows/s':>15}")
+    print("="*86)
+    for r in rows:
+        print(f"{r['backend']:<24}{r['accuracy']:>9.1%}{r['train_seconds']:>9.2f}"
+              f"{r['pickle_bytes'] / 1024:>11.0f}{r['single']['p50_ms']:>9.3f}"
+              f"{r['single']['p99_ms']:>9.3f}{r['batch']['rows_per_sec']:>15,.0f}")
+    print("="*86)
+
+# Suite -----------------------------------------------------------------
+
+_trained = {}
+
+def trained_model():
+    """One model shared by the suite, trained like train_and_save_model does"""
+    if 'model' not in _trained:
+        model = WeatherPredictor()
+        model.train(generate_weather_data(2000))
+        _trained['model'] = model
+    return _trained['model']
+
+@benchmark('predict_single')
+def bench_predict_single(quick):
+    X = generate_weather_data(1000)[FEATURES].to_numpy()
+    return time_single_predictions(trained_model(), X, 200 if quick else 1000)
+
+@benchmark('predict_batch')
+def bench_predict_batch(quick):
+    X = generate_weather_data(10000 if quick else 100000)[FEATURES].to_numpy()
+    result = time_batch_predictions(trained_model(), X, 3)
+    return {'rows_per_sec': result['rows_per_sec'], 'seconds': result['seconds']}
+
+def _flask_client():
+    os.environ.setdefault('MODEL_RELOAD_INTERVAL', '0')
+    os.environ['LIVE_CACHE_PATH'] = ''  # Don't read or fill the dev server's shared cache
+    import app
+    return app.app.test_client()
+
+def _endpoint_throughput(send, requests_count):
+    samples = []
+    for _ in range(requests_count):
+        start = time.perf_counter()
+        response = send()
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.status_code
+    return {
+        'requests_per_sec': requests_count / sum(samples),
+        'p50_ms': percentile_ms(samples, 50),
+        'p99_ms': percentile_ms(samples, 99),
+    }
+
+@benchmark('endpoint_predict')
+def bench_endpoint_predict(quick):
+    client = _flask_client()
+    payload = {'temperature': 30, 'humidity': 40, 'pressure': 1020, 'wind_speed': 3, 'cloud_cover': 10}
+    return _endpoint_throughput(lambda: client.post('/predict', json=payload), 200 if quick else 2000)
+
+@benchmark('endpoint_model_info')
+def bench_endpoint_model_info(quick):
+    client = _flask_client()
+    return _endpoint_throughput(lambda: client.get('/model-info'), 200 if quick else 2000)
+
+@benchmark('generate_data')
+def bench_generate_data(quick):
+    n = 20000 if quick else 200000
+    start = time.perf_counter()
+    generate_weather_data(n)
+    elapsed = time.perf_counter() - start
+    return {'rows_per_sec': n / elapsed, 'seconds': elapsed}
+
+@benchmark('train')
+def bench_train(quick):
+    results = {}
+    for n in ([500, 2000] if quick else [500, 2000, 8000, 32000]):
+        df = generate_weather_data(n)
+        start = time.perf_counter()
+        WeatherPredictor().train(df)
+        results[f'seconds_{n}'] = time.perf_counter() - start
+    return results
+
+@benchmark('pickle_load')
+def bench_pickle_load(quick):
+    payload = pickle.dumps(trained_model())
+    samples = []
+    for _ in range(5 if quick else 20):
+        start = time.perf_counter()
+        pickle.loads(payload)
+        samples.append(time.perf_counter() - start)
+    return {'p50_ms': percentile_ms(samples, 50), 'size_bytes': len(payload)}
+
+@benchmark('cold_start')
+def bench_cold_start(quick):
+    """Fresh interpreter importing app, which runs initialize_app()"""
+    code = "import time; t = time.perf_counter(); import app; print('COLD_START', time.perf_counter() - t)"
+    env = dict(os.environ, MODEL_RELOAD_INTERVAL='0', LIVE_CACHE_PATH='')
+    samples = []
+    for _ in range(1 if quick else 3):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                env=env, cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout
+        # App logs are written by a background thread, so find our line rather than assume it is last
+        marker = next(line for line in output.splitlines() if line.startswith('COLD_START'))
+        samples.append((float(marker.split()[1]), time.perf_counter() - start))
+    return {
+        'initialize_seconds': float(np.median([s[0] for s in samples])),
+        'process_seconds': float(np.median([s[1] for s in samples])),
+    }
+
+def run_suite(names=None, quick=False):
+    results = {}
+    for name in names or BENCHMARKS:
+        print(f"⏱️  {name}...", flush=True)
+        results[name] = BENCHMARKS[name](quick)
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'quick': quick,
+        },
+        'benchmarks': results,
+    }
+
+def higher_is_better(metric):
+    return metric.endswith('_per_sec')
+
+def compare_to_baseline(current, baseline, tolerance=0.2):
+    """Return one row per metric present in both runs, flagging changes worse than tolerance"""
+    rows = []
+    for name, metrics in current['benchmarks'].items():
+        for metric, value in metrics.items():
+            base = baseline.get('benchmarks', {}).get(name, {}).get(metric)
+            if not base:
+                continue
+            change = (value - base) / base
+            worse = -change if higher_is_better(metric) else change
+            rows.append({'benchmark': name, 'metric': metric, 'baseline': base, 'current': value,
+                         'change': change, 'regression': worse > tolerance})
+    return rows
+
+def print_suite(results, comparison=None):
+    print("="*78)
+    print("📊 BENCHMARK RESULTS")
+    print("="*78)
+    changes = {(r['benchmark'], r['metric']): r for r in comparison or []}
+    for name, metrics in results['benchmarks'].items():
+        for metric, value in metrics.items():
+            row = changes.get((name, metric))
+            note = ''
+            if row:
+                note = f"{row['change']:+.1%} vs baseline" + ("  ❌ REGRESSION" if row['regression'] else '')
+            print(f"{name:<22}{metric:<22}{value:>14.4f}  {note}")
+    print("="*78)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark model, endpoint, startup and data generation hot paths")
+    parser.add_argument('--only', action='append', choices=sorted(BENCHMARKS), help="Run just this benchmark (repeatable)")
+    parser.add_argument('--quick', action='store_true', help="Smaller sizes for a fast smoke run")
+    parser.add_argument('--json', help="Write results to this JSON file")
+    parser.add_argument('--baseline', help="Compare against a stored results JSON")
+    parser.add_argument('--save-baseline', help="Also store results as the new baseline at this path")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative slowdown (default 0.2)")
+    parser.add_argument('--compare-backends', action='store_true', help="Compare model backends instead")
+    parser.add_argument('--backend', action='append', choices=available_backends(),
+                        help="Backend to include with --compare-backends (repeatable, default: all)")
+    parser.add_argument('--samples', type=int, default=2000, help="Training rows for --compare-backends")
+    parser.add_argument('--batch-rows', type=int, default=10000, help="Rows per batch for --compare-backends")
+    args = parser.parse_args()
+
+    if args.compare_backends:
+        rows = compare_backends(args.backend, args.samples, args.batch_rows)
+        print_comparison(rows)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(rows, f, indent=2)
+        sys.exit(0)
+
+    # A mistyped baseline must not quietly turn regression checks off. Naming the same file
+    # for --save-baseline is how the first baseline gets made, so that only warns.
+    if args.baseline and not os.path.exists(args.baseline):
+        if not args.save_baseline or os.path.abspath(args.save_baseline) != os.path.abspath(args.baseline):
+            parser.error(f"baseline not found: {args.baseline}")
+        print(f"⚠️  No baseline at {args.baseline} yet; this run will create it")
+
+    results = run_suite(args.only, args.quick)
+    comparison = None
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            comparison = compare_to_baseline(results, json.load(f), args.tolerance)
+    print_suite(results, comparison)
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(os.path.abspath(path)), delete=False) as f:
+                json.dump(results, f, indent=2)
+            os.replace(f.name, path)
+
+    if comparison and any(r['regression'] for r in comparison):
+        print("❌ Performance regression against baseline")
+        sys.exit(1)
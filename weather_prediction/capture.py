@@ -0,0 +1,100 @@
+#capture.py
+import json
+import os
+import queue
+import random
+import threading
+import time
+
+class TrafficCapture:
+    """Samples requests into a compact rotating JSON-lines log without blocking the worker.
+
+    Requests are handed to a bounded queue; a background thread does the file I/O and
+    rotation. When the queue is full the record is dropped (and counted) instead of
+    making the request wait. Each worker process writes its own capture-<pid>.jsonl.
+
+    Record format (short keys keep the log small):
+        {"t": unix time, "r": "predict" | "live", "b": [t, h, p, w, c] or city, "s": status, "d": ms}
+    """
+    def __init__(self, directory, sample_rate=0.1, max_bytes=10 * 2**20, backups=5, queue_size=10000):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Enabled only when TRAFFIC_CAPTURE_DIR is set"""
+        directory = os.environ.get('TRAFFIC_CAPTURE_DIR')
+        if not directory:
+            return None
+        return cls(directory,
+                   sample_rate=float(os.environ.get('TRAFFIC_CAPTURE_RATE', 0.1)),
+                   max_bytes=int(os.environ.get('TRAFFIC_CAPTURE_MAX_BYTES', 10 * 2**20)))
+
+    def sampled(self):
+        return random.random() < self.sample_rate
+
+    def record(self, route, body, status, duration_ms):
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait({'t': round(time.time(), 4), 'r': route, 'b': body,
+                                    's': status, 'd': round(duration_ms, 2)})
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_writer(self):
+        # Started lazily so each forked gunicorn worker gets its own thread and file
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                threading.Thread(target=self._run, daemon=True, name='traffic-capture').start()
+                self._pid = os.getpid()
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, f'capture-{os.getpid()}.jsonl')
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f'{self.path}.{i}'):
+                os.replace(f'{self.path}.{i}', f'{self.path}.{i + 1}')
+        os.replace(self.path, f'{self.path}.1')
+        self._file = open(self.path, 'a')
+
+    def _run(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = open(self.path, 'a')
+        while True:
+            item = self._queue.get()
+            lines = [item]
+            # Drain whatever else is waiting so bursts become one write
+            while len(lines) < 1000:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._file.write(''.join(json.dumps(l, separators=(',', ':')) + '\n' for l in lines))
+            self._file.flush()
+            if self._file.tell() >= self.max_bytes:
+                self._rotate()
+
+def read_capture(paths):
+    """Load records from capture files (rotated backups included), oldest first"""
+    records = []
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue  # Truncated last line of a live file
+    return sorted(records, key=lambda r: r['t'])
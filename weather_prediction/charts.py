@@ -0,0 +1,194 @@
+#charts.py
+import hashlib
+import io
+import os
+import threading
+import warnings
+from collections import OrderedDict
+
+FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+# Chart name -> whether it depends on the serving model
+CHARTS = {
+    'class-distribution': False,
+    'feature-distributions': False,
+    'feature-importance': True,
+}
+MIN_SIZE, MAX_SIZE = 200, 2400
+SIZE_STEP = 100  # Sizes are rounded to this, so arbitrary w/h values can't multiply cache entries
+DPI = 100
+
+class ChartRenderer:
+    """Renders WeatherVisualizer charts headlessly (Agg backend) and caches the bytes.
+
+    A chart is identified by (model version, dataset version, chart, width, height,
+    format). Charts that don't use the model get None as their model version, so a
+    deploy doesn't invalidate them. The ETag is a hash of that key. A request whose
+    If-None-Match already matches therefore gets a 304 without loading any data or
+    rendering. Rendered images go into a small per-process LRU and, when `cache_dir` is
+    set, into a directory shared by all workers that keeps the `max_disk_entries` most
+    recently used files.
+
+    matplotlib, seaborn and the visualizer are imported on the first render only, so
+    workers that never serve a chart don't pay for them. pyplot isn't thread-safe, so
+    renders are serialised with a lock.
+
+    The data is CHART_DATASET (CSV or Parquet) when set, otherwise CHART_SAMPLES rows
+    from generate_weather_data, like main.py uses.
+    """
+    def __init__(self, dataset_path=None, samples=1000, cache_dir=None, max_entries=64, max_disk_entries=256):
+        self.dataset_path = dataset_path
+        self.samples = samples
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._render_lock = threading.Lock()
+        self._dataset = (None, None)
+
+    @classmethod
+    def from_env(cls):
+        return cls(dataset_path=os.environ.get('CHART_DATASET'),
+                   samples=int(os.environ.get('CHART_SAMPLES', 1000)),
+                   cache_dir=os.environ.get('CHART_CACHE_DIR'),
+                   max_disk_entries=int(os.environ.get('CHART_CACHE_MAX_FILES', 256)))
+
+    def dataset_version(self):
+        """Changes when the dataset file does; raises LookupError when it's missing"""
+        if not self.dataset_path:
+            return f'synthetic-{self.samples}'
+        try:
+            stat = os.stat(self.dataset_path)
+        except OSError:
+            raise LookupError(f"Chart dataset not found: {os.path.basename(self.dataset_path)}")
+        return f'{os.path.basename(self.dataset_path)}-{stat.st_mtime_ns}-{stat.st_size}'
+
+    def key(self, chart, model_version, width, height, fmt):
+        """Validated cache key, with the size rounded to SIZE_STEP; raises ValueError for an
+        unknown chart, format or size and LookupError when the dataset is missing"""
+        if chart not in CHARTS:
+            raise ValueError(f"Unknown chart '{chart}'. Choose from: {', '.join(CHARTS)}")
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format '{fmt}'. Choose from: {', '.join(FORMATS)}")
+        if not (MIN_SIZE <= width <= MAX_SIZE and MIN_SIZE <= height <= MAX_SIZE):
+            raise ValueError(f"Width and height must be between {MIN_SIZE} and {MAX_SIZE} pixels")
+        width, height = ((size + SIZE_STEP // 2) // SIZE_STEP * SIZE_STEP for size in (width, height))
+        return (model_version if CHARTS[chart] else None, self.dataset_version(), chart, width, height, fmt)
+
+    @staticmethod
+    def etag(key):
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def get(self, key, model):
+        """Rendered bytes for `key`, from cache when possible"""
+        etag = self.etag(key)
+        with self._lock:
+            if etag in self._memory:
+                self._memory.move_to_end(etag)
+                return self._memory[etag]
+
+        body = self._read_disk(etag, key[-1])
+        if body is None:
+            body = self.render(key, model)
+            self._write_disk(etag, key[-1], body)
+
+        with self._lock:
+            self._memory[etag] = body
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+        return body
+
+    def _read_disk(self, etag, fmt):
+        if not self.cache_dir:
+            return None
+        path = os.path.join(self.cache_dir, f'{etag}.{fmt}')
+        try:
+            with open(path, 'rb') as f:
+                body = f.read()
+            os.utime(path)  # Recently used, so pruning keeps it
+        except FileNotFoundError:
+            return None
+        return body
+
+    def _write_disk(self, etag, fmt, body):
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, f'{etag}.{fmt}')
+        tmp_path = f'{path}.tmp.{os.getpid()}'
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+        self._prune_disk()
+
+    def _prune_disk(self):
+        """Delete the least recently used files beyond `max_disk_entries`"""
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if '.tmp.' in entry.name:
+                continue
+            try:
+                files.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                continue  # Pruned by another worker
+        for _, path in sorted(files)[:max(len(files) - self.max_disk_entries, 0)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _data(self):
+        version = self.dataset_version()
+        if self._dataset[0] != version:
+            import pandas as pd
+            if not self.dataset_path:
+                from data_generator import generate_weather_data
+                df = generate_weather_data(self.samples)
+            elif self.dataset_path.endswith('.parquet'):
+                df = pd.read_parquet(self.dataset_path)
+            else:
+                df = pd.read_csv(self.dataset_path)
+            self._dataset = (version, df)
+        return self._dataset[1]
+
+    def render(self, key, model):
+        """Draw one chart; raises LookupError when the model can't provide it"""
+        _, _, chart, width, height, fmt = key
+        with self._render_lock:
+            import matplotlib
+            matplotlib.use('Agg')
+            # Fixed SVG element ids, so the same key always gives the same bytes
+            matplotlib.rcParams['svg.hashsalt'] = 'weather-charts'
+            import matplotlib.pyplot as plt
+            from visualizer import WeatherVisualizer
+
+            if chart == 'feature-importance':
+                # Permutation importance when the artifact carries it, else the impurity importances
+                permutation = getattr(model, 'permutation_importance', None)
+                importances = getattr(getattr(model, 'model', None), 'feature_importances_', None)
+                if permutation is not None:
+                    fig = WeatherVisualizer(None).feature_importance_figure(
+                        permutation, title='Permutation Importance in Weather Prediction',
+                        xlabel='Accuracy Drop When Shuffled')
+                elif importances is not None:
+                    import pandas as pd
+                    from model import FEATURES
+                    frame = pd.DataFrame({'feature': FEATURES, 'importance': importances})
+                    fig = WeatherVisualizer(None).feature_importance_figure(
+                        frame.sort_values('importance', ascending=False))
+                else:
+                    raise LookupError("The serving model has no feature importances")
+            else:
+                viz = WeatherVisualizer(self._data())
+                fig = viz.weather_distribution_figure() if chart == 'class-distribution' else viz.distributions_figure()
+
+            try:
+                fig.set_size_inches(width / DPI, height / DPI)
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', UserWarning)  # The heatmap colorbar isn't tight_layout-compatible
+                    fig.tight_layout()
+                buffer = io.BytesIO()
+                fig.savefig(buffer, format=fmt, dpi=DPI, metadata={'Date': None} if fmt == 'svg' else None)
+            finally:
+                plt.close(fig)
+        return buffer.getvalue()
@@ -0,0 +1,171 @@
+#cities.py
+import csv
+import os
+import re
+import unicodedata
+
+# Characters no city name contains; input with them never goes upstream
+INVALID_CHARS = re.compile(r'[0-9<>{}\[\]@#$%^*=+|\\/~`_;:!?"]')
+MAX_NAME_LENGTH = 85
+
+def normalize(text):
+    """Case-, accent- and punctuation-insensitive form: "St. Petersburg" -> "st petersburg" """
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).casefold()
+    text = text.replace("'", '').replace('.', ' ').replace('-', ' ')
+    return ' '.join(text.split())
+
+class _Node:
+    __slots__ = ('children', 'ids', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.ids = []  # Cities with exactly this normalised name or alias
+        self.top = []  # Best-ranked cities with a name or alias starting here
+
+class CityIndex:
+    """Offline city-name resolution and autocomplete over a bundled city list.
+
+    The list (data/cities.csv: name, country, aliases separated by |) is ordered by
+    importance; a city's position is its rank. Every name and alias is normalised and put
+    into one trie. Each trie node keeps the TOP best-ranked cities below it, so
+    autocomplete is a walk down the prefix and nothing more.
+
+    resolve() turns user input into an upstream query without calling upstream:
+      exact    the input (optionally "Name, CC") is a city's name
+      alias    it is one of a city's aliases ("Bombay", "NYC", "München")
+      fuzzy    it is within 1 edit (2 for names of 8+ letters) of a name or alias; an edit
+               is an insertion, deletion, substitution or swap of adjacent letters
+               (searched over the trie, pruning branches that can't get back under).
+               The list isn't every city ("Nome" is one edit from "Rome"), so the input
+               still goes upstream as typed and the matches are only suggestions
+      unknown  not in the list but could be a real place, or qualified with something
+               other than a country code ("Paris, France"): sent upstream as typed
+      invalid  empty, too long, or containing digits/symbols: rejected
+    With `strict`, fuzzy and unknown input is rejected, with suggestions, instead.
+    Exact and alias hits are queried upstream as "Name,CC" and cached under that, so
+    "london", "London " and "LONDON, gb" share one cache entry.
+    """
+    TOP = 10
+
+    def __init__(self, cities, strict=False):
+        self.cities = cities
+        self.strict = strict
+        self.root = _Node()
+        for rank, city in enumerate(cities):
+            for name in [city['name']] + city['aliases']:
+                self._insert(normalize(name), rank)
+
+    @classmethod
+    def from_csv(cls, path, strict=False):
+        with open(path, newline='', encoding='utf-8') as f:
+            cities = [{
+                'name': row['name'],
+                'country': row['country'].upper(),
+                'aliases': [a for a in (row.get('aliases') or '').split('|') if a],
+            } for row in csv.DictReader(f)]
+        for city in cities:
+            city['id'] = f"{normalize(city['name'])},{city['country'].lower()}"
+        return cls(cities, strict)
+
+    @classmethod
+    def from_env(cls):
+        """CITY_LIST_PATH (default data/cities.csv), CITY_INDEX_STRICT=1 to reject cities
+        that aren't in the list"""
+        path = os.environ.get('CITY_LIST_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                             'data', 'cities.csv'))
+        return cls.from_csv(path, strict=os.environ.get('CITY_INDEX_STRICT', '') in ('1', 'true'))
+
+    def _insert(self, name, rank):
+        node = self.root
+        self._add_top(node, rank)
+        for char in name:
+            node = node.children.setdefault(char, _Node())
+            self._add_top(node, rank)
+        if rank not in node.ids:
+            node.ids.append(rank)
+
+    def _add_top(self, node, rank):
+        if rank in node.top:
+            return
+        if len(node.top) < self.TOP or rank < node.top[-1]:
+            node.top.append(rank)
+            node.top.sort()
+            del node.top[self.TOP:]
+
+    def _find(self, name):
+        node = self.root
+        for char in name:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    @staticmethod
+    def describe(city):
+        return {'id': city['id'], 'name': city['name'], 'country': city['country'],
+                'label': f"{city['name']}, {city['country']}"}
+
+    def complete(self, prefix, limit=8, country=None):
+        """Best-ranked cities with a name or alias starting with `prefix`"""
+        node = self._find(normalize(prefix))
+        if node is None:
+            return []
+        ranks = [r for r in node.top if not country or self.cities[r]['country'] == country]
+        return [self.describe(self.cities[r]) for r in ranks[:limit]]
+
+    def fuzzy(self, name, max_distance):
+        """[(distance, rank)] for names/aliases within `max_distance` edits, best first"""
+        found = {}
+        first_row = list(range(len(name) + 1))
+
+        # One dynamic-programming row per trie level (optimal string alignment distance)
+        def walk(node, char, previous_char, previous, before_previous):
+            row = [previous[0] + 1]
+            for i in range(1, len(name) + 1):
+                cost = min(row[i - 1] + 1, previous[i] + 1, previous[i - 1] + (name[i - 1] != char))
+                if i > 1 and before_previous and name[i - 1] == previous_char and name[i - 2] == char:
+                    cost = min(cost, before_previous[i - 2] + 1)
+                row.append(cost)
+            if row[-1] <= max_distance:
+                for rank in node.ids:
+                    found[rank] = min(found.get(rank, row[-1]), row[-1])
+            if min(row) <= max_distance:  # Otherwise no longer word can get back under the limit
+                for next_char, child in node.children.items():
+                    walk(child, next_char, char, row, previous)
+
+        for char, child in self.root.children.items():
+            walk(child, char, None, first_row, None)
+        return sorted((distance, rank) for rank, distance in found.items())
+
+    def resolve(self, query):
+        """{'status', 'city', 'query', 'rejected', 'suggestions'}; see the class docstring"""
+        name, _, country = query.partition(',')
+        country = country.strip().upper() or None
+        normalized = normalize(name)
+        if not normalized or len(query) > MAX_NAME_LENGTH or INVALID_CHARS.search(query):
+            return {'status': 'invalid', 'city': None, 'query': None, 'rejected': True, 'suggestions': []}
+        as_typed = {'city': None, 'query': None if self.strict else query.strip(), 'rejected': self.strict}
+        if country and not re.fullmatch(r'[A-Z]{2}', country):
+            # A state or country name: upstream understands more of these than the list does
+            return {'status': 'unknown', **as_typed, 'suggestions': []}
+
+        def pick(ranks):
+            ranks = [r for r in ranks if not country or self.cities[r]['country'] == country]
+            return self.cities[min(ranks)] if ranks else None
+
+        node = self._find(normalized)
+        city = pick(node.ids) if node else None
+        if city is not None:
+            status = 'exact' if normalize(city['name']) == normalized else 'alias'
+            return {'status': status, 'city': self.describe(city), 'query': f"{city['name']},{city['country']}",
+                    'rejected': False, 'suggestions': []}
+
+        if len(normalized) > 3:
+            matches = self.fuzzy(normalized, 1 if len(normalized) < 8 else 2)
+            ranks = [rank for _, rank in matches if not country or self.cities[rank]['country'] == country]
+            if ranks:
+                return {'status': 'fuzzy', **as_typed,
+                        'suggestions': [self.describe(self.cities[r]) for r in ranks[:5]]}
+        suggestions = self.complete(normalized[:3], limit=5, country=country)
+        return {'status': 'unknown', **as_typed, 'suggestions': suggestions}
@@ -0,0 +1,4 @@
+# conftest.py - Tests that import app get a per-process live-weather cache, never the shared SQLite file
+import os
+
+os.environ['LIVE_CACHE_PATH'] = ''
@@ -2,9 +2,9 @@
 import pandas as pd
 import numpy as np
 
-def generate_weather_data(n_samples=1000):
-    """Generate synthetic weather data for training"""
-    np.random.seed(42)
+def generate_weather_data(n_samples=1000, seed=42):
+    """Generate synthetic weather data for training (same seed, same data)"""
+    np.random.seed(seed)
     
     data = {
         'temperature': np.random.normal(20, 10, n_samples),
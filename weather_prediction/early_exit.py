@@ -0,0 +1,150 @@
+#early_exit.py
+import argparse
+import math
+import pickle
+import time
+import numpy as np
+
+MODES = ('exact', 'approx')
+
+class EarlyExitForest:
+    """Evaluates a fitted random forest tree by tree, stopping once the answer is settled.
+
+    The forest's probability is the mean of the per-tree leaf distributions, so each
+    remaining tree can add at most 1 to any class's running sum. The trees run in their
+    fitted order.
+
+    exact   stop once the leader's lead over every other class is larger than the number
+            of trees left. No remaining tree can change the argmax, so the label always
+            matches the full forest's.
+    approx  additionally stop after `min_trees` once the mean per-tree margin between
+            the top two classes clears a Hoeffding bound, sqrt(2 ln(1/delta) / k). Here
+            delta is the tolerated chance of the full forest disagreeing. The label can
+            differ from the full forest's, so measure with accuracy_loss_report().
+
+    Returned probabilities are the mean over the trees actually used.
+    """
+    # Guards the exact bound against float rounding in the forest's own sum
+    EPS = 1e-9
+
+    def __init__(self, forest):
+        self.classes_ = forest.classes_
+        self.trees = [est.tree_ for est in forest.estimators_]
+        # Per-tree leaf distributions, normalised like DecisionTreeClassifier.predict_proba
+        self.values = []
+        for tree in self.trees:
+            value = tree.value[:, 0, :]
+            totals = value.sum(axis=1, keepdims=True)
+            totals[totals == 0] = 1
+            self.values.append(value / totals)
+
+    @staticmethod
+    def supports(estimator):
+        return hasattr(estimator, 'estimators_') and all(hasattr(e, 'tree_') for e in estimator.estimators_)
+
+    def _settled(self, sums, used, mode, delta, min_trees):
+        """Rows (of `sums`, all having seen `used` trees) whose label can no longer change"""
+        top2 = np.partition(sums, -2, axis=1)[:, -2:]
+        gap = top2[:, 1] - top2[:, 0]
+        settled = gap > (len(self.trees) - used) + self.EPS
+        if mode == 'approx' and used >= min_trees:
+            settled |= gap / used > math.sqrt(2 * math.log(1 / delta) / used)
+        return settled
+
+    def predict(self, X, mode='exact', delta=0.05, min_trees=8):
+        """Return (labels, probabilities, trees_used) for every row of X"""
+        if mode not in MODES:
+            raise ValueError(f"Unknown early-exit mode '{mode}'. Choose from: {', '.join(MODES)}")
+        # Same float32 view the forest uses, so every split goes the same way
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n = len(X)
+        sums = np.zeros((n, len(self.classes_)))
+        trees_used = np.zeros(n, dtype=np.int32)
+        active = np.arange(n)
+        # A lead can't exceed the trees used, so the exact bound can't hold before half the forest
+        first_check = min_trees if mode == 'approx' else len(self.trees) // 2 + 1
+
+        for used, (tree, value) in enumerate(zip(self.trees, self.values), start=1):
+            leaves = tree.apply(X[active])
+            sums[active] += value[leaves]
+            trees_used[active] = used
+            if used < first_check:
+                continue
+            done = self._settled(sums[active], used, mode, delta, min_trees)
+            active = active[~done]
+            if not len(active):
+                break
+
+        proba = sums / trees_used[:, None]
+        return self.classes_[sums.argmax(axis=1)], proba, trees_used
+
+def _time_rows(predict, rows):
+    start = time.perf_counter()
+    for row in rows:
+        predict(row)
+    return time.perf_counter() - start
+
+def accuracy_loss_report(model, X, y, deltas=(0.01, 0.05, 0.1, 0.2), min_trees=8, single_rows=200):
+    """Compare exact and approximate early exit with the full forest on labelled data.
+
+    One row per setting: mean and p95 trees used, agreement with the full forest,
+    accuracy, accuracy lost against the full forest, and the speed-up both for one
+    batch call and for `single_rows` one-row calls, which is how /predict uses it.
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y)
+    start = time.perf_counter()
+    full_labels, _ = model.predict_batch(X)
+    full_seconds = time.perf_counter() - start
+    full_single = _time_rows(lambda row: model.predict(*row), X[:single_rows])
+    full_accuracy = float(np.mean(full_labels == y))
+    forest = model.early_exit_forest()
+
+    rows = [{'mode': 'full', 'delta': None, 'mean_trees': float(len(forest.trees)),
+             'p95_trees': float(len(forest.trees)), 'agreement': 1.0, 'accuracy': full_accuracy,
+             'accuracy_loss': 0.0, 'batch_speedup': 1.0, 'single_speedup': 1.0}]
+    for mode, delta in [('exact', None)] + [('approx', d) for d in deltas]:
+        start = time.perf_counter()
+        labels, _, used = forest.predict(X, mode, delta or 0.05, min_trees)
+        seconds = time.perf_counter() - start
+        single = _time_rows(lambda row: forest.predict(row[None], mode, delta or 0.05, min_trees),
+                            X[:single_rows])
+        accuracy = float(np.mean(labels == y))
+        rows.append({'mode': mode, 'delta': delta, 'mean_trees': float(used.mean()),
+                     'p95_trees': float(np.percentile(used, 95)),
+                     'agreement': float(np.mean(labels == full_labels)), 'accuracy': accuracy,
+                     'accuracy_loss': full_accuracy - accuracy, 'batch_speedup': full_seconds / seconds,
+                     'single_speedup': full_single / single})
+    return rows
+
+def print_report(rows):
+    print("="*92)
+    print(f"{'Mode':<8}{'Delta':>7}{'Mean trees':>12}{'p95 trees':>11}{'Agreement':>11}"
+          f"{'Accuracy':>10}{'Acc. loss':>11}{'Batch':>10}{'Per row':>10}")
+    print("="*92)
+    for r in rows:
+        delta = '' if r['delta'] is None else f"{r['delta']:.2f}"
+        print(f"{r['mode']:<8}{delta:>7}{r['mean_trees']:>12.1f}{r['p95_trees']:>11.0f}"
+              f"{r['agreement']:>11.2%}{r['accuracy']:>10.2%}{r['accuracy_loss']:>+11.2%}"
+              f"{r['batch_speedup']:>9.1f}x{r['single_speedup']:>9.1f}x")
+    print("="*92)
+
+if __name__ == "__main__":
+    from data_generator import generate_weather_data
+    from model import FEATURES
+
+    parser = argparse.ArgumentParser(description="Measure early-exit inference against the full forest")
+    parser.add_argument('--model', default='models/weather_model.pkl')
+    parser.add_argument('--samples', type=int, default=20000, help="Labelled rows to evaluate on")
+    parser.add_argument('--min-trees', type=int, default=8)
+    args = parser.parse_args()
+
+    with open(args.model, 'rb') as f:
+        model = pickle.load(f)
+    if not EarlyExitForest.supports(model.model):
+        print(f"❌ Early exit needs a tree ensemble, not '{model.backend}'")
+        raise SystemExit(1)
+
+    df = generate_weather_data(args.samples)
+    print(f"🌲 Early-exit inference on {len(df)} rows ({len(model.model.estimators_)} trees)")
+    print_report(accuracy_loss_report(model, df[FEATURES], df['weather_condition'], min_trees=args.min_trees))
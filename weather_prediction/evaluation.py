@@ -0,0 +1,124 @@
+#evaluation.py
+import argparse
+import glob
+import pickle
+import time
+import numpy as np
+import pandas as pd
+from model import FEATURES
+
+class StreamingEvaluator:
+    """Accumulates a confusion matrix and log-loss chunk by chunk in constant memory"""
+    def __init__(self, classes):
+        self.classes = np.asarray(classes)
+        k = len(self.classes)
+        self.confusion = np.zeros((k, k), dtype=np.int64)
+        self.log_loss_sum = 0.0
+        self.n = 0
+
+    def update(self, y_true, probabilities):
+        """Add one chunk of true labels and predicted probabilities (columns in classes order)"""
+        y_true = np.asarray(y_true)
+        truth = pd.Categorical(y_true, categories=self.classes).codes.astype(np.int64)
+        if (truth < 0).any():
+            raise ValueError(f"Labels not known to the model: {sorted(set(y_true[truth < 0]))}")
+
+        k = len(self.classes)
+        predicted = probabilities.argmax(axis=1)
+        self.confusion += np.bincount(truth * k + predicted, minlength=k * k).reshape(k, k)
+        true_class_proba = probabilities[np.arange(len(truth)), truth]
+        self.log_loss_sum += float(-np.log(np.clip(true_class_proba, 1e-15, 1)).sum())
+        self.n += len(truth)
+        return self
+
+    def merge(self, other):
+        """Combine with an evaluator that scored a different shard"""
+        if list(other.classes) != list(self.classes):
+            raise ValueError("Cannot merge evaluators with different classes")
+        self.confusion += other.confusion
+        self.log_loss_sum += other.log_loss_sum
+        self.n += other.n
+        return self
+
+    def result(self):
+        """Derive accuracy, per-class precision/recall/F1 and log-loss from the accumulators"""
+        tp = np.diag(self.confusion).astype(float)
+        predicted = self.confusion.sum(axis=0)
+        support = self.confusion.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            precision = np.where(predicted > 0, tp / predicted, 0.0)
+            recall = np.where(support > 0, tp / support, 0.0)
+            f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+        return {
+            'n': self.n,
+            'accuracy': float(tp.sum() / self.n) if self.n else 0.0,
+            'log_loss': self.log_loss_sum / self.n if self.n else 0.0,
+            'confusion_matrix': pd.DataFrame(self.confusion, index=self.classes, columns=self.classes),
+            'per_class': pd.DataFrame({
+                'precision': precision,
+                'recall': recall,
+                'f1': f1,
+                'support': support,
+            }, index=self.classes),
+        }
+
+def iter_chunks(paths, chunksize=100000):
+    """Yield DataFrame chunks from CSV or Parquet shards (glob patterns allowed)"""
+    for pattern in paths:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            if path.endswith('.parquet'):
+                # Parquet shards are already columnar; read one row group at a time
+                import pyarrow.parquet as pq
+                parquet = pq.ParquetFile(path)
+                for i in range(parquet.num_row_groups):
+                    yield parquet.read_row_group(i, columns=FEATURES + ['weather_condition']).to_pandas()
+            else:
+                yield from pd.read_csv(path, chunksize=chunksize,
+                                       usecols=FEATURES + ['weather_condition'])
+
+def evaluate_stream(model, chunks):
+    """Score a trained WeatherPredictor over an iterable of DataFrame chunks"""
+    evaluator = StreamingEvaluator(model.model.classes_)
+    for chunk in chunks:
+        _, probabilities = model.predict_batch(chunk)
+        evaluator.update(chunk['weather_condition'].to_numpy(), probabilities)
+    return evaluator.result()
+
+def print_evaluation(results):
+    print("="*60)
+    print("📊 STREAMING EVALUATION")
+    print("="*60)
+    print(f"Rows scored: {results['n']:,}")
+    print(f"Accuracy: {results['accuracy']:.2%}")
+    print(f"Log-loss: {results['log_loss']:.4f}")
+    print("\nPer-class metrics:")
+    print(results['per_class'].round(3).to_string())
+    print("\nConfusion matrix (rows = true, columns = predicted):")
+    print(results['confusion_matrix'].to_string())
+    print("="*60)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate a saved model over chunked or sharded data")
+    parser.add_argument('data', nargs='*', help="CSV/Parquet files or glob patterns")
+    parser.add_argument('--model', default='models/weather_model.pkl')
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--synthetic', type=int, default=0,
+                        help="Evaluate on this many synthetic rows instead of files")
+    args = parser.parse_args()
+
+    with open(args.model, 'rb') as f:
+        model = pickle.load(f)
+
+    if args.synthetic:
+        from data_generator import generate_weather_data
+        df = generate_weather_data(args.synthetic)
+        chunks = (df.iloc[i:i + args.chunksize] for i in range(0, len(df), args.chunksize))
+    else:
+        chunks = iter_chunks(args.data, args.chunksize)
+
+    start = time.perf_counter()
+    results = evaluate_stream(model, chunks)
+    elapsed = time.perf_counter() - start
+    print_evaluation(results)
+    print(f"⏱️  {results['n'] / elapsed:,.0f} rows/sec")
@@ -0,0 +1,94 @@
+#explain.py
+import numpy as np
+from scipy import sparse
+
+class TreeExplainer:
+    """Per-feature contributions for a fitted tree ensemble (Saabas-style path attribution).
+
+    Moving from a node to its child changes the predicted class distribution. That change
+    is credited to the feature the node split on. Summed along a row's decision path
+    through every tree and averaged over trees, this gives
+
+        probabilities = bias + contributions.sum(over features)
+
+    exactly. Here `bias` is the mean root distribution, the training class balance.
+
+    Everything except the leaf lookup is done once, in the constructor:
+      deltas  sparse (nodes x features*classes), the change at each node, divided by the
+              number of trees and filed under its parent's split feature
+      paths   sparse (nodes x nodes), each leaf's row marking the nodes on its decision path
+      leaf_contributions = paths @ deltas, one row per leaf holding its whole path's sum
+    Explaining a batch then finds each row's leaf in every tree with tree_.apply (the same
+    traversal as predict_proba) and does one sparse product, for all rows and trees at once.
+    """
+    def __init__(self, forest):
+        self.trees = [est.tree_ for est in forest.estimators_]
+        self.classes_ = forest.classes_
+        self.n_features = forest.n_features_in_
+        n_classes = len(self.classes_)
+
+        rows, cols, data, roots, offsets, parent, leaves = [], [], [], [], [], [], []
+        offset = 0
+        for tree in self.trees:
+            value = tree.value[:, 0, :]
+            value = value / np.maximum(value.sum(axis=1, keepdims=True), 1e-12)
+            roots.append(value[0])
+
+            internal = np.flatnonzero(tree.children_left != -1)
+            children = np.concatenate([tree.children_left[internal], tree.children_right[internal]])
+            parents = np.concatenate([internal, internal])
+            delta = (value[children] - value[parents]) / len(self.trees)
+            feature = tree.feature[parents]
+
+            rows.append(np.repeat(children + offset, n_classes))
+            cols.append((feature[:, None] * n_classes + np.arange(n_classes)).ravel())
+            data.append(delta.ravel())
+
+            tree_parent = np.full(tree.node_count, -1)
+            tree_parent[children] = parents + offset
+            parent.append(tree_parent)
+            leaves.append(np.flatnonzero(tree.children_left == -1) + offset)
+            offsets.append(offset)
+            offset += tree.node_count
+
+        self.bias = np.mean(roots, axis=0)
+        self.offsets = np.array(offsets)
+        self.n_nodes = offset
+        deltas = sparse.csr_matrix(
+            (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(offset, self.n_features * n_classes)
+        )
+        self.leaf_contributions = self._paths(np.concatenate(leaves), np.concatenate(parent)) @ deltas
+
+    def _paths(self, leaves, parent):
+        """Walk every leaf up to its root at once, one level per step"""
+        path_rows, path_nodes = [leaves], [leaves]
+        rows, nodes = leaves, leaves
+        while len(nodes):
+            nodes = parent[nodes]
+            keep = nodes >= 0
+            rows, nodes = rows[keep], nodes[keep]
+            path_rows.append(rows)
+            path_nodes.append(nodes)
+        path_rows = np.concatenate(path_rows)
+        return sparse.csr_matrix((np.ones(len(path_rows)), (path_rows, np.concatenate(path_nodes))),
+                                 shape=(self.n_nodes, self.n_nodes))
+
+    @staticmethod
+    def supports(estimator):
+        return hasattr(estimator, 'estimators_') and all(hasattr(e, 'tree_') for e in estimator.estimators_)
+
+    def explain(self, X):
+        """Return (probabilities, contributions) with contributions shaped (rows, features, classes)"""
+        # Same float32 view the forest uses, so every split goes the same way
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        leaves = (np.stack([tree.apply(X) for tree in self.trees], axis=1) + self.offsets).ravel()
+        # One row per input selecting its leaf in every tree
+        selector = sparse.csr_matrix(
+            (np.ones(len(leaves)), leaves, np.arange(0, len(leaves) + 1, len(self.trees))),
+            shape=(len(X), self.n_nodes)
+        )
+        contributions = (selector @ self.leaf_contributions).toarray()
+        contributions = contributions.reshape(len(X), self.n_features, len(self.classes_))
+        # Clip the -1e-17s that rounding leaves where a class has no support
+        return np.maximum(self.bias + contributions.sum(axis=1), 0), contributions
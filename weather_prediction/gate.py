@@ -0,0 +1,167 @@
+# gate.py - Measurements and thresholds behind the model artifact regression gate
+import hashlib
+import json
+import os
+import pickle
+import time
+from datetime import datetime, timezone
+import numpy as np
+
+MODEL_PATH = 'models/weather_model.pkl'
+
+# Fixed holdout: a different seed from the training data, so it is never trained on
+HOLDOUT_SIZE = 5000
+HOLDOUT_SEED = 7
+
+# Hand-written cases the model must get right (labels follow data_generator's rules)
+TEST_CASES = [
+    {
+        'name': 'Sunny Day',
+        'params': (30, 40, 1020, 10, 10),
+        'expected': 'Sunny'
+    },
+    {
+        'name': 'Rainy Day',
+        'params': (15, 90, 995, 25, 95),
+        'expected': 'Rainy'
+    },
+    {
+        'name': 'Cloudy Day',
+        'params': (20, 65, 1010, 15, 75),
+        'expected': 'Cloudy'
+    }
+]
+
+# Measured metric -> (threshold name, whether higher is better)
+# Latency thresholds are absolute times from the machine that wrote them, so only the CLI
+# gate checks them; pytest checks what doesn't depend on the machine (PORTABLE_CHECKS)
+CHECKS = {
+    'accuracy': ('min_accuracy', True),
+    'size_bytes': ('max_size_bytes', False),
+    'load_ms': ('max_load_ms', False),
+    'single_p50_ms': ('max_single_p50_ms', False),
+    'single_p99_ms': ('max_single_p99_ms', False),
+    'batch_p50_ms': ('max_batch_p50_ms', False),
+    'batch_p99_ms': ('max_batch_p99_ms', False),
+}
+PORTABLE_CHECKS = ('accuracy', 'size_bytes')
+
+def _format(value):
+    return f"{value:,.0f}" if abs(value) >= 1000 else f"{value:.4g}"
+
+def thresholds_path(model_path):
+    """The thresholds live next to the artifact: models/weather_model.gate.json"""
+    return os.path.splitext(model_path)[0] + '.gate.json'
+
+def measure_artifact(model_path, single_repeats=300, batch_rows=1000, batch_repeats=20, load_repeats=3):
+    """Size, load time, holdout accuracy and single-row/batch latency percentiles"""
+    from benchmark import percentile_ms, time_single_predictions
+    from data_generator import generate_weather_data
+    from model import FEATURES
+
+    with open(model_path, 'rb') as f:
+        payload = f.read()
+    model = pickle.loads(payload)  # Untimed: pays for the sklearn imports
+    load_samples = []
+    for _ in range(load_repeats):
+        start = time.perf_counter()
+        with open(model_path, 'rb') as f:
+            pickle.load(f)
+        load_samples.append(time.perf_counter() - start)
+
+    holdout = generate_weather_data(HOLDOUT_SIZE, seed=HOLDOUT_SEED)
+    X = holdout[FEATURES].to_numpy()
+    labels, _ = model.predict_batch(X)
+
+    model.predict(*X[0])  # Warm up lazy setup before timing
+    single = time_single_predictions(model, X, repeats=single_repeats)
+    batch_samples = []
+    for i in range(batch_repeats):
+        rows = X[(i * batch_rows) % len(X):][:batch_rows]
+        start = time.perf_counter()
+        model.predict_batch(rows)
+        batch_samples.append(time.perf_counter() - start)
+
+    return {
+        'sha256': hashlib.sha256(payload).hexdigest(),
+        'size_bytes': len(payload),
+        'load_ms': percentile_ms(load_samples, 50),
+        'accuracy': float(np.mean(labels == holdout['weather_condition'].to_numpy())),
+        'single_p50_ms': single['p50_ms'],
+        'single_p99_ms': single['p99_ms'],
+        'batch_rows': batch_rows,
+        'batch_p50_ms': percentile_ms(batch_samples, 50),
+        'batch_p99_ms': percentile_ms(batch_samples, 99),
+        'cases': [
+            {'name': case['name'], 'expected': case['expected'], 'prediction': str(model.predict(*case['params'])[0])}
+            for case in TEST_CASES
+        ],
+    }
+
+def write_thresholds(model_path, measured, path=None, accuracy_tolerance=0.01,
+                     size_headroom=1.1, latency_headroom=2.0):
+    """Record this artifact's measurements, with headroom, as the bar later artifacts must meet.
+
+    Latency varies between machines and runs, so it gets the most slack; accuracy on the
+    fixed holdout is deterministic, so it gets the least.
+    """
+    thresholds = {'min_accuracy': measured['accuracy'] - accuracy_tolerance,
+                  'max_size_bytes': int(measured['size_bytes'] * size_headroom)}
+    for metric in ('load_ms', 'single_p50_ms', 'single_p99_ms', 'batch_p50_ms', 'batch_p99_ms'):
+        thresholds[CHECKS[metric][0]] = measured[metric] * latency_headroom
+
+    path = path or thresholds_path(model_path)
+    with open(path, 'w') as f:
+        json.dump({
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'baseline_sha256': measured['sha256'],
+            'holdout': {'size': HOLDOUT_SIZE, 'seed': HOLDOUT_SEED},
+            'measured': {k: v for k, v in measured.items() if k != 'cases'},
+            'thresholds': thresholds,
+        }, f, indent=2)
+        f.write('\n')
+    return path
+
+def check_thresholds(measured, thresholds, metrics=None):
+    """Return one message per failed check (of `metrics`, default all); empty means the artifact passes"""
+    failures = []
+    for metric, (name, higher_is_better) in CHECKS.items():
+        if metrics is not None and metric not in metrics:
+            continue
+        limit = thresholds.get(name)
+        if limit is None:
+            continue
+        value = measured[metric]
+        if (value < limit) if higher_is_better else (value > limit):
+            failures.append(f"{metric} = {_format(value)} ({'min' if higher_is_better else 'max'} {_format(limit)})")
+    for case in measured['cases']:
+        if case['prediction'] != case['expected']:
+            failures.append(f"{case['name']}: predicted {case['prediction']}, expected {case['expected']}")
+    return failures
+
+def run_gate(model_path=MODEL_PATH, thresholds_file=None, metrics=None):
+    """Measure the artifact and check it; returns (measured, failures)"""
+    print("="*50)
+    print("🧪 MODEL REGRESSION GATE")
+    print("="*50)
+
+    if not os.path.exists(model_path):
+        return None, [f"Model file not found at: {model_path}"]
+    thresholds_file = thresholds_file or thresholds_path(model_path)
+    if not os.path.exists(thresholds_file):
+        return None, [f"Thresholds file not found at: {thresholds_file}"]
+    with open(thresholds_file) as f:
+        thresholds = json.load(f)['thresholds']
+
+    print(f"Measuring {model_path}...")
+    measured = measure_artifact(model_path)
+    failures = check_thresholds(measured, thresholds, metrics)
+
+    for metric, (name, higher_is_better) in CHECKS.items():
+        limit = thresholds.get(name) if metrics is None or metric in metrics else None
+        status = '' if limit is None else f"  {'≥' if higher_is_better else '≤'} {_format(limit)}"
+        print(f"   {metric:<16}{_format(measured[metric]):>14}{status}")
+    for case in measured['cases']:
+        mark = '✅' if case['prediction'] == case['expected'] else '❌'
+        print(f"   {mark} {case['name']}: {case['prediction']}")
+    return measured, failures
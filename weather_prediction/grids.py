@@ -0,0 +1,295 @@
+#grids.py
+import hashlib
+import io
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+import numpy as np
+from model import FEATURES
+
+MIN_RESOLUTION, MAX_RESOLUTION = 0.01, 10.0
+EARTH_RADIUS_KM = 6371.0
+
+# A request's cells on the global lattice: rows [r0, r1) counted south from 90°N,
+# columns [c0, c1) counted east from 180°W, each `resolution` degrees wide
+Window = namedtuple('Window', 'resolution r0 r1 c0 c1')
+
+def model_classes(model):
+    """Class names in predict_batch's probability-column order"""
+    inner = getattr(model, 'model', None)
+    return (inner if inner is not None else model.rules).classes_
+
+class StationField:
+    """Feature fields interpolated from point observations (inverse distance weighting).
+
+    Each cell takes a weighted mean of its `k` nearest stations, with weights
+    1 / distance**power, and a station's own value at its location. Distances are
+    equirectangular kilometres, which is plenty for weighting. Cells are processed in
+    chunks so the cells × stations distance matrix stays small.
+    """
+    def __init__(self, lats, lons, values, k=8, power=2.0, chunk_elements=2_000_000):
+        self.lats = np.radians(np.asarray(lats, dtype=float))
+        self.lons = np.radians(np.asarray(lons, dtype=float))
+        self.values = np.asarray(values, dtype=float).reshape(len(self.lats), -1)
+        self.k = k
+        self.power = power
+        self.chunk_elements = chunk_elements
+
+    def __len__(self):
+        return len(self.lats)
+
+    def interpolate(self, lats, lons):
+        """(cells, features) values at the given points, in degrees"""
+        lats, lons = np.radians(lats), np.radians(lons)
+        out = np.empty((len(lats), self.values.shape[1]))
+        k = min(self.k, len(self))
+        step = max(1, self.chunk_elements // len(self))
+        for start in range(0, len(lats), step):
+            lat, lon = lats[start:start + step, None], lons[start:start + step, None]
+            dlon = (lon - self.lons + np.pi) % (2 * np.pi) - np.pi  # Shortest way round
+            x = dlon * np.cos((lat + self.lats) / 2)
+            distance = np.hypot(x, lat - self.lats) * EARTH_RADIUS_KM
+            if k < len(self):
+                nearest = np.argpartition(distance, k - 1, axis=1)[:, :k]
+                distance = np.take_along_axis(distance, nearest, axis=1)
+            else:
+                nearest = np.broadcast_to(np.arange(len(self)), distance.shape)
+            with np.errstate(divide='ignore'):
+                weights = 1.0 / distance ** self.power
+            exact = np.isinf(weights)
+            rows = exact.any(axis=1)
+            weights[rows] = exact[rows]  # On top of a station: its value only
+            weights /= weights.sum(axis=1, keepdims=True)
+            out[start:start + step] = np.einsum('ck,ckf->cf', weights, self.values[nearest])
+        return out
+
+class GridPredictor:
+    """Predicted conditions over a map region, computed and cached in tiles.
+
+    Regions live on a global lattice of `resolution`-degree cells, so a bounding box is
+    snapped outward to whole cells. The lattice is cut into `tile_size` × `tile_size`
+    tiles. A tile is cached under (model version, input snapshot, resolution, tile), so
+    overlapping or panned regions only compute the tiles they haven't seen. The input
+    snapshot identifies the feature fields:
+      - station fields, interpolated from cached live observations. The snapshot is a hash
+        of which stations were used and when each was fetched, so the tiles stay valid
+        until a station is refreshed. These tiles are computed whole and are shared by
+        every region that overlaps them.
+      - uploaded fields, one array per feature shaped like the region. The snapshot is a
+        hash of the arrays and the region; only the part of each tile inside the region
+        is computed. Features that aren't uploaded are interpolated from the stations.
+    All cells of the tiles a request is missing go through the model in one predict_batch
+    call. The result is one class ID (uint8, an index into the model's classes) and one
+    quantized top probability (uint8, 0-255) per cell.
+
+    Tiles are kept in a per-process LRU of `max_tiles` tiles.
+    """
+    def __init__(self, tile_size=64, max_cells=512 * 512, max_tiles=256, k=8, power=2.0,
+                 stations_ttl=5.0):
+        self.tile_size = tile_size
+        self.max_cells = max_cells
+        self.max_tiles = max_tiles
+        self.k = k
+        self.power = power
+        self.stations_ttl = stations_ttl
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+        self._stations = (0.0, None, None)  # (built at, snapshot, StationField)
+
+    @classmethod
+    def from_env(cls):
+        """GRID_TILE_SIZE (cells, default 64), GRID_MAX_CELLS (per request, default 262144),
+        GRID_CACHE_TILES (tiles kept per worker, default 256)"""
+        return cls(tile_size=int(os.environ.get('GRID_TILE_SIZE', 64)),
+                   max_cells=int(os.environ.get('GRID_MAX_CELLS', 512 * 512)),
+                   max_tiles=int(os.environ.get('GRID_CACHE_TILES', 256)))
+
+    def window(self, bbox, resolution):
+        """Validated lattice window for "west,south,east,north" in degrees; raises ValueError"""
+        try:
+            west, south, east, north = (float(v) for v in bbox.split(','))
+            resolution = float(resolution)
+        except (AttributeError, ValueError):
+            raise ValueError("bbox must be west,south,east,north in degrees and res a number")
+        if not MIN_RESOLUTION <= resolution <= MAX_RESOLUTION:
+            raise ValueError(f"res must be between {MIN_RESOLUTION} and {MAX_RESOLUTION} degrees")
+        if not (-180 <= west < east <= 180 and -90 <= south < north <= 90):
+            raise ValueError("bbox must have -180 <= west < east <= 180 and -90 <= south < north <= 90")
+        eps = 1e-9  # Edges that fall on a cell boundary don't pull in the next cell
+        window = Window(resolution,
+                        math.floor((90 - north) / resolution + eps), math.ceil((90 - south) / resolution - eps),
+                        math.floor((west + 180) / resolution + eps), math.ceil((east + 180) / resolution - eps))
+        cells = (window.r1 - window.r0) * (window.c1 - window.c0)
+        if cells > self.max_cells:
+            raise ValueError(f"The region has {cells} cells at this resolution; at most {self.max_cells} are allowed")
+        return window
+
+    @staticmethod
+    def bounds(window):
+        """The snapped (west, south, east, north) of a window"""
+        res = window.resolution
+        return (-180 + window.c0 * res, 90 - window.r1 * res, -180 + window.c1 * res, 90 - window.r0 * res)
+
+    @staticmethod
+    def load_fields(payload, window):
+        """{feature: (rows, cols) array} from an .npz upload; raises ValueError"""
+        try:
+            arrays = np.load(io.BytesIO(payload), allow_pickle=False)
+        except Exception:
+            arrays = None
+        if not isinstance(arrays, np.lib.npyio.NpzFile):
+            raise ValueError("Fields must be an .npz file with one array per feature")
+        unknown = set(arrays.files) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}. Choose from: {', '.join(FEATURES)}")
+        shape = (window.r1 - window.r0, window.c1 - window.c0)
+        fields = {}
+        for name in arrays.files:
+            field = arrays[name]
+            if field.shape != shape:
+                raise ValueError(f"Field '{name}' has shape {field.shape}; this region needs {shape} (rows north to south)")
+            field = field.astype(float)
+            if not np.isfinite(field).all():
+                raise ValueError(f"Field '{name}' has missing or infinite values")
+            fields[name] = field
+        return fields
+
+    def stations(self, entries):
+        """(snapshot, StationField or None) from the live-cache entries with coordinates.
+
+        `entries()` returns [(key, entry)]. It is read at most every `stations_ttl` seconds
+        once there are stations, rather than on every station-backed request.
+        """
+        built_at, snapshot, field = self._stations
+        if field is not None and time.monotonic() - built_at < self.stations_ttl:
+            return snapshot, field
+        rows = sorted(((key, entry) for key, entry in entries()
+                       if entry['weather'].get('lat') is not None and entry['weather'].get('lon') is not None),
+                      key=lambda row: row[0])
+        digest = hashlib.sha1()
+        for key, entry in rows:
+            digest.update(f"{key}@{entry.get('fetched_at')};".encode())
+        snapshot = f'stations-{digest.hexdigest()[:16]}'
+        field = StationField(
+            [entry['weather']['lat'] for _, entry in rows],
+            [entry['weather']['lon'] for _, entry in rows],
+            [[entry['weather'][f] for f in FEATURES] for _, entry in rows],
+            k=self.k, power=self.power) if rows else None
+        self._stations = (time.monotonic(), snapshot, field)
+        return snapshot, field
+
+    def _tile_windows(self, window, clip):
+        """[(tile, rows slice, cols slice)] in lattice indices for the tiles `window` touches.
+
+        A tile's full extent (cut at the lattice's edges) unless `clip`, in which case only
+        its part inside `window`.
+        """
+        size = self.tile_size
+        lattice_rows = math.ceil(180 / window.resolution)
+        lattice_cols = math.ceil(360 / window.resolution)
+        tiles = []
+        for ty in range(window.r0 // size, (window.r1 - 1) // size + 1):
+            for tx in range(window.c0 // size, (window.c1 - 1) // size + 1):
+                rows = slice(ty * size, min((ty + 1) * size, lattice_rows))
+                cols = slice(tx * size, min((tx + 1) * size, lattice_cols))
+                if clip:
+                    rows = slice(max(rows.start, window.r0), min(rows.stop, window.r1))
+                    cols = slice(max(cols.start, window.c0), min(cols.stop, window.c1))
+                tiles.append(((ty, tx), rows, cols))
+        return tiles
+
+    def _features(self, window, rows, cols, fields, stations):
+        """(cells, features) model input for one tile window, row-major"""
+        r, c = np.meshgrid(np.arange(rows.start, rows.stop), np.arange(cols.start, cols.stop), indexing='ij')
+        missing = [f for f in FEATURES if f not in fields]
+        if missing:
+            res = window.resolution
+            interpolated = stations.interpolate((90 - (r.ravel() + 0.5) * res), (-180 + (c.ravel() + 0.5) * res))
+        X = np.empty((r.size, len(FEATURES)))
+        for i, feature in enumerate(FEATURES):
+            if feature in fields:
+                X[:, i] = fields[feature][rows.start - window.r0:rows.stop - window.r0,
+                                          cols.start - window.c0:cols.stop - window.c0].ravel()
+            else:
+                X[:, i] = interpolated[:, FEATURES.index(feature)]
+        return X
+
+    @staticmethod
+    def needs_stations(fields):
+        return not fields or len(fields) < len(FEATURES)
+
+    def etag(self, window, model_version, fields, stations):
+        key = (model_version, self.snapshot(window, fields or {}, stations[0]), window)
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def snapshot(self, window, fields, station_snapshot):
+        """Identifies the inputs behind a window's cells; part of every tile key"""
+        parts = []
+        if fields:
+            digest = hashlib.sha1(repr(window).encode())
+            for name in sorted(fields):
+                digest.update(name.encode())
+                digest.update(np.ascontiguousarray(fields[name]).tobytes())
+            parts.append(f'upload-{digest.hexdigest()[:16]}')
+        if self.needs_stations(fields):
+            parts.append(station_snapshot)
+        return '+'.join(parts)
+
+    def predict(self, window, model, model_version, fields=None, stations=(None, None)):
+        """(class IDs, quantized top probabilities, info) for a window; raises LookupError
+        when some feature has neither an uploaded field nor any stations to interpolate"""
+        fields = fields or {}
+        station_snapshot, station_field = stations
+        if self.needs_stations(fields) and station_field is None:
+            raise LookupError("No cached station observations to interpolate from; "
+                              "look up some cities or upload every field")
+        snapshot = self.snapshot(window, fields, station_snapshot)
+        tiles = self._tile_windows(window, clip=bool(fields))
+
+        found, missing = {}, []
+        with self._lock:
+            for tile, rows, cols in tiles:
+                key = (model_version, snapshot, window.resolution, self.tile_size, tile)
+                if key in self._tiles:
+                    self._tiles.move_to_end(key)
+                    found[tile] = self._tiles[key]
+                else:
+                    missing.append((key, tile, rows, cols))
+
+        if missing:
+            # Every missing cell in one vectorized call
+            inputs = [self._features(window, rows, cols, fields, station_field) for _, _, rows, cols in missing]
+            _, probabilities = model.predict_batch(np.vstack(inputs))
+            class_ids = probabilities.argmax(axis=1).astype(np.uint8)
+            confidence = np.round(probabilities.max(axis=1) * 255).astype(np.uint8)
+            start = 0
+            with self._lock:
+                for (key, tile, rows, cols), X in zip(missing, inputs):
+                    shape = (rows.stop - rows.start, cols.stop - cols.start)
+                    computed = (rows, cols, class_ids[start:start + len(X)].reshape(shape),
+                                confidence[start:start + len(X)].reshape(shape))
+                    start += len(X)
+                    found[tile] = self._tiles[key] = computed
+                while len(self._tiles) > self.max_tiles:
+                    self._tiles.popitem(last=False)
+
+        shape = (window.r1 - window.r0, window.c1 - window.c0)
+        class_grid = np.zeros(shape, dtype=np.uint8)
+        confidence_grid = np.zeros(shape, dtype=np.uint8)
+        for tile, _, _ in tiles:
+            rows, cols, class_ids, confidence = found[tile]
+            r0, r1 = max(rows.start, window.r0), min(rows.stop, window.r1)
+            c0, c1 = max(cols.start, window.c0), min(cols.stop, window.c1)
+            source = (slice(r0 - rows.start, r1 - rows.start), slice(c0 - cols.start, c1 - cols.start))
+            target = (slice(r0 - window.r0, r1 - window.r0), slice(c0 - window.c0, c1 - window.c0))
+            class_grid[target] = class_ids[source]
+            confidence_grid[target] = confidence[source]
+
+        return class_grid, confidence_grid, {
+            'snapshot': snapshot,
+            'tiles': len(tiles),
+            'tiles_computed': len(missing),
+            'stations': len(station_field) if self.needs_stations(fields) else 0,
+        }
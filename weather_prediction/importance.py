@@ -0,0 +1,52 @@
+#importance.py
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from model import FEATURES
+
+def _feature_drops(model, X, y, column, baseline, n_repeats, seed):
+    """Accuracy drop for each shuffle of one column, one batched predict per shuffle"""
+    rng = np.random.RandomState(seed)
+    X_perm = X.copy()
+    drops = []
+    for _ in range(n_repeats):
+        X_perm[:, column] = rng.permutation(X[:, column])
+        labels, _ = model.predict_batch(X_perm)
+        drops.append(baseline - np.mean(labels == y))
+    return drops
+
+def permutation_importance(model, X, y, n_repeats=5, max_samples=2000, n_jobs=None, random_state=42):
+    """Mean accuracy drop when each feature is shuffled, computed in parallel per feature.
+
+    `model` is a trained WeatherPredictor. Rows are capped at `max_samples` (random
+    subsample) so the cost stays flat on large holdouts. Features run on a thread pool:
+    tree inference releases the GIL, and threads share the fitted model without copying it.
+    """
+    if isinstance(X, pd.DataFrame):
+        X = X[FEATURES].to_numpy(dtype=float)
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y)
+
+    rng = np.random.RandomState(random_state)
+    if max_samples and len(X) > max_samples:
+        rows = rng.choice(len(X), max_samples, replace=False)
+        X, y = X[rows], y[rows]
+
+    labels, _ = model.predict_batch(X)
+    baseline = np.mean(labels == y)
+
+    seeds = rng.randint(0, 2**31 - 1, size=X.shape[1])
+    workers = n_jobs or min(X.shape[1], os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_feature_drops, model, X, y, column, baseline, n_repeats, seeds[column])
+            for column in range(X.shape[1])
+        ]
+        drops = np.array([f.result() for f in futures])
+
+    return pd.DataFrame({
+        'feature': FEATURES,
+        'importance': drops.mean(axis=1),
+        'importance_std': drops.std(axis=1),
+    }).sort_values('importance', ascending=False)
@@ -0,0 +1,84 @@
+#inference.py
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from backends import SimpleFallbackModel
+
+class DeadlineInference:
+    """Runs a model's predict function on a small thread pool and gives up when the budget runs out.
+
+    If the pool already has `max_pending` predictions queued or running, or the result
+    doesn't arrive in time, the caller gets the rule-based SimpleFallbackModel answer
+    instead. A late prediction keeps running, because a thread can't be interrupted, but
+    its result is discarded. A prediction still waiting in the queue is cancelled.
+    `max_pending` bounds how much of that abandoned work can pile up. Each request thread
+    waits on at most one prediction, so it should be at least the number of request
+    threads; otherwise a busy worker sheds predictions the model could have answered.
+    """
+    def __init__(self, workers=2, max_pending=8):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.fallback = SimpleFallbackModel()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+
+    @classmethod
+    def from_env(cls):
+        """INFERENCE_THREADS (default 2), INFERENCE_MAX_PENDING (default WEB_THREADS, the
+        gunicorn --threads the Procfile starts with, 24)"""
+        threads = int(os.environ.get('WEB_THREADS', 24))
+        return cls(workers=int(os.environ.get('INFERENCE_THREADS', 2)),
+                   max_pending=int(os.environ.get('INFERENCE_MAX_PENDING', threads)))
+
+    def _executor(self):
+        # Created lazily so each forked gunicorn worker gets its own threads
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix='inference')
+                    self._pending = 0
+                    self._pid = os.getpid()
+        return self._pool
+
+    def _done(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def predict(self, predict_fn, features, budget):
+        """Return (result, degraded_reason).
+
+        `result` is predict_fn(*features), e.g. model.predict's (prediction, probabilities),
+        and the reason is None. On a miss it is SimpleFallbackModel's answer and the reason
+        is 'deadline' or 'overloaded'. `budget` is the time left in seconds; None means
+        wait as long as it takes.
+        """
+        if budget is not None and budget <= 0:
+            return self.fallback.predict(*features), 'deadline'
+        pool = self._executor()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return self.fallback.predict(*features), 'overloaded'
+            self._pending += 1
+        future = pool.submit(predict_fn, *features)
+        future.add_done_callback(self._done)
+        try:
+            return future.result(timeout=budget), None
+        except FutureTimeout:
+            future.cancel()
+            return self.fallback.predict(*features), 'deadline'
+
+def request_budget(header_value, body_value, default_ms, elapsed):
+    """Seconds left for inference: the caller's deadline_ms (header wins over body) or the
+    default, minus the time the request has already spent in this process"""
+    for value in (header_value, body_value):
+        if value is None or value == '':
+            continue
+        try:
+            budget_ms = float(value)
+        except (TypeError, ValueError):
+            continue
+        if budget_ms > 0:
+            return budget_ms / 1000 - elapsed
+    return default_ms / 1000 - elapsed if default_ms > 0 else None
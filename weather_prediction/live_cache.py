@@ -0,0 +1,244 @@
+#live_cache.py
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from structured_logging import get_logger
+
+log = get_logger('live_cache')
+
+class LiveWeatherCache:
+    """In-process city -> observation entries that expire `ttl` seconds after they were fetched.
+
+    Entries are plain dicts (the /get-live-weather payload plus an optional prediction).
+    An entry expires `ttl` seconds after its 'fetched_at' time (or after it was put), so
+    putting it back with a new prediction doesn't extend its life. At most `max_entries`
+    are kept; when full, the entry closest to expiry is evicted. It also holds the refresh
+    budget's token bucket (see take_token), which only this process spends.
+    """
+    def __init__(self, ttl=300.0, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}  # key -> (expires_at, entry)
+        self._budget = None  # (tokens, refilled_at)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """The entry if it hasn't expired, else None"""
+        with self._lock:
+            item = self._entries.get(key)
+        if item is None or item[0] <= time.time():
+            return None
+        return item[1]
+
+    def put(self, key, entry):
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                del self._entries[min(self._entries, key=lambda k: self._entries[k][0])]
+            self._entries[key] = (entry.get('fetched_at', time.time()) + self.ttl, entry)
+
+    def expires_in(self, key):
+        """Seconds until `key` expires; 0 when missing or already expired"""
+        with self._lock:
+            item = self._entries.get(key)
+        return max(item[0] - time.time(), 0.0) if item else 0.0
+
+    def claim(self, key, lease):
+        """Whether this process should refresh `key`; only one process shares this cache"""
+        return True
+
+    def take_token(self, per_minute):
+        """Spend one token from a bucket refilling at `per_minute` (and holding as many);
+        False when it is empty"""
+        now = time.time()
+        with self._lock:
+            tokens, refilled_at = self._budget or (per_minute, now)
+            tokens = min(per_minute, tokens + (now - refilled_at) * per_minute / 60)
+            allowed = tokens >= 1
+            self._budget = (tokens - 1 if allowed else tokens, now)
+        return allowed
+
+    def return_token(self, per_minute):
+        """Give back a token that was taken but not spent"""
+        with self._lock:
+            if self._budget:
+                self._budget = (min(per_minute, self._budget[0] + 1), self._budget[1])
+
+    def entries(self):
+        """[(key, entry)] for every entry that hasn't expired"""
+        now = time.time()
+        with self._lock:
+            return [(key, entry) for key, (expires_at, entry) in self._entries.items() if expires_at > now]
+
+    def __len__(self):
+        return len(self._entries)
+
+class SharedLiveCache:
+    """The same interface as LiveWeatherCache, kept in a SQLite file that every worker shares.
+
+    The database runs in WAL mode, so readers never block on the single writer and each
+    get() is one indexed lookup. Entries are stored as JSON with their expiry time. They
+    outlive the process, so a restarted or newly started worker begins warm. Every
+    connection is per thread and per process, opened after gunicorn forks.
+
+    claim() hands out short leases, so when an entry is about to expire only one worker
+    refreshes it, not all of them. take_token() keeps the refresh budget's token bucket in
+    the same file, so the budget holds for all workers together. A background thread in each worker compacts the file
+    every `compact_interval` seconds (with jitter). It deletes expired entries and leases,
+    trims to `max_entries`, checkpoints the WAL and returns free pages to the OS.
+    A failing database (locked past the busy timeout, disk full) is logged and treated as
+    a miss, never as a failed request.
+    """
+    def __init__(self, path, ttl=300.0, max_entries=10000, compact_interval=60.0, busy_timeout=2.0):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.compact_interval = compact_interval
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._compactor_pid = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = self._connect()
+        try:
+            db.execute('PRAGMA auto_vacuum=INCREMENTAL')  # Only takes effect on a new file
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('CREATE TABLE IF NOT EXISTS live_weather '
+                       '(key TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL)')
+            db.execute('CREATE INDEX IF NOT EXISTS live_weather_expiry ON live_weather (expires_at)')
+            db.execute('CREATE TABLE IF NOT EXISTS refresh_claims (key TEXT PRIMARY KEY, until REAL NOT NULL)')
+            db.execute('CREATE TABLE IF NOT EXISTS refresh_budget '
+                       '(name TEXT PRIMARY KEY, tokens REAL NOT NULL, refilled_at REAL NOT NULL)')
+        finally:
+            db.close()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        db.execute('PRAGMA synchronous=NORMAL')  # Safe with WAL; a crash loses at most the last commits
+        return db
+
+    def _db(self):
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.db = self._connect()
+            local.pid = os.getpid()
+        return local.db
+
+    def get(self, key):
+        try:
+            row = self._db().execute('SELECT payload FROM live_weather WHERE key = ? AND expires_at > ?',
+                                     (key, time.time())).fetchone()
+        except sqlite3.Error:
+            log.exception("Live cache read failed")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def put(self, key, entry):
+        expires_at = entry.get('fetched_at', time.time()) + self.ttl
+        try:
+            self._db().execute('INSERT OR REPLACE INTO live_weather (key, payload, expires_at) VALUES (?, ?, ?)',
+                               (key, json.dumps(entry), expires_at))
+        except sqlite3.Error:
+            log.exception("Live cache write failed")
+        self.start_compactor()
+
+    def expires_in(self, key):
+        try:
+            row = self._db().execute('SELECT expires_at FROM live_weather WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error:
+            return 0.0
+        return max(row[0] - time.time(), 0.0) if row else 0.0
+
+    def claim(self, key, lease):
+        """True for exactly one caller per `lease` seconds across all workers"""
+        now = time.time()
+        try:
+            cursor = self._db().execute(
+                'INSERT INTO refresh_claims (key, until) VALUES (?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET until = excluded.until WHERE refresh_claims.until <= ?',
+                (key, now + lease, now))
+        except sqlite3.Error:
+            return False
+        return cursor.rowcount == 1
+
+    def take_token(self, per_minute):
+        """Like LiveWeatherCache.take_token, with one bucket for every worker; False when the
+        database fails, so a broken cache never adds upstream calls"""
+        db = self._db()
+        now = time.time()
+        try:
+            db.execute('BEGIN IMMEDIATE')  # Read-modify-write under the write lock
+            try:
+                row = db.execute("SELECT tokens, refilled_at FROM refresh_budget WHERE name = 'refresh'").fetchone()
+                tokens = min(per_minute, row[0] + (now - row[1]) * per_minute / 60) if row else per_minute
+                allowed = tokens >= 1
+                db.execute("INSERT OR REPLACE INTO refresh_budget (name, tokens, refilled_at) VALUES ('refresh', ?, ?)",
+                           (tokens - 1 if allowed else tokens, now))
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+        except sqlite3.Error:
+            log.exception("Live cache budget update failed")
+            return False
+        return allowed
+
+    def return_token(self, per_minute):
+        try:
+            self._db().execute("UPDATE refresh_budget SET tokens = MIN(?, tokens + 1) WHERE name = 'refresh'",
+                               (per_minute,))
+        except sqlite3.Error:
+            pass
+
+    def entries(self):
+        try:
+            rows = self._db().execute('SELECT key, payload FROM live_weather WHERE expires_at > ?',
+                                      (time.time(),)).fetchall()
+        except sqlite3.Error:
+            log.exception("Live cache read failed")
+            return []
+        return [(key, json.loads(payload)) for key, payload in rows]
+
+    def __len__(self):
+        return self._db().execute('SELECT COUNT(*) FROM live_weather').fetchone()[0]
+
+    def compact(self):
+        """Drop expired rows, trim to `max_entries`, checkpoint the WAL and shrink the file"""
+        db = self._db()
+        now = time.time()
+        deleted = db.execute('DELETE FROM live_weather WHERE expires_at <= ?', (now,)).rowcount
+        deleted += db.execute('DELETE FROM live_weather WHERE key IN (SELECT key FROM live_weather '
+                              'ORDER BY expires_at DESC LIMIT -1 OFFSET ?)', (self.max_entries,)).rowcount
+        db.execute('DELETE FROM refresh_claims WHERE until <= ?', (now,))
+        db.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        db.execute('PRAGMA incremental_vacuum')
+        return deleted
+
+    def start_compactor(self):
+        if self._compactor_pid == os.getpid() or not self.compact_interval:
+            return
+        self._compactor_pid = os.getpid()
+
+        def loop():
+            while True:
+                # Jitter keeps the workers from all compacting at the same moment
+                time.sleep(self.compact_interval * random.uniform(0.5, 1.5))
+                try:
+                    self.compact()
+                except sqlite3.Error:
+                    log.exception("Live cache compaction failed")
+
+        threading.Thread(target=loop, name='live-cache-compact', daemon=True).start()
+
+def live_cache_from_env():
+    """LIVE_CACHE_PATH (SQLite file shared by the workers, default cache/live_weather.sqlite3
+    next to this module; empty keeps a per-process cache), LIVE_WEATHER_TTL (seconds, default 300)"""
+    ttl = float(os.environ.get('LIVE_WEATHER_TTL', 300))
+    path = os.environ.get('LIVE_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                           'cache', 'live_weather.sqlite3'))
+    if not path:
+        return LiveWeatherCache(ttl)
+    return SharedLiveCache(path, ttl)
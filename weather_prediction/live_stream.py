@@ -0,0 +1,213 @@
+#live_stream.py
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from metrics import metrics
+from structured_logging import get_logger
+
+log = get_logger('stream')
+
+class StreamFull(Exception):
+    """Raised by StreamHub.subscribe when the worker already has its maximum of streams"""
+
+def city_key(city):
+    return ' '.join(city.split()).lower()
+
+class Subscription:
+    """One client's stream: the cities it follows and a small queue of pending events.
+
+    The queue holds at most `queue_size` events. Each event is a city's latest state, so
+    when a slow client lets it fill up, the oldest event is dropped for the new one. After
+    `max_drops` drops in a row without the client reading anything, the subscription is
+    closed. The client's EventSource then reconnects and starts from the latest state.
+    """
+    def __init__(self, cities, queue_size=4, max_drops=16):
+        self.cities = cities
+        self.max_drops = max_drops
+        self.closed = False
+        self._queue = queue.Queue(queue_size)
+        self._drops = 0
+
+    def offer(self, event):
+        """Called by the poller; never blocks"""
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    continue
+                self._drops += 1
+                metrics.inc('weather_stream_dropped_total')
+                if self._drops >= self.max_drops:
+                    self.closed = True
+
+    def next(self, timeout):
+        """The next event, or None after `timeout` seconds with nothing to send"""
+        try:
+            event = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        self._drops = 0
+        return event
+
+class StreamHub:
+    """Polls each distinct subscribed city once per `interval` and fans the result out.
+
+    `observe(city)` returns (the /get-live-weather payload, its prediction or None). It runs
+    once per city per poll in a background thread, whatever the number of subscribers.
+    The event goes into every subscriber's bounded queue, so upstream calls and inference
+    scale with distinct cities, not viewers. A new subscriber to a city that is already
+    being polled gets its latest event at once. A city is dropped when its last
+    subscriber leaves.
+
+    Each gunicorn worker has its own hub. A stream holds a worker thread for as long as it
+    is open, so `max_subscribers` should leave room for ordinary requests.
+    """
+    def __init__(self, observe, interval=60.0, queue_size=4, max_drops=16,
+                 max_subscribers=8, max_cities_per_stream=5, poll_threads=4):
+        self.observe = observe
+        self.interval = interval
+        self.queue_size = queue_size
+        self.max_drops = max_drops
+        self.max_subscribers = max_subscribers
+        self.max_cities_per_stream = max_cities_per_stream
+        self.poll_threads = poll_threads
+        self._subscribers = {}  # city key -> set of Subscriptions
+        self._latest = {}
+        self._next_poll = {}
+        self._polling = set()
+        self._cond = threading.Condition()
+        self._pid = None
+
+    @classmethod
+    def from_env(cls, observe):
+        """STREAM_POLL_INTERVAL (seconds, default 60), STREAM_MAX_SUBSCRIBERS (per worker,
+        default 8), STREAM_QUEUE_SIZE (events per client, default 4)"""
+        return cls(observe,
+                   interval=float(os.environ.get('STREAM_POLL_INTERVAL', 60)),
+                   queue_size=int(os.environ.get('STREAM_QUEUE_SIZE', 4)),
+                   max_subscribers=int(os.environ.get('STREAM_MAX_SUBSCRIBERS', 8)))
+
+    def _start(self):
+        # Started on first use so each forked gunicorn worker gets its own poller
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._pool = ThreadPoolExecutor(self.poll_threads, thread_name_prefix='stream-poll')
+            threading.Thread(target=self._run, name='stream-hub', daemon=True).start()
+
+    def subscriber_count(self):
+        return len({sub for subs in self._subscribers.values() for sub in subs})
+
+    def subscribe(self, cities):
+        """Follow `cities`; raises StreamFull or ValueError"""
+        keys = list(dict.fromkeys(city_key(c) for c in cities if c and c.strip()))
+        if not keys:
+            raise ValueError("At least one city is required")
+        if len(keys) > self.max_cities_per_stream:
+            raise ValueError(f"At most {self.max_cities_per_stream} cities per stream")
+
+        subscription = Subscription(keys, self.queue_size, self.max_drops)
+        with self._cond:
+            if self.subscriber_count() >= self.max_subscribers:
+                raise StreamFull("Too many open streams")
+            self._start()
+            for key in keys:
+                self._subscribers.setdefault(key, set()).add(subscription)
+                if key in self._latest:
+                    subscription.offer(self._latest[key])
+                else:
+                    self._next_poll.setdefault(key, 0.0)
+            self._update_gauges()
+            self._cond.notify()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._cond:
+            for key in subscription.cities:
+                subs = self._subscribers.get(key)
+                if subs is None:
+                    continue
+                subs.discard(subscription)
+                if not subs:
+                    del self._subscribers[key]
+                    self._latest.pop(key, None)
+                    self._next_poll.pop(key, None)
+            self._update_gauges()
+
+    def _update_gauges(self):
+        metrics.set_gauge('weather_stream_subscribers', self.subscriber_count())
+        metrics.set_gauge('weather_stream_cities', len(self._subscribers))
+
+    def _run(self):
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                due = [key for key, at in self._next_poll.items() if at <= now and key not in self._polling]
+                self._polling.update(due)
+                if not due:
+                    waiting = [at for key, at in self._next_poll.items() if key not in self._polling]
+                    wait = min(waiting, default=now + self.interval) - now
+                    self._cond.wait(max(wait, 0.05))
+                    continue
+            for key in due:
+                self._pool.submit(self._poll, key)
+
+    def _poll(self, key):
+        """One upstream call and one prediction for a city, sent to all its subscribers"""
+        try:
+            weather, prediction = self.observe(key)
+            metrics.inc('weather_stream_polls_total', {'status': 'ok' if weather.get('success') else 'error'})
+        except Exception as e:
+            log.exception("Stream poll failed", extra={'city': key})
+            weather, prediction = {'success': False, 'error': f'Unexpected error: {str(e)}'}, None
+            metrics.inc('weather_stream_polls_total', {'status': 'error'})
+
+        event = json.dumps({
+            'city': key,
+            'weather': weather,
+            'prediction': prediction,
+            'updated_at': datetime.now(timezone.utc).isoformat(),
+        })
+        with self._cond:
+            self._polling.discard(key)
+            subs = self._subscribers.get(key)
+            if not subs:
+                return
+            self._latest[key] = event
+            self._next_poll[key] = time.monotonic() + self.interval
+            subs = list(subs)
+            self._cond.notify()
+        for subscription in subs:
+            subscription.offer(event)
+
+    def events(self, subscription, heartbeat=15.0, max_seconds=None):
+        """Server-Sent Events text for a subscription; unsubscribes when the client goes away.
+
+        A comment line every `heartbeat` seconds keeps proxies from closing the connection and
+        lets a dead client be noticed. The stream ends after `max_seconds` (the client
+        reconnects) or when the subscription is closed for falling behind.
+        """
+        deadline = max_seconds and time.monotonic() + max_seconds
+        reason = 'client'
+        try:
+            yield f'retry: {int(min(self.interval, 10) * 1000)}\n\n'
+            while True:
+                if subscription.closed:
+                    reason = 'slow'
+                    yield 'event: close\ndata: {"reason": "slow consumer"}\n\n'
+                    return
+                if deadline and time.monotonic() >= deadline:
+                    reason = 'max_age'
+                    return
+                event = subscription.next(heartbeat)
+                yield f'event: weather\ndata: {event}\n\n' if event else ': ping\n\n'
+        finally:
+            self.unsubscribe(subscription)
+            metrics.inc('weather_stream_closed_total', {'reason': reason})
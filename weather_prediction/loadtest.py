@@ -0,0 +1,300 @@
+#loadtest.py
+import argparse
+import json
+import os
+import random
+import shlex
+import shutil
+import signal
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import requests
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CITIES = ['London', 'Paris', 'Chennai', 'New York', 'Tokyo', 'Berlin', 'Sydney', 'Toronto']
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+# Local upstream stand-in ------------------------------------------------
+
+class FakeWeatherHandler(BaseHTTPRequestHandler):
+    """Answers like OpenWeatherMap's /data/2.5/weather with deterministic data per city"""
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        city = parse_qs(urlparse(self.path).query).get('q', ['London'])[0]
+        rng = random.Random(city)
+        body = json.dumps({
+            'name': city,
+            'coord': {'lon': rng.uniform(-180, 180), 'lat': rng.uniform(-60, 70)},
+            'sys': {'country': 'XX'},
+            'main': {'temp': rng.uniform(-5, 35), 'feels_like': rng.uniform(-5, 35),
+                     'humidity': rng.randint(30, 95), 'pressure': rng.randint(990, 1030)},
+            'wind': {'speed': rng.uniform(0, 12)},
+            'clouds': {'all': rng.randint(0, 100)},
+            'weather': [{'description': 'synthetic', 'icon': '01d'}],
+            'visibility': 10000,
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def start_fake_upstream(latency_ms=50):
+    handler = type('Handler', (FakeWeatherHandler,), {'latency': latency_ms / 1000})
+    server = ThreadingHTTPServer(('127.0.0.1', free_port()), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/data/2.5/weather'
+
+# Server under test ------------------------------------------------------
+
+def procfile_command():
+    with open(os.path.join(ROOT_DIR, 'Procfile')) as f:
+        for line in f:
+            if line.startswith('web:'):
+                return line.split(':', 1)[1].strip()
+    raise ValueError("No web process in Procfile")
+
+class GunicornServer:
+    """Runs the Procfile web command with extra worker flags; threads go through WEB_THREADS,
+    so the Procfile's --threads and the inference queue limit both follow them"""
+    def __init__(self, workers, threads, upstream_url, extra_env=None):
+        self.port = free_port()
+        self.base_url = f'http://127.0.0.1:{self.port}'
+        command = procfile_command().replace('gunicorn ', 'exec gunicorn ', 1)
+        command += f' --workers {workers} --timeout 60'
+        # Each run gets a fresh shared cache: no entries warmed by the previous config, and the
+        # fake upstream's observations never land in the developer's cache
+        self.cache_dir = tempfile.mkdtemp(prefix='loadtest-cache-')
+        env = dict(os.environ, PORT=str(self.port), WEB_THREADS=str(threads), WEATHER_API_URL=upstream_url,
+                   MODEL_RELOAD_INTERVAL='0', LIVE_CACHE_PATH=os.path.join(self.cache_dir, 'live_weather.sqlite3'),
+                   **(extra_env or {}))
+        self.process = subprocess.Popen(['bash', '-c', command], cwd=ROOT_DIR, env=env,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                        start_new_session=True)
+
+    def wait_ready(self, timeout=120):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with code {self.process.returncode}")
+            try:
+                if requests.get(self.base_url + '/model-info', timeout=1).ok:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.25)
+        raise TimeoutError("gunicorn did not become ready")
+
+    def worker_pids(self):
+        """Children of the gunicorn master (Linux /proc)"""
+        try:
+            with open(f'/proc/{self.process.pid}/task/{self.process.pid}/children') as f:
+                return [int(p) for p in f.read().split()]
+        except OSError:
+            return []
+
+    def stop(self):
+        try:
+            os.killpg(self.process.pid, signal.SIGTERM)
+            self.process.wait(timeout=30)
+        except (ProcessLookupError, subprocess.TimeoutExpired):
+            os.killpg(self.process.pid, signal.SIGKILL)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+def process_usage(pid):
+    """(cpu seconds, rss bytes) for a pid from /proc"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open(f'/proc/{pid}/statm') as f:
+            rss_pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    ticks = os.sysconf('SC_CLK_TCK')
+    return (int(fields[11]) + int(fields[12])) / ticks, rss_pages * os.sysconf('SC_PAGE_SIZE')
+
+# Traffic ----------------------------------------------------------------
+
+def make_request_factory(base_url):
+    """Return (route, callable) pairs for each traffic class"""
+    def predict(session):
+        payload = {'temperature': round(random.uniform(-10, 40), 1), 'humidity': random.randint(20, 100),
+                   'pressure': random.randint(980, 1040), 'wind_speed': round(random.uniform(0, 40), 1),
+                   'cloud_cover': random.randint(0, 100)}
+        return session.post(base_url + '/predict', json=payload, timeout=30)
+
+    def live(session):
+        return session.get(base_url + '/get-live-weather', params={'city': random.choice(CITIES)}, timeout=30)
+
+    def static(session):
+        return session.get(base_url + random.choice(['/static/script.js', '/static/styles.css', '/']), timeout=30)
+
+    return {'predict': predict, 'live': live, 'static': static}
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, weight = part.split('=')
+        mix[name.strip()] = float(weight)
+    return mix
+
+def run_open_loop(base_url, rate, duration, mix, max_in_flight=512):
+    """Send requests on a fixed Poisson schedule regardless of how fast responses come back.
+
+    Latency is measured from each request's scheduled send time, so queueing delay on an
+    overloaded server is counted instead of hidden (no coordinated omission).
+    """
+    factories = make_request_factory(base_url)
+    routes, weights = zip(*mix.items())
+    local = threading.local()
+    results = []
+    lock = threading.Lock()
+
+    def fire(route, scheduled):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        ok = False
+        try:
+            response = factories[route](local.session)
+            ok = response.status_code == 200
+            if ok and route != 'static':
+                ok = response.json().get('success', True) is not False
+        except requests.RequestException:
+            pass
+        with lock:
+            results.append((route, time.perf_counter() - scheduled, ok))
+
+    rng = np.random.default_rng()
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        start = time.perf_counter()
+        next_send = start
+        while next_send - start < duration:
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, random.choices(routes, weights)[0], next_send)
+            next_send += rng.exponential(1 / rate)
+    elapsed = time.perf_counter() - start
+    return results, elapsed
+
+def summarize(results, elapsed):
+    def stats(rows):
+        latencies = np.array([r[1] for r in rows]) * 1000
+        return {
+            'requests': len(rows),
+            'throughput_rps': len(rows) / elapsed,
+            'error_rate': 1 - (sum(r[2] for r in rows) / len(rows)),
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p90_ms': float(np.percentile(latencies, 90)),
+            'p99_ms': float(np.percentile(latencies, 99)),
+            'max_ms': float(latencies.max()),
+        }
+    summary = {'overall': stats(results)} if results else {}
+    for route in sorted({r[0] for r in results}):
+        summary[route] = stats([r for r in results if r[0] == route])
+    return summary
+
+def run_config(workers, threads, rate, duration, mix, upstream_url):
+    server = GunicornServer(workers, threads, upstream_url)
+    try:
+        server.wait_ready()
+        pids = server.worker_pids()
+        before = {pid: process_usage(pid) for pid in pids}
+        results, elapsed = run_open_loop(server.base_url, rate, duration, mix)
+        summary = summarize(results, elapsed)
+        summary['workers'] = []
+        for pid in pids:
+            after = process_usage(pid)
+            if before.get(pid) and after:
+                summary['workers'].append({'pid': pid, 'cpu_percent': 100 * (after[0] - before[pid][0]) / elapsed,
+                                           'rss_mb': after[1] / 2**20})
+        return summary
+    finally:
+        server.stop()
+
+def print_summary(label, summary):
+    print(f"\n{'='*78}\n{label}\n{'='*78}")
+    for route, s in summary.items():
+        if route == 'workers':
+            continue
+        print(f"{route:<9} {s['requests']:>7} req  {s['throughput_rps']:>8.1f} rps  err {s['error_rate']:>6.2%}  "
+              f"p50 {s['p50_ms']:>7.1f}  p90 {s['p90_ms']:>7.1f}  p99 {s['p99_ms']:>8.1f}  max {s['max_ms']:>8.1f} ms")
+    for w in summary.get('workers', []):
+        print(f"  worker {w['pid']}: cpu {w['cpu_percent']:.0f}%  rss {w['rss_mb']:.0f} MB")
+
+def sustainable(summary, slo_ms, max_error_rate):
+    overall = summary.get('overall')
+    return bool(overall) and overall['p99_ms'] <= slo_ms and overall['error_rate'] <= max_error_rate
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Open-loop load test of the app under the Procfile gunicorn command")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--rate', type=float, default=50, help="Target requests per second")
+    parser.add_argument('--duration', type=float, default=20, help="Seconds per run")
+    parser.add_argument('--mix', default='predict=70,live=20,static=10', help="Traffic weights per route class")
+    parser.add_argument('--upstream-latency-ms', type=float, default=50, help="Delay of the fake OpenWeatherMap")
+    parser.add_argument('--sweep-workers', help="Comma-separated worker counts to sweep, e.g. 1,2,4")
+    parser.add_argument('--sweep-threads', help="Comma-separated thread counts to sweep, e.g. 1,4,8")
+    parser.add_argument('--sweep-rates', default='25,50,100,200,400', help="Rates to ramp through per config")
+    parser.add_argument('--slo-p99-ms', type=float, default=500, help="p99 latency a config must stay under")
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--json', help="Write all results to this JSON file")
+    args = parser.parse_args()
+
+    upstream, upstream_url = start_fake_upstream(args.upstream_latency_ms)
+    mix = parse_mix(args.mix)
+    runs = []
+
+    if args.sweep_workers or args.sweep_threads:
+        worker_counts = [int(w) for w in (args.sweep_workers or str(args.workers)).split(',')]
+        thread_counts = [int(t) for t in (args.sweep_threads or str(args.threads)).split(',')]
+        rates = [float(r) for r in args.sweep_rates.split(',')]
+        best = None
+        for workers in worker_counts:
+            for threads in thread_counts:
+                max_rate = 0
+                for rate in rates:
+                    summary = run_config(workers, threads, rate, args.duration, mix, upstream_url)
+                    runs.append({'workers': workers, 'threads': threads, 'rate': rate, 'summary': summary})
+                    print_summary(f"workers={workers} threads={threads} rate={rate:g} rps", summary)
+                    if not sustainable(summary, args.slo_p99_ms, args.max_error_rate):
+                        break
+                    max_rate = rate
+                # Prefer higher sustainable rate, then fewer processes (less memory)
+                candidate = (max_rate, -workers, -threads)
+                if best is None or candidate > best[0]:
+                    best = (candidate, workers, threads, max_rate)
+        print(f"\n{'='*78}")
+        if best and best[3] > 0:
+            print(f"✅ Recommended: --workers {best[1]} with WEB_THREADS={best[2]} "
+                  f"(sustains {best[3]:g} rps with p99 <= {args.slo_p99_ms:g} ms)")
+        else:
+            print("⚠️  No configuration met the SLO at the lowest rate")
+    else:
+        summary = run_config(args.workers, args.threads, args.rate, args.duration, mix, upstream_url)
+        runs.append({'workers': args.workers, 'threads': args.threads, 'rate': args.rate, 'summary': summary})
+        print_summary(f"workers={args.workers} threads={args.threads} rate={args.rate:g} rps "
+                      f"({shlex.quote(procfile_command())})", summary)
+
+    upstream.shutdown()
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(runs, f, indent=2)
@@ -3,6 +3,7 @@ from data_generator import generate_weather_data
 from model import WeatherPredictor
 from visualizer import WeatherVisualizer
 from predictor import InteractivePredictor
+from stats import summarize_frame, print_stats
 
 def main():
     print("🌤️  Weather Prediction ML Project")
@@ -13,14 +14,15 @@ def main():
     df = generate_weather_data(1000)
     print(f"Generated {len(df)} weather records")
     
-    # Show basic info
-    print(f"\nDataset shape: {df.shape}")
-    print(f"Weather conditions: {list(df['weather_condition'].unique())}")
+    # Show basic info, summarised chunk by chunk
+    stats = summarize_frame(df)
+    print(f"\nDataset: {stats.n} rows, {len(stats.columns)} features")
+    print(f"Weather conditions: {list(stats.class_counts)}")
     
     # Train model
     print("\n🤖 Training machine learning model...")
     model = WeatherPredictor()
-    results = model.train(df)
+    results = model.train(df, permutation_repeats=5)
     
     print(f"✅ Model trained with {results['accuracy']:.1%} accuracy")
     
@@ -37,15 +39,19 @@ def main():
         print("3. View weather condition distribution")
         print("4. Make weather predictions")
         print("5. Show model performance")
-        print("6. Exit")
+        print("6. Show dataset statistics")
+        print("7. Exit")
         print("="*50)
         
-        choice = input("Enter your choice (1-6): ").strip()
+        choice = input("Enter your choice (1-7): ").strip()
         
         if choice == '1':
             viz.plot_distributions()
         elif choice == '2':
             viz.plot_feature_importance(results['feature_importance'])
+            viz.plot_feature_importance(results['permutation_importance'],
+                                        title='Permutation Importance in Weather Prediction',
+                                        xlabel='Accuracy Drop When Shuffled')
         elif choice == '3':
             viz.plot_weather_distribution()
         elif choice == '4':
@@ -56,11 +62,17 @@ def main():
             print(f"Accuracy: {results['accuracy']:.1%}")
             print(f"\nFeature Importance:")
             print(results['feature_importance'].to_string(index=False))
+            print(f"\nPermutation Importance (accuracy drop):")
+            print(results['permutation_importance'].to_string(index=False))
+            print(f"\nTraining Data:")
+            print(results['statistics'].summary().round(2).to_string())
         elif choice == '6':
+            print_stats(stats)
+        elif choice == '7':
             print("👋 Thanks for using the Weather Predictor!")
             break
         else:
-            print("Invalid choice. Please enter 1-6.")
+            print("Invalid choice. Please enter 1-7.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,240 @@
+#metrics.py
+import atexit
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+class Metrics:
+    """Prometheus-style counters, histograms and gauges that aggregate across worker processes.
+
+    Each worker keeps its metrics in memory. When METRICS_DIR is set, the worker also
+    writes a snapshot to <METRICS_DIR>/metrics_<pid>_<token>.json every `flush_interval`
+    seconds; the token is random per process, so a worker that inherits a dead worker's
+    pid never overwrites its file. /metrics merges every worker's file: counters and
+    histograms are summed over all files, including files from workers that have exited,
+    so totals never go backwards. Gauges are summed over live workers only. Clear METRICS_DIR when the server
+    (re)starts, as with prometheus_client's multiprocess mode.
+    """
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+        self._flusher_pid = None
+        self._process = None  # (pid, token, started) of the process writing snapshots
+
+    # Definitions -------------------------------------------------------
+
+    def counter(self, name, help_text):
+        self._help[name] = ('counter', help_text, None)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self._help[name] = ('histogram', help_text, tuple(buckets))
+
+    def gauge(self, name, help_text):
+        self._help[name] = ('gauge', help_text, None)
+
+    # Updates -----------------------------------------------------------
+
+    def inc(self, name, labels=None, amount=1):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, labels=None):
+        buckets = self._help[name][2]
+        key = (name, _label_key(labels))
+        index = bisect.bisect_left(buckets, value)
+        with self._lock:
+            state = self._histograms.get(key)
+            if state is None:
+                state = self._histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def set_gauge(self, name, value, labels=None):
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def add_gauge(self, name, amount, labels=None):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + amount
+
+    @contextmanager
+    def time(self, name, labels=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, labels)
+
+    # Multi-process aggregation -----------------------------------------
+
+    def _process_id(self):
+        # Renewed after fork, so each worker gets its own token
+        if self._process is None or self._process[0] != os.getpid():
+            self._process = (os.getpid(), uuid.uuid4().hex[:12], time.time())
+        return self._process
+
+    def snapshot(self):
+        pid, token, started = self._process_id()
+        with self._lock:
+            return {
+                'pid': pid,
+                'token': token,
+                'started': started,
+                'counters': [[n, list(map(list, l)), v] for (n, l), v in self._counters.items()],
+                'histograms': [[n, list(map(list, l)), [list(s[0]), s[1], s[2]]]
+                               for (n, l), s in self._histograms.items()],
+                'gauges': [[n, list(map(list, l)), v] for (n, l), v in self._gauges.items()],
+            }
+
+    def flush(self):
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        pid, token, _ = self._process_id()
+        path = os.path.join(self.directory, f'metrics_{pid}_{token}.json')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def start_flusher(self):
+        """Periodically write this worker's snapshot (no-op without METRICS_DIR)"""
+        # Threads don't survive fork, so a forked worker starts its own flusher
+        if not self.directory or self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+
+        def loop():
+            while True:
+                time.sleep(self.flush_interval)
+                try:
+                    self.flush()
+                except OSError:
+                    pass
+
+        threading.Thread(target=loop, daemon=True, name='metrics-flusher').start()
+        atexit.register(self.flush)
+
+    def _snapshots(self):
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, 'metrics_*.json')):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # Being replaced right now; the next scrape will see it
+        return snapshots
+
+    @staticmethod
+    def _pid_alive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def collect(self):
+        """Merge every worker's snapshot into one set of samples"""
+        counters, histograms, gauges = {}, {}, {}
+        snapshots = self._snapshots()
+        # A reused pid belongs to the snapshot that started last; older ones are dead workers
+        newest = {}
+        for snap in snapshots:
+            newest[snap['pid']] = max(newest.get(snap['pid'], 0), snap.get('started', 0))
+        for snap in snapshots:
+            for name, labels, value in snap['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, (buckets, total, count) in snap['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                merged[1] += total
+                merged[2] += count
+            live = snap.get('token') == self._process_id()[1] or (
+                snap.get('started', 0) == newest[snap['pid']] and snap['pid'] != os.getpid()
+                and self._pid_alive(snap['pid']))
+            if live:
+                for name, labels, value in snap['gauges']:
+                    key = (name, tuple(map(tuple, labels)))
+                    gauges[key] = gauges.get(key, 0) + value
+        return counters, histograms, gauges
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        counters, histograms, gauges = self.collect()
+        lines = []
+        for name, (kind, help_text, buckets) in sorted(self._help.items()):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for (n, labels), value in sorted(counters.items()):
+                    if n == name:
+                        lines.append(f'{name}{_format_labels(labels)} {value}')
+            elif kind == 'gauge':
+                for (n, labels), value in sorted(gauges.items()):
+                    if n == name:
+                        lines.append(f'{name}{_format_labels(labels)} {value}')
+            else:
+                for (n, labels), (counts, total, count) in sorted(histograms.items()):
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, bucket_count in zip(list(buckets) + ['+Inf'], counts):
+                        cumulative += bucket_count
+                        lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {total}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics(os.environ.get('METRICS_DIR'), float(os.environ.get('METRICS_FLUSH_INTERVAL', 1.0)))
+
+metrics.counter('weather_http_requests_total', 'HTTP requests by route, method and status')
+metrics.histogram('weather_http_request_duration_seconds', 'HTTP request latency by route')
+metrics.histogram('weather_stage_duration_seconds', 'Time spent in a request stage (parse, validation, inference, upstream, serialize)')
+metrics.gauge('weather_inflight_requests', 'Requests currently being handled')
+metrics.counter('weather_admission_rejected_total', 'Requests shed with 503 by route and reason (limit, queue_full, timeout, displaced, queue_age)')
+metrics.counter('weather_degraded_predictions_total', 'Predictions answered by the rule-based fallback because the model missed its deadline or was overloaded')
+metrics.gauge('weather_model_active', 'Workers serving each model type (ml or fallback)')
+metrics.histogram('weather_early_exit_trees', 'Trees evaluated per early-exit prediction', buckets=(5, 10, 15, 20, 30, 40, 50, 60, 70, 80, 90, 100, 200, 500))
+metrics.gauge('weather_stream_subscribers', 'Open /stream connections')
+metrics.gauge('weather_stream_cities', 'Distinct cities being polled for /stream subscribers')
+metrics.counter('weather_stream_polls_total', 'Upstream polls made for /stream, by status (ok or error)')
+metrics.counter('weather_stream_dropped_total', 'Stream events dropped because a subscriber fell behind')
+metrics.counter('weather_stream_closed_total', 'Closed /stream connections by reason (client, slow, max_age)')
+metrics.counter('weather_live_cache_total', 'Live-weather cache lookups by result (hit or miss)')
+metrics.counter('weather_prefetch_total', 'Background refreshes of popular cities by status (ok, error, over_budget)')
+metrics.counter('weather_city_resolution_total', 'City names resolved against the bundled list by result (exact, alias, fuzzy, unknown, invalid)')
+metrics.counter('weather_grid_tiles_total', 'Regional grid tiles served from the tile cache or computed, by result (hit or computed)')
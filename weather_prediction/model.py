@@ -1,18 +1,23 @@
 #model.py
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
+import numpy as np
 import pandas as pd
+from backends import create_backend, get_backend_name
+
+FEATURES = ['temperature', 'humidity', 'pressure', 'wind_speed', 'cloud_cover']
 
 class WeatherPredictor:
-    def __init__(self):
-        self.model = RandomForestClassifier(n_estimators=100, random_state=42)
+    def __init__(self, backend=None, **params):
+        self.backend = backend or get_backend_name()
+        self.params = params
+        self.model = create_backend(self.backend, **params)
         self.is_trained = False
         
-    def train(self, df):
+    def train(self, df, permutation_repeats=0, permutation_max_samples=2000):
         """Train the weather prediction model"""
         # Prepare features and target
-        X = df[['temperature', 'humidity', 'pressure', 'wind_speed', 'cloud_cover']]
+        X = df[FEATURES]
         y = df['weather_condition']
         
         # Split data
@@ -20,20 +25,46 @@ class WeatherPredictor:
             X, y, test_size=0.2, random_state=42
         )
         
-        # Train model
-        self.model.fit(self.X_train, self.y_train)
+        # Train on plain arrays so single-row predictions skip feature name checks
+        self.model.fit(self.X_train.to_numpy(), self.y_train.to_numpy())
         self.is_trained = True
+        self.__dict__.pop('_early_exit', None)
+        self.__dict__.pop('_explainer', None)
         
         # Get predictions for evaluation
-        y_pred = self.model.predict(self.X_test)
+        y_pred, _ = self.predict_batch(self.X_test)
+        
+        # Not every backend exposes impurity importances (e.g. boosting, rules)
+        importances = getattr(self.model, 'feature_importances_', None)
+        if importances is None:
+            importances = np.full(len(FEATURES), np.nan)
+        
+        # Permutation importance works for every backend. It's off by default (repeats=0) so
+        # app startup and tuning don't pay for it; the retrain paths (main.py,
+        # train_and_save_model.py, registry publish) turn it on, with permutation_max_samples
+        # capping the cost. Kept on the model so saved artifacts carry it to the charts.
+        permutation = None
+        if permutation_repeats:
+            from importance import permutation_importance
+            permutation = permutation_importance(
+                self, self.X_test, self.y_test.to_numpy(),
+                n_repeats=permutation_repeats, max_samples=permutation_max_samples
+            )
+        self.permutation_importance = permutation
+        
+        # One-pass summary of the training split, for reports
+        from stats import RunningStats
+        statistics = RunningStats().update(self.X_train.to_numpy(dtype=float), self.y_train.to_numpy())
         
         return {
             'accuracy': accuracy_score(self.y_test, y_pred),
-            'report': classification_report(self.y_test, y_pred),
+            'report': classification_report(self.y_test, y_pred, zero_division=0),
             'feature_importance': pd.DataFrame({
-                'feature': X.columns,
-                'importance': self.model.feature_importances_
-            }).sort_values('importance', ascending=False)
+                'feature': FEATURES,
+                'importance': importances
+            }).sort_values('importance', ascending=False),
+            'permutation_importance': permutation,
+            'statistics': statistics
         }
     
     def predict(self, temperature, humidity, pressure, wind_speed, cloud_cover):
@@ -42,13 +73,86 @@ class WeatherPredictor:
             raise Exception("Model must be trained first!")
             
         input_data = [[temperature, humidity, pressure, wind_speed, cloud_cover]]
-        prediction = self.model.predict(input_data)[0]
+        # One inference call: the label is the most probable class
         probabilities = self.model.predict_proba(input_data)[0]
+        prediction = self.model.classes_[probabilities.argmax()]
         
         # Create probability dictionary
         prob_dict = dict(zip(self.model.classes_, probabilities))
         
         return prediction, prob_dict
+    
+    def predict_batch(self, X):
+        """Predict labels and class probabilities for many rows in one call"""
+        if not self.is_trained:
+            raise Exception("Model must be trained first!")
+            
+        if isinstance(X, pd.DataFrame):
+            X = X[FEATURES].to_numpy()
+        probabilities = self.model.predict_proba(np.asarray(X, dtype=float))
+        return self.model.classes_[probabilities.argmax(axis=1)], probabilities
+    
+    def early_exit_forest(self):
+        """Tree-by-tree view of the forest for early-exit inference (built once, never pickled)"""
+        forest = self.__dict__.get('_early_exit')
+        if forest is None:
+            from early_exit import EarlyExitForest
+            if not EarlyExitForest.supports(self.model):
+                raise ValueError(f"Early exit needs a tree ensemble, not '{self.backend}'")
+            forest = self._early_exit = EarlyExitForest(self.model)
+        return forest
+    
+    def predict_early(self, temperature, humidity, pressure, wind_speed, cloud_cover, mode='exact', delta=0.05):
+        """Like predict(), but stops evaluating trees once the label is settled.
+        
+        Returns (prediction, probabilities, trees_used); see early_exit.EarlyExitForest.
+        """
+        if not self.is_trained:
+            raise Exception("Model must be trained first!")
+            
+        labels, probabilities, trees_used = self.early_exit_forest().predict(
+            [[temperature, humidity, pressure, wind_speed, cloud_cover]], mode, delta
+        )
+        return labels[0], dict(zip(self.model.classes_, probabilities[0])), int(trees_used[0])
+    
+    def explainer(self):
+        """Precomputed per-node attributions for the forest (built once, never pickled)"""
+        explainer = self.__dict__.get('_explainer')
+        if explainer is None:
+            from explain import TreeExplainer
+            if not TreeExplainer.supports(self.model):
+                raise ValueError(f"Explanations need a tree ensemble, not '{self.backend}'")
+            explainer = self._explainer = TreeExplainer(self.model)
+        return explainer
+    
+    def explain_batch(self, X):
+        """Like predict_batch(), plus per-feature contributions shaped (rows, features, classes)"""
+        if not self.is_trained:
+            raise Exception("Model must be trained first!")
+            
+        if isinstance(X, pd.DataFrame):
+            X = X[FEATURES].to_numpy()
+        probabilities, contributions = self.explainer().explain(np.asarray(X, dtype=float))
+        return self.model.classes_[probabilities.argmax(axis=1)], probabilities, contributions
+    
+    def predict_explained(self, temperature, humidity, pressure, wind_speed, cloud_cover):
+        """Like predict(), plus how much each feature moved the predicted class's probability
+        away from the training class balance (`bias`)"""
+        labels, probabilities, contributions = self.explain_batch(
+            [[temperature, humidity, pressure, wind_speed, cloud_cover]]
+        )
+        index = probabilities[0].argmax()
+        explanation = {
+            'bias': float(self.explainer().bias[index]),
+            'contributions': dict(zip(FEATURES, contributions[0, :, index].tolist()))
+        }
+        return labels[0], dict(zip(self.model.classes_, probabilities[0])), explanation
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_early_exit', None)
+        state.pop('_explainer', None)
+        return state
 
 if __name__ == "__main__":
     # Test the model
@@ -56,7 +160,8 @@ if __name__ == "__main__":
     
     df = generate_weather_data(500)
     model = WeatherPredictor()
-    results = model.train(df)
+    results = model.train(df, permutation_repeats=5)
     
     print(f"Model Accuracy: {results['accuracy']:.3f}")
-    print(f"Feature Importance:\n{results['feature_importance']}")
\ No newline at end of file
+    print(f"Feature Importance:\n{results['feature_importance']}")
+    print(f"Permutation Importance:\n{results['permutation_importance']}")
\ No newline at end of file
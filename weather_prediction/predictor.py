@@ -1,5 +1,13 @@
 #predictor.py
-from model import WeatherPredictor
+import os
+import pickle
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+import pandas as pd
+from model import WeatherPredictor, FEATURES
 
 class InteractivePredictor:
     def __init__(self, model):
@@ -55,14 +63,142 @@ class InteractivePredictor:
             if continue_pred != 'y':
                 break
 
+# The model each scoring process uses. Set in the parent before the pool starts, so
+# forked workers share its pages instead of unpickling their own copy.
+_worker_model = None
+
+def _init_worker(model_path):
+    global _worker_model
+    if _worker_model is None:  # Spawned (not forked) workers load it once
+        with open(model_path, 'rb') as f:
+            _worker_model = pickle.load(f)
+
+def _score_chunk(X):
+    return _worker_model.predict_batch(X)
+
+class BatchPredictor:
+    """Scores a CSV or Parquet file of observations in chunks, in input order.
+    
+    Chunks are read one at a time and scored with predict_batch, one call per chunk.
+    With `workers` > 1 they go to a process pool: at most `max_pending` are in flight,
+    and results are written as the oldest finishes, so the output keeps the input order
+    and memory stays at a few chunks whatever the file size.
+    """
+    def __init__(self, model_path, workers=None, chunksize=100_000, max_pending=None):
+        self.model_path = model_path
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self.max_pending = max_pending or 2 * self.workers
+        with open(model_path, 'rb') as f:
+            self.model = pickle.load(f)
+        
+    def read_chunks(self, path, columns):
+        """Yield DataFrame chunks of `columns` from a CSV or Parquet file"""
+        if path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=self.chunksize, columns=columns):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(path, chunksize=self.chunksize, usecols=columns)
+            
+    def _results(self, chunks):
+        """(chunk, (labels, probabilities)) pairs, in input order"""
+        if self.workers == 1:
+            for chunk in chunks:
+                yield chunk, self.model.predict_batch(chunk[FEATURES].to_numpy(dtype=float))
+            return
+        
+        global _worker_model
+        _worker_model = self.model
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        pending = deque()
+        with ProcessPoolExecutor(self.workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(self.model_path,)) as pool:
+            for chunk in chunks:
+                pending.append((chunk, pool.submit(_score_chunk, chunk[FEATURES].to_numpy(dtype=float))))
+                if len(pending) >= self.max_pending:
+                    chunk, future = pending.popleft()
+                    yield chunk, future.result()
+            while pending:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+                
+    def score(self, input_path, output_path, keep=()):
+        """Write predictions and class probabilities for every row; returns throughput stats.
+        
+        `keep` names input columns (e.g. station, timestamp) copied to the output.
+        """
+        keep = [column for column in keep if column not in FEATURES]
+        classes = list(self.model.model.classes_)
+        writer = None
+        rows = 0
+        start = time.perf_counter()
+        
+        try:
+            for chunk, (labels, probabilities) in self._results(self.read_chunks(input_path, FEATURES + keep)):
+                out = chunk[keep].reset_index(drop=True)
+                out['prediction'] = labels
+                for i, cls in enumerate(classes):
+                    out[f'prob_{cls}'] = probabilities[:, i]
+                
+                if output_path.endswith('.parquet'):
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+                    table = pa.Table.from_pandas(out, preserve_index=False)
+                    writer = writer or pq.ParquetWriter(output_path, table.schema)
+                    writer.write_table(table)
+                else:
+                    out.to_csv(output_path, mode='a' if rows else 'w', header=not rows, index=False)
+                rows += len(out)
+        finally:
+            if writer is not None:
+                writer.close()
+                
+        elapsed = time.perf_counter() - start
+        # ru_maxrss is in KB on Linux; children are the pool workers, once they've exited.
+        # resource is Unix-only, so it's imported here and the peaks are None on Windows.
+        try:
+            import resource
+            peak = [resource.getrusage(who).ru_maxrss / 1024 for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+        except ImportError:
+            peak = [None, None]
+        return {
+            'rows': rows,
+            'seconds': elapsed,
+            'rows_per_sec': rows / elapsed if elapsed else 0.0,
+            'peak_rss_mb': peak[0],
+            'peak_worker_rss_mb': peak[1],
+        }
+
 if __name__ == "__main__":
+    import argparse
     from data_generator import generate_weather_data
     
-    # Create and train model
-    df = generate_weather_data(1000)
-    model = WeatherPredictor()
-    model.train(df)
+    parser = argparse.ArgumentParser(description="Interactive predictions, or batch scoring of a file")
+    parser.add_argument('input', nargs='?', help="CSV/Parquet file of observations to score")
+    parser.add_argument('--output', help="Where to write predictions (.csv or .parquet)")
+    parser.add_argument('--model', default='models/weather_model.pkl')
+    parser.add_argument('--workers', type=int, help="Scoring processes (default: CPU count)")
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--keep', nargs='*', default=[], help="Input columns to copy to the output")
+    args = parser.parse_args()
     
-    # Run interactive predictor
-    predictor = InteractivePredictor(model)
-    predictor.run_interactive_session()
\ No newline at end of file
+    if args.input:
+        output = args.output or os.path.splitext(args.input)[0] + '_predictions.csv'
+        print(f"🔮 Scoring {args.input} -> {output}")
+        batch = BatchPredictor(args.model, workers=args.workers, chunksize=args.chunksize)
+        stats = batch.score(args.input, output, keep=args.keep)
+        print(f"✅ Scored {stats['rows']:,} rows in {stats['seconds']:.1f}s")
+        print(f"⏱️  {stats['rows_per_sec']:,.0f} rows/sec")
+        if stats['peak_rss_mb'] is not None:
+            print(f"💾 Peak memory: {stats['peak_rss_mb']:.0f} MB (main), {stats['peak_worker_rss_mb']:.0f} MB (largest worker)")
+    else:
+        # Create and train model
+        df = generate_weather_data(1000)
+        model = WeatherPredictor()
+        model.train(df)
+        
+        # Run interactive predictor
+        predictor = InteractivePredictor(model)
+        predictor.run_interactive_session()
\ No newline at end of file
@@ -0,0 +1,142 @@
+#prefetch.py
+import os
+import threading
+import time
+from metrics import metrics
+from structured_logging import get_logger
+
+log = get_logger('prefetch')
+
+class SpaceSaving:
+    """Bounded heavy-hitters sketch (Metwally et al.'s Space-Saving).
+
+    Tracks at most `capacity` keys. An unseen key arriving when the sketch is full replaces
+    the key with the smallest count and inherits that count plus one. Counts therefore
+    overestimate by at most the recorded error, and any key seen more than
+    total / capacity times is guaranteed to be tracked. decay() scales every count down, so
+    the ranking follows recent traffic rather than all-time totals.
+    """
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def add(self, key, weight=1):
+        with self._lock:
+            if key in self.counts:
+                self.counts[key] += weight
+            elif len(self.counts) < self.capacity:
+                self.counts[key] = weight
+                self.errors[key] = 0
+            else:
+                victim = min(self.counts, key=self.counts.get)
+                floor = self.counts.pop(victim)
+                del self.errors[victim]
+                self.counts[key] = floor + weight
+                self.errors[key] = floor
+
+    def top(self, n):
+        """[(key, count, error)] for the `n` most frequent keys, most frequent first"""
+        with self._lock:
+            ranked = sorted(self.counts.items(), key=lambda item: -item[1])[:n]
+            return [(key, count, self.errors[key]) for key, count in ranked]
+
+    def decay(self, factor=0.5):
+        with self._lock:
+            for key in list(self.counts):
+                self.counts[key] *= factor
+                self.errors[key] *= factor
+                if self.counts[key] < 0.5:
+                    del self.counts[key], self.errors[key]
+
+class Prefetcher:
+    """Keeps the most requested cities' live observations warm.
+
+    Requests are recorded in a SpaceSaving sketch. Every `interval` seconds the top `top_n`
+    cities whose cache entry is missing or expires within `lead` seconds are refreshed with
+    `refresh(key)`, most popular first. A refresh that returns False (e.g. an unknown city)
+    isn't retried for `cache.ttl` seconds. Upstream calls are limited by a token bucket of
+    `budget` calls per minute, kept in the cache (cache.take_token): with a cache shared
+    between workers the budget is shared too, so N workers still spend at most `budget`
+    per minute. When the budget runs out, the least popular cities wait for the next round.
+    Counts are halved every `decay_interval` seconds. With a shared cache, cache.claim()
+    makes sure only one worker refreshes a given city.
+    """
+    def __init__(self, refresh, cache, sketch=None, top_n=10, lead=30.0, budget=30,
+                 interval=5.0, decay_interval=600.0):
+        self.refresh = refresh
+        self.cache = cache
+        self.sketch = sketch or SpaceSaving(max(64, 4 * top_n))
+        self.top_n = top_n
+        self.lead = lead
+        self.budget = budget
+        self.interval = interval
+        self.decay_interval = decay_interval
+        self._decayed_at = time.monotonic()
+        self._backoff = {}
+        self._pid = None
+
+    @classmethod
+    def from_env(cls, refresh, cache):
+        """PREFETCH_TOP_N (default 10, 0 disables), PREFETCH_BUDGET (upstream calls per
+        minute across all workers sharing the cache, default 30), PREFETCH_LEAD (seconds
+        before expiry, default 30)"""
+        top_n = int(os.environ.get('PREFETCH_TOP_N', 10))
+        if top_n <= 0:
+            return None
+        return cls(refresh, cache, top_n=top_n,
+                   budget=float(os.environ.get('PREFETCH_BUDGET', 30)),
+                   lead=float(os.environ.get('PREFETCH_LEAD', 30)))
+
+    def record(self, key):
+        self.sketch.add(key)
+
+    def due(self):
+        """Top cities that need refreshing, most popular first"""
+        now = time.monotonic()
+        return [key for key, _, _ in self.sketch.top(self.top_n)
+                if self.cache.expires_in(key) <= self.lead and self._backoff.get(key, 0) <= now]
+
+    def run_once(self):
+        refreshed = 0
+        now = time.monotonic()
+        self._backoff = {key: until for key, until in self._backoff.items() if until > now}
+        for key in self.due():
+            # Budget first: a lease taken without a token would keep every worker off the city
+            if not self.cache.take_token(self.budget):
+                metrics.inc('weather_prefetch_total', {'status': 'over_budget'})
+                break
+            if not self.cache.claim(key, self.lead):
+                self.cache.return_token(self.budget)  # Another worker sharing the cache is refreshing it
+                continue
+            try:
+                ok = self.refresh(key)
+            except Exception:
+                log.exception("Prefetch failed", extra={'city': key})
+                ok = False
+            metrics.inc('weather_prefetch_total', {'status': 'ok' if ok else 'error'})
+            if ok:
+                refreshed += 1
+                self._backoff.pop(key, None)
+            else:
+                self._backoff[key] = time.monotonic() + self.cache.ttl
+
+        if time.monotonic() - self._decayed_at >= self.decay_interval:
+            self.sketch.decay()
+            self._decayed_at = time.monotonic()
+        return refreshed
+
+    def start(self):
+        # One thread per gunicorn worker, started after the fork
+        if self._pid == os.getpid():
+            return self
+        self._pid = os.getpid()
+
+        def loop():
+            while True:
+                time.sleep(self.interval)
+                self.run_once()
+
+        threading.Thread(target=loop, name='prefetch', daemon=True).start()
+        return self
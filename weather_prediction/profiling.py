@@ -0,0 +1,72 @@
+#profiling.py
+import cProfile
+import hmac
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context
+from metrics import metrics
+
+@contextmanager
+def timed_stage(name):
+    """Time a request stage for the Server-Timing header and the stage histogram"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe('weather_stage_duration_seconds', elapsed, {'stage': name})
+        if has_request_context():
+            timings = g.setdefault('server_timing', {})
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+def server_timing_header(timings, total=None):
+    """Format stage durations (seconds) as a Server-Timing header value in milliseconds"""
+    parts = [f'{name};dur={seconds * 1000:.3f}' for name, seconds in timings.items()]
+    if total is not None:
+        parts.append(f'total;dur={total * 1000:.3f}')
+    return ', '.join(parts)
+
+class RequestProfiler:
+    """Opt-in cProfile capture for a sampled fraction of requests or on an authorized debug header.
+
+    PROFILE_SAMPLE_RATE   fraction of requests to profile (default 0)
+    PROFILE_DEBUG_TOKEN   requests sending X-Debug-Profile: <token> are always profiled
+    PROFILE_DIR           where .prof files are written (default profiles/)
+    """
+    HEADER = 'X-Debug-Profile'
+
+    def __init__(self, sample_rate=None, debug_token=None, directory=None):
+        self.sample_rate = float(os.environ.get('PROFILE_SAMPLE_RATE', 0) if sample_rate is None else sample_rate)
+        self.debug_token = os.environ.get('PROFILE_DEBUG_TOKEN', '') if debug_token is None else debug_token
+        self.directory = directory or os.environ.get('PROFILE_DIR', 'profiles')
+        # Checked first on every request, so disabled profiling costs one attribute read
+        self.enabled = self.sample_rate > 0 or bool(self.debug_token)
+
+    def wants(self, request):
+        if not self.enabled:
+            return False
+        token = request.headers.get(self.HEADER)
+        # As bytes: compare_digest raises TypeError for non-ASCII strings
+        if token and self.debug_token and hmac.compare_digest(token.encode(), self.debug_token.encode()):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return None  # Another profiler is already active on this thread
+        return profile
+
+    def finish(self, profile, route):
+        """Stop profiling and write the stats file; returns its path"""
+        profile.disable()
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root'
+        path = os.path.join(self.directory, f'{time.strftime("%Y%m%d-%H%M%S")}_{slug}_{os.getpid()}_{time.perf_counter_ns()}.prof')
+        profile.dump_stats(path)
+        return path
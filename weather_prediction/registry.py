@@ -0,0 +1,216 @@
+#registry.py
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import threading
+from datetime import datetime, timezone
+from structured_logging import get_logger
+from early_exit import EarlyExitForest
+
+log = get_logger('registry')
+
+def _atomic_write(path, data):
+    """Write bytes to a temp file in the same directory and rename it into place"""
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _permutation_summary(model, n_repeats, max_samples):
+    """{feature: mean accuracy drop} for metadata.json, or None when it can't be had"""
+    frame = getattr(model, 'permutation_importance', None)
+    if frame is None and n_repeats and getattr(model, 'X_test', None) is not None:
+        from importance import permutation_importance
+        frame = permutation_importance(model, model.X_test, model.y_test.to_numpy(),
+                                       n_repeats=n_repeats, max_samples=max_samples)
+    if frame is None:
+        return None
+    return {row.feature: round(float(row.importance), 6) for row in frame.itertuples()}
+
+class ModelRegistry:
+    """Directory of versioned model artifacts plus an ACTIVE pointer file.
+
+    Layout:
+        <root>/versions/<version>/model.pkl
+        <root>/versions/<version>/metadata.json
+        <root>/ACTIVE   {"version": ..., "activated_at": ..., "history": [...]}
+    """
+    def __init__(self, root=None):
+        self.root = root or os.environ.get('MODEL_REGISTRY_DIR', 'models/registry')
+        self.versions_dir = os.path.join(self.root, 'versions')
+        self.pointer_path = os.path.join(self.root, 'ACTIVE')
+
+    def model_path(self, version):
+        return os.path.join(self.versions_dir, version, 'model.pkl')
+
+    def list_versions(self):
+        if not os.path.isdir(self.versions_dir):
+            return []
+        versions = []
+        for version in sorted(os.listdir(self.versions_dir)):
+            metadata_path = os.path.join(self.versions_dir, version, 'metadata.json')
+            if os.path.exists(metadata_path):
+                with open(metadata_path) as f:
+                    versions.append(json.load(f))
+        return versions
+
+    def publish(self, source_path, version=None, activate=False, notes='', permutation_repeats=5,
+                permutation_max_samples=2000):
+        """Copy a pickled model into the registry as a new immutable version.
+        
+        The metadata records the model's permutation importance: the one saved with the
+        artifact, or else one computed on the holdout split it was trained with (capped at
+        `permutation_max_samples` rows; `permutation_repeats=0` skips it).
+        """
+        version = version or datetime.now(timezone.utc).strftime('v%Y%m%d-%H%M%S')
+        version_dir = os.path.join(self.versions_dir, version)
+        if os.path.exists(version_dir):
+            raise ValueError(f"Version already exists: {version}")
+
+        # Stage in a temp dir so a half-copied version is never visible
+        staging_dir = f"{version_dir}.staging.{os.getpid()}"
+        os.makedirs(staging_dir)
+        with open(source_path, 'rb') as f:
+            payload = f.read()
+        model = pickle.loads(payload)  # Refuse artifacts that don't unpickle here
+        with open(os.path.join(staging_dir, 'model.pkl'), 'wb') as f:
+            f.write(payload)
+        metadata = {
+            'version': version,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'backend': getattr(model, 'backend', 'random_forest'),
+            'sha256': hashlib.sha256(payload).hexdigest(),
+            'size_bytes': len(payload),
+            'source': os.path.abspath(source_path),
+            'notes': notes,
+            'permutation_importance': _permutation_summary(model, permutation_repeats, permutation_max_samples),
+        }
+        with open(os.path.join(staging_dir, 'metadata.json'), 'w') as f:
+            json.dump(metadata, f, indent=2)
+        os.rename(staging_dir, version_dir)
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def read_pointer(self):
+        try:
+            with open(self.pointer_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def active_version(self):
+        pointer = self.read_pointer()
+        return pointer['version'] if pointer else None
+
+    def activate(self, version):
+        """Point ACTIVE at a version; workers pick it up on their next poll"""
+        if not os.path.exists(self.model_path(version)):
+            raise ValueError(f"Unknown version: {version}")
+        pointer = self.read_pointer() or {'history': []}
+        history = pointer.get('history', [])
+        if pointer.get('version') and pointer['version'] != version:
+            history = history + [pointer['version']]
+        _atomic_write(self.pointer_path, json.dumps({
+            'version': version,
+            'activated_at': datetime.now(timezone.utc).isoformat(),
+            'history': history[-20:],
+        }, indent=2).encode())
+
+    def rollback(self):
+        """Re-activate the previously active version"""
+        pointer = self.read_pointer()
+        if not pointer or not pointer.get('history'):
+            raise ValueError("No previous version to roll back to")
+        previous = pointer['history'][-1]
+        _atomic_write(self.pointer_path, json.dumps({
+            'version': previous,
+            'activated_at': datetime.now(timezone.utc).isoformat(),
+            'history': pointer['history'][:-1],
+        }, indent=2).encode())
+        return previous
+
+    def load(self, version):
+        with open(self.model_path(version), 'rb') as f:
+            return pickle.load(f)
+
+def warm_up(model, rounds=3):
+    """Run a few predictions so the first real request doesn't pay for lazy setup"""
+    for _ in range(rounds):
+        model.predict(20, 60, 1013, 5, 50)
+    # Per-tree tables for early exit and explanations, built now rather than on a request
+    if hasattr(model, 'early_exit_forest') and EarlyExitForest.supports(model.model):
+        model.early_exit_forest()
+        model.explainer()
+    return model
+
+class RegistryWatcher(threading.Thread):
+    """Polls the ACTIVE pointer and hands a loaded, warmed model to `on_swap`"""
+    def __init__(self, registry, on_swap, interval=5.0, current_version=None):
+        super().__init__(daemon=True, name='model-registry-watcher')
+        self.registry = registry
+        self.on_swap = on_swap
+        self.interval = interval
+        self.current_version = current_version
+        self._stop_event = threading.Event()
+
+    def check_once(self):
+        version = self.registry.active_version()
+        if not version or version == self.current_version:
+            return False
+        try:
+            model = warm_up(self.registry.load(version))
+        except Exception as e:
+            # Keep serving the old model; retry on the next poll
+            log.warning("Could not load model version", extra={'version': version, 'error': str(e)})
+            return False
+        self.on_swap(model, version)
+        self.current_version = version
+        return True
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.check_once()
+
+    def stop(self):
+        self._stop_event.set()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage versioned weather models")
+    parser.add_argument('--root', help="Registry directory (default: MODEL_REGISTRY_DIR or models/registry)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    publish = commands.add_parser('publish', help="Add a pickled model as a new version")
+    publish.add_argument('path')
+    publish.add_argument('--version')
+    publish.add_argument('--notes', default='')
+    publish.add_argument('--activate', action='store_true')
+    publish.add_argument('--permutation-repeats', type=int, default=5,
+                         help="Shuffles per feature when the artifact has no permutation importance (0 to skip)")
+    publish.add_argument('--permutation-max-samples', type=int, default=2000)
+    activate = commands.add_parser('activate', help="Make a version the active one")
+    activate.add_argument('version')
+    commands.add_parser('rollback', help="Re-activate the previous version")
+    commands.add_parser('list', help="List versions")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'publish':
+        version = registry.publish(args.path, args.version, args.activate, args.notes,
+                                   args.permutation_repeats, args.permutation_max_samples)
+        print(f"✅ Published {version}" + (" (active)" if args.activate else ""))
+    elif args.command == 'activate':
+        registry.activate(args.version)
+        print(f"✅ Active version: {args.version}")
+    elif args.command == 'rollback':
+        print(f"↩️  Rolled back to: {registry.rollback()}")
+    else:
+        active = registry.active_version()
+        for entry in registry.list_versions():
+            marker = '*' if entry['version'] == active else ' '
+            print(f"{marker} {entry['version']}  {entry['backend']:<24} {entry['size_bytes'] / 1024:>8.0f} KB  "
+                  f"{entry['created_at']}  {entry['notes']}")
@@ -0,0 +1,111 @@
+#replay.py
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from capture import read_capture
+from loadtest import summarize, print_summary
+from model import FEATURES
+
+def send(session, base_url, record):
+    if record['r'] == 'predict':
+        # Fields missing from the original request were captured as null
+        payload = {k: v for k, v in zip(FEATURES, record['b'] or []) if v is not None}
+        return session.post(base_url + '/predict', json=payload, timeout=30)
+    return session.get(base_url + '/get-live-weather', params={'city': record['b']}, timeout=30)
+
+def replay(records, base_url, speed=1.0, concurrency=64, session_factory=requests.Session):
+    """Re-send captured requests, preserving their relative timing divided by `speed`.
+
+    speed=0 means as fast as possible with `concurrency` requests in flight. A request
+    counts as OK when its status matches the captured status, so captured 400s that
+    stay 400s are not reported as errors. Each sending thread gets its own session
+    from `session_factory`.
+    """
+    local = threading.local()
+    results = []
+    lock = threading.Lock()
+
+    def fire(record, scheduled):
+        if not hasattr(local, 'session'):
+            local.session = session_factory()
+        ok = False
+        try:
+            ok = send(local.session, base_url, record).status_code == record.get('s', 200)
+        except requests.RequestException:
+            pass
+        with lock:
+            results.append((record['r'], time.perf_counter() - scheduled, ok))
+
+    start = time.perf_counter()
+    first = records[0]['t'] if records else 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        if speed > 0:
+            for record in records:
+                scheduled = start + (record['t'] - first) / speed
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(fire, record, scheduled)
+        else:
+            # Max speed is closed-loop: latency is measured from each actual send
+            list(pool.map(lambda r: fire(r, time.perf_counter()), records))
+    return results, time.perf_counter() - start
+
+def compare_runs(current, previous, tolerance=0.2):
+    """Routes whose p50 or p99 grew by more than `tolerance` against the previous run"""
+    regressions = []
+    for route, stats in current.items():
+        old = previous.get(route)
+        if not isinstance(stats, dict) or not old:
+            continue
+        for metric in ('p50_ms', 'p99_ms', 'error_rate'):
+            before, after = old[metric], stats[metric]
+            worse = after - before if metric == 'error_rate' else (after - before) / before if before else 0
+            if worse > tolerance:
+                regressions.append((route, metric, before, after))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay captured production traffic against a local instance")
+    parser.add_argument('capture', nargs='+', help="Capture files, or a capture directory")
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--speed', default='1', help="Time scale: 1, 10, ... or 'max'")
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--save', help="Write this run's summary to a JSON file")
+    parser.add_argument('--compare', help="Summary JSON from a previous run to check for latency regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    paths = []
+    for item in args.capture:
+        paths += sorted(glob.glob(os.path.join(item, 'capture-*.jsonl*'))) if os.path.isdir(item) else [item]
+    records = read_capture(paths)
+    if not records:
+        print("❌ No captured requests found")
+        sys.exit(1)
+
+    speed = 0 if args.speed == 'max' else float(args.speed)
+    span = records[-1]['t'] - records[0]['t']
+    print(f"🔁 Replaying {len(records)} requests spanning {span:.0f}s at {args.speed}x against {args.url}")
+    results, elapsed = replay(records, args.url.rstrip('/'), speed, args.concurrency)
+    summary = summarize(results, elapsed)
+    print_summary(f"Replay at {args.speed}x", summary)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_runs(summary, json.load(f), args.tolerance)
+        for route, metric, before, after in regressions:
+            print(f"❌ {route} {metric}: {before:.2f} -> {after:.2f}")
+        if regressions:
+            sys.exit(1)
+        print("✅ No latency regressions against the previous run")
@@ -28,6 +28,9 @@ const useRealDataBtn = document.getElementById('useRealDataBtn');
 // Global variable to store current weather data
 let currentWeatherData = null;
 
+// Live updates: one server-sent stream per tab, the server polls each city once for everyone
+let weatherStream = null;
+
 // Live weather functionality
 fetchWeatherBtn.addEventListener('click', fetchLiveWeather);
 cityInput.addEventListener('keypress', (e) => {
@@ -36,6 +39,34 @@ cityInput.addEventListener('keypress', (e) => {
     }
 });
 
+// City suggestions come from the server's bundled city list, not the weather service
+const citySuggestions = document.getElementById('citySuggestions');
+let suggestTimer = null;
+cityInput.addEventListener('input', () => {
+    clearTimeout(suggestTimer);
+    suggestTimer = setTimeout(suggestCities, 150);
+});
+
+async function suggestCities() {
+    const prefix = cityInput.value.trim();
+    if (prefix.length < 2) {
+        citySuggestions.innerHTML = '';
+        return;
+    }
+    try {
+        const response = await fetch(`/cities?q=${encodeURIComponent(prefix)}`);
+        const data = await response.json();
+        citySuggestions.innerHTML = '';
+        for (const city of data.cities || []) {
+            const option = document.createElement('option');
+            option.value = city.label;
+            citySuggestions.appendChild(option);
+        }
+    } catch (error) {
+        console.error('City suggestion error:', error);
+    }
+}
+
 async function fetchLiveWeather() {
     const city = cityInput.value.trim();
     if (!city) {
@@ -52,6 +83,53 @@ async function fetchLiveWeather() {
     `;
     useRealDataBtn.style.display = 'none';
 
+    if (window.EventSource) {
+        subscribeLiveWeather(city);
+    } else {
+        fetchLiveWeatherOnce(city);
+    }
+}
+
+function subscribeLiveWeather(city) {
+    if (weatherStream) {
+        weatherStream.close();
+    }
+    const stream = new EventSource(`/stream?city=${encodeURIComponent(city)}`);
+    weatherStream = stream;
+    let received = false;
+
+    stream.addEventListener('weather', (e) => {
+        received = true;
+        const update = JSON.parse(e.data);
+        if (update.weather.success) {
+            currentWeatherData = update.weather;
+            displayLiveWeather(update.weather, update.prediction);
+            useRealDataBtn.style.display = 'block';
+        } else {
+            showWeatherError(update.weather.error || 'Failed to fetch weather data');
+        }
+    });
+
+    // The server closes streams that fall behind; start again from the latest state
+    stream.addEventListener('close', () => {
+        stream.close();
+        if (weatherStream === stream) {
+            subscribeLiveWeather(city);
+        }
+    });
+
+    // Refused (e.g. too many open streams): fetch once instead. Other errors reconnect by themselves.
+    stream.onerror = () => {
+        if (stream.readyState === EventSource.CLOSED && weatherStream === stream) {
+            weatherStream = null;
+            if (!received) {
+                fetchLiveWeatherOnce(city);
+            }
+        }
+    };
+}
+
+async function fetchLiveWeatherOnce(city) {
     try {
         const response = await fetch(`/get-live-weather?city=${encodeURIComponent(city)}`);
         const data = await response.json();
@@ -61,7 +139,7 @@ async function fetchLiveWeather() {
             displayLiveWeather(data);
             useRealDataBtn.style.display = 'block';
         } else {
-            showWeatherError(data.error || 'Failed to fetch weather data');
+            showWeatherError(data.error || 'Failed to fetch weather data', data.suggestions);
         }
     } catch (error) {
         console.error('Weather fetch error:', error);
@@ -69,9 +147,14 @@ async function fetchLiveWeather() {
     }
 }
 
-function displayLiveWeather(data) {
+function displayLiveWeather(data, prediction = null) {
     const weatherIcon = getWeatherIcon(data.icon);
     const currentDate = getCurrentDateString();
+    const predictionLine = prediction ? `
+            <div class="live-prediction">
+                Model predicts: ${weatherEmojis[prediction.prediction] || '🌤️'} ${prediction.prediction}
+                (${prediction.probabilities[prediction.prediction]}%)
+            </div>` : '';
     
     liveWeatherContent.innerHTML = `
         <div class="weather-display">
@@ -79,7 +162,7 @@ function displayLiveWeather(data) {
             <div class="location">${data.city}, ${data.country}</div>
             <div class="date">${currentDate}</div>
             <div class="current-weather">${data.temperature}°C</div>
-            <div class="description">${data.description}</div>
+            <div class="description">${data.description}</div>${predictionLine}
         </div>
         <div class="weather-params">
             <div class="param-item">
@@ -110,13 +193,30 @@ function displayLiveWeather(data) {
     `;
 }
 
-function showWeatherError(message) {
+function showWeatherError(message, suggestions = []) {
     liveWeatherContent.innerHTML = `
         <div class="weather-error">
             <i class="fas fa-exclamation-triangle"></i>
             <p>${message}</p>
         </div>
     `;
+    if (suggestions && suggestions.length) {
+        const hint = document.createElement('p');
+        hint.className = 'city-hint';
+        hint.textContent = 'Did you mean: ';
+        suggestions.forEach((label, i) => {
+            const link = document.createElement('a');
+            link.href = '#';
+            link.textContent = label;
+            link.addEventListener('click', (e) => {
+                e.preventDefault();
+                cityInput.value = label;
+                fetchLiveWeather();
+            });
+            hint.append(i ? ', ' : '', link);
+        });
+        liveWeatherContent.querySelector('.weather-error').appendChild(hint);
+    }
     useRealDataBtn.style.display = 'none';
 }
 
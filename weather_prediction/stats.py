@@ -0,0 +1,205 @@
+#stats.py
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from model import FEATURES
+
+# Fixed histogram ranges, so histograms from different shards line up and can be added
+DEFAULT_EDGES = {
+    'temperature': np.linspace(-40, 60, 51),
+    'humidity': np.linspace(0, 100, 51),
+    'pressure': np.linspace(900, 1100, 51),
+    'wind_speed': np.linspace(0, 100, 51),
+    'cloud_cover': np.linspace(0, 100, 51),
+}
+
+class RunningStats:
+    """One-pass, mergeable summary statistics for a stream of rows.
+
+    Count, mean and the co-moment matrix (sum of outer products of deviations) are kept
+    per column. Chunks and other accumulators are combined with Chan et al.'s pairwise
+    update:
+
+        n = n_a + n_b,  d = mean_b - mean_a
+        mean = mean_a + d * n_b / n
+        C = C_a + C_b + outer(d, d) * n_a * n_b / n
+
+    This stays accurate where sum/sum-of-squares formulas cancel, e.g. pressure ~1013
+    with a spread of 20. Variance, covariance and correlation all come from C. Min/max
+    and per-class counts also merge exactly. Per-class histograms over fixed `edges` do
+    too, as long as both sides use the same edges (otherwise merge raises ValueError);
+    values outside the edges land in the first or last bin. to_dict()/from_dict()
+    move an accumulator between processes.
+    """
+    def __init__(self, columns=FEATURES, edges=None):
+        self.columns = list(columns)
+        self.edges = {c: np.asarray(e, dtype=float) for c, e in (DEFAULT_EDGES if edges is None else edges).items()
+                      if c in self.columns}
+        k = len(self.columns)
+        self.n = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+        self.min = np.full(k, np.inf)
+        self.max = np.full(k, -np.inf)
+        self.class_counts = {}
+        self.histograms = {}  # class -> {column: counts}
+
+    def update(self, X, labels=None):
+        """Add a chunk: a DataFrame (labels from its weather_condition column) or an array"""
+        if isinstance(X, pd.DataFrame):
+            if labels is None and 'weather_condition' in X:
+                labels = X['weather_condition'].to_numpy()
+            X = X[self.columns].to_numpy(dtype=float)
+        X = np.asarray(X, dtype=float)
+        if not len(X):
+            return self
+
+        chunk = RunningStats(self.columns, self.edges)
+        chunk.n = len(X)
+        chunk.mean = X.mean(axis=0)
+        centered = X - chunk.mean
+        chunk.comoment = centered.T @ centered
+        chunk.min = X.min(axis=0)
+        chunk.max = X.max(axis=0)
+        if labels is not None:
+            codes, classes = pd.factorize(np.asarray(labels))
+            classes = list(classes)
+            chunk.class_counts = dict(zip(classes, np.bincount(codes).tolist()))
+            for column, edges in self.edges.items():
+                bins = len(edges) - 1
+                index = np.clip(np.searchsorted(edges, X[:, self.columns.index(column)], side='right') - 1, 0, bins - 1)
+                counts = np.bincount(codes * bins + index, minlength=len(classes) * bins).reshape(len(classes), bins)
+                for cls, row in zip(classes, counts):
+                    chunk.histograms.setdefault(cls, {})[column] = row
+        return self.merge(chunk)
+
+    def merge(self, other):
+        """Fold another accumulator (e.g. from another shard or process) into this one"""
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge statistics over different columns")
+        if self.edges.keys() != other.edges.keys() or \
+                any(not np.array_equal(edges, other.edges[c]) for c, edges in self.edges.items()):
+            raise ValueError("Cannot merge histograms over different bin edges")
+        if other.n:
+            n = self.n + other.n
+            delta = other.mean - self.mean
+            self.mean = self.mean + delta * other.n / n
+            self.comoment = self.comoment + other.comoment + np.outer(delta, delta) * self.n * other.n / n
+            self.n = n
+            self.min = np.minimum(self.min, other.min)
+            self.max = np.maximum(self.max, other.max)
+        for cls, count in other.class_counts.items():
+            self.class_counts[cls] = self.class_counts.get(cls, 0) + count
+        for cls, columns in other.histograms.items():
+            mine = self.histograms.setdefault(cls, {})
+            for column, counts in columns.items():
+                mine[column] = mine[column] + counts if column in mine else np.array(counts)
+        return self
+
+    def variance(self, ddof=1):
+        return self.comoment.diagonal() / max(self.n - ddof, 1)
+
+    def std(self, ddof=1):
+        return np.sqrt(self.variance(ddof))
+
+    def covariance(self, ddof=1):
+        return pd.DataFrame(self.comoment / max(self.n - ddof, 1), index=self.columns, columns=self.columns)
+
+    def correlation(self):
+        scale = np.sqrt(self.comoment.diagonal())
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = self.comoment / np.outer(scale, scale)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def summary(self):
+        """Per-column count, mean, std, min and max, like DataFrame.describe()"""
+        return pd.DataFrame({'count': self.n, 'mean': self.mean, 'std': self.std(),
+                             'min': self.min, 'max': self.max}, index=self.columns)
+
+    def to_dict(self):
+        return {
+            'columns': self.columns,
+            'edges': {c: e.tolist() for c, e in self.edges.items()},
+            'n': self.n,
+            'mean': self.mean.tolist(),
+            'comoment': self.comoment.tolist(),
+            'min': self.min.tolist(),
+            'max': self.max.tolist(),
+            'class_counts': self.class_counts,
+            'histograms': {cls: {c: h.tolist() for c, h in cols.items()} for cls, cols in self.histograms.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(data['columns'], data['edges'])
+        stats.n = data['n']
+        stats.mean = np.array(data['mean'])
+        stats.comoment = np.array(data['comoment'])
+        stats.min = np.array(data['min'])
+        stats.max = np.array(data['max'])
+        stats.class_counts = dict(data['class_counts'])
+        stats.histograms = {c: {k: np.array(h) for k, h in cols.items()} for c, cols in data['histograms'].items()}
+        return stats
+
+def summarize_chunks(chunks, columns=FEATURES, edges=None):
+    stats = RunningStats(columns, edges)
+    for chunk in chunks:
+        stats.update(chunk)
+    return stats
+
+def summarize_frame(df, columns=FEATURES, edges=None, chunk_rows=1_000_000):
+    """RunningStats of an in-memory frame, converted one chunk at a time"""
+    return summarize_chunks((df.iloc[i:i + chunk_rows] for i in range(0, len(df), chunk_rows)), columns, edges)
+
+def _summarize_shard(path, chunksize):
+    from evaluation import iter_chunks
+    return summarize_chunks(iter_chunks([path], chunksize)).to_dict()
+
+def summarize_shards(paths, chunksize=100000, workers=None):
+    """Summarise each shard in its own process and merge the results"""
+    stats = RunningStats()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(_summarize_shard, paths, [chunksize] * len(paths)):
+            stats.merge(RunningStats.from_dict(result))
+    return stats
+
+def print_stats(stats):
+    print("="*60)
+    print("📊 DATASET STATISTICS")
+    print("="*60)
+    print(f"Rows: {stats.n:,}")
+    print(stats.summary().round(2).to_string())
+    print("\nWeather conditions:")
+    for cls, count in sorted(stats.class_counts.items(), key=lambda item: -item[1]):
+        print(f"  {cls:<10}{count:>12,}  {count / max(stats.n, 1):6.1%}")
+    print("\nCorrelation:")
+    print(stats.correlation().round(2).to_string())
+    print("="*60)
+
+if __name__ == "__main__":
+    import glob
+
+    parser = argparse.ArgumentParser(description="One-pass summary statistics over chunked or sharded data")
+    parser.add_argument('data', nargs='*', help="CSV/Parquet files or glob patterns")
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--workers', type=int, help="Processes for sharded input (default: CPU count)")
+    parser.add_argument('--synthetic', type=int, default=0, help="Summarise this many synthetic rows instead")
+    parser.add_argument('--json', help="Write the merged accumulator to this JSON file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.synthetic:
+        from data_generator import generate_weather_data
+        stats = summarize_frame(generate_weather_data(args.synthetic), chunk_rows=args.chunksize)
+    else:
+        paths = [path for pattern in args.data for path in (sorted(glob.glob(pattern)) or [pattern])]
+        stats = summarize_shards(paths, args.chunksize, args.workers)
+    print_stats(stats)
+    print(f"⏱️  {stats.n / (time.perf_counter() - start):,.0f} rows/sec")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(stats.to_dict(), f)
@@ -0,0 +1,133 @@
+#structured_logging.py
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+# Attributes every LogRecord has; anything else was passed with extra={...}
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'sample'}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg plus any extra fields"""
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, separators=(',', ':'))
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread; drops them instead of waiting when the queue is full"""
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Format args now so the writer thread never touches request objects
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_text = logging.Formatter().formatException(record.exc_info) if record.exc_info else None
+        record.exc_info = None
+        return record
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of DEBUG records; a record's own extra={'sample': rate} wins"""
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        return random.random() < getattr(record, 'sample', self.rate)
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per (logger, message template) so a hot loop can't flood the pipe"""
+    def __init__(self, per_second, burst=None):
+        super().__init__()
+        self.per_second = per_second
+        self.burst = burst or max(1, per_second)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.per_second <= 0 or record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.per_second)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+        return allowed
+
+_state = {'pid': None, 'listener': None, 'handler': None}
+
+def configure_logging(level=None, fmt=None, sample_rate=None, rate_limit=None, stream=None):
+    """Route the 'weather' loggers through a background writer (once per process).
+
+    LOG_LEVEL        INFO by default; DEBUG turns on the sampled hot-path logs
+    LOG_FORMAT       json (default) or text
+    LOG_SAMPLE_RATE  fraction of DEBUG records kept (default 0.01)
+    LOG_RATE_LIMIT   max records per second per message template below WARNING (default 20)
+    """
+    if _state['pid'] == os.getpid():
+        return _state['handler']
+
+    level = level or os.environ.get('LOG_LEVEL', 'INFO')
+    fmt = fmt or os.environ.get('LOG_FORMAT', 'json')
+    sample_rate = float(os.environ.get('LOG_SAMPLE_RATE', 0.01) if sample_rate is None else sample_rate)
+    rate_limit = float(os.environ.get('LOG_RATE_LIMIT', 20) if rate_limit is None else rate_limit)
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == 'json'
+                        else logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=10000))
+    handler.addFilter(SamplingFilter(sample_rate))
+    handler.addFilter(RateLimitFilter(rate_limit))
+
+    root = logging.getLogger('weather')
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level)
+    root.propagate = False
+
+    listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(_stop_listener, listener)
+    _state.update(pid=os.getpid(), listener=listener, handler=handler)
+    return handler
+
+def _stop_listener(listener):
+    """Flush what is queued at interpreter exit (or earlier; a second stop is a no-op)"""
+    try:
+        listener.stop()
+    except (queue.Full, AttributeError):
+        pass  # AttributeError: already stopped, its thread is gone
+
+def get_logger(name):
+    return logging.getLogger(f'weather.{name}')
@@ -0,0 +1,53 @@
+# test_admission.py - Load shedding keeps /predict ahead of /get-live-weather
+import threading
+import time
+import pytest
+from admission import AdmissionController, Rejected, parse_request_start
+
+def controller(**kwargs):
+    options = dict(capacity=2, limits={'/predict': 2, '/get-live-weather': 1},
+                   priorities={'/predict': 0, '/get-live-weather': 1}, max_queue=2, queue_timeout=0.05)
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+def test_route_limit_and_timeout():
+    ac = controller()
+    ac.acquire('/get-live-weather')
+    with pytest.raises(Rejected) as e:
+        ac.acquire('/get-live-weather')
+    assert e.value.reason == 'timeout'
+    # The live-weather limit does not block inference
+    ac.acquire('/predict')
+    ac.release('/get-live-weather')
+    ac.release('/predict')
+    assert ac.total == 0 and ac.queue_depth() == 0
+
+def test_predict_displaces_queued_live_weather():
+    ac = controller(capacity=1, max_queue=1, queue_timeout=2)
+    ac.acquire('/predict')
+    outcomes = {}
+
+    def wait(name, route):
+        try:
+            ac.acquire(route)
+            outcomes[name] = 'admitted'
+        except Rejected as e:
+            outcomes[name] = e.reason
+
+    live = threading.Thread(target=wait, args=('live', '/get-live-weather'))
+    live.start()
+    while ac.queue_depth() == 0:
+        time.sleep(0.001)
+    predict = threading.Thread(target=wait, args=('predict', '/predict'))
+    predict.start()
+    live.join()
+    ac.release('/predict')
+    predict.join()
+    assert outcomes == {'live': 'displaced', 'predict': 'admitted'}
+
+def test_stale_requests_rejected_before_work():
+    ac = controller(max_queue_age=1.0)
+    with pytest.raises(Rejected) as e:
+        ac.acquire('/predict', request_start=time.time() - 5)
+    assert e.value.reason == 'queue_age'
+    assert parse_request_start('t=1700000000123') == pytest.approx(1700000000.123)
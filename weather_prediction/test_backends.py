@@ -0,0 +1,50 @@
+# test_backends.py - Every backend honours the same predict/predict_proba contract
+import pickle
+import pytest
+from data_generator import generate_weather_data
+from model import WeatherPredictor, FEATURES
+from backends import available_backends, create_backend, SimpleFallbackModel
+
+@pytest.fixture(scope='module')
+def df():
+    return generate_weather_data(600)
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_backend_contract(backend, df):
+    model = WeatherPredictor(backend=backend)
+    results = model.train(df)
+    assert 0 <= results['accuracy'] <= 1
+
+    # Survives a pickle round trip like the served model does
+    model = pickle.loads(pickle.dumps(model))
+
+    prediction, probabilities = model.predict(30, 40, 1020, 10, 20)
+    assert prediction in probabilities
+    assert abs(sum(probabilities.values()) - 1) < 1e-6
+
+    labels, proba = model.predict_batch(df[FEATURES].head(50))
+    assert labels.shape == (50,)
+    assert proba.shape == (50, len(model.model.classes_))
+    assert labels[0] == model.predict(*df[FEATURES].iloc[0])[0]
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        create_backend('linear_magic')
+
+def test_fallback_matches_original_rules():
+    fallback = SimpleFallbackModel()
+    assert fallback.predict(20, 90, 1000, 5, 90) == ('Rainy', {'Cloudy': 0.15, 'Rainy': 0.8, 'Sunny': 0.05})
+    assert fallback.predict(20, 50, 1000, 5, 70)[0] == 'Cloudy'
+    assert fallback.predict(30, 50, 1000, 5, 10)[0] == 'Sunny'
+    assert fallback.predict(15, 50, 1000, 5, 40)[0] == 'Clear'
+
+def test_permutation_importance_is_opt_in(df):
+    model = WeatherPredictor()
+    assert model.train(df)['permutation_importance'] is None
+
+    frame = model.train(df, permutation_repeats=3)['permutation_importance']
+    assert list(frame.columns) == ['feature', 'importance', 'importance_std']
+    assert sorted(frame['feature']) == sorted(FEATURES)
+    assert frame['importance'].is_monotonic_decreasing and (frame['importance_std'] >= 0).all()
+    assert frame['feature'].iloc[0] == 'cloud_cover'  # Every labelling rule checks it
+    assert model.permutation_importance is frame  # Saved with the artifact for the charts
@@ -0,0 +1,62 @@
+# test_charts.py - Chart keys, ETag revalidation and the memory/disk caches
+import os
+import pytest
+from charts import ChartRenderer
+
+class CountingRenderer(ChartRenderer):
+    """Stands in for matplotlib; counts renders"""
+    renders = 0
+
+    def render(self, key, model):
+        self.renders += 1
+        return repr(key).encode()
+
+def test_keys_and_etags():
+    renderer = ChartRenderer(samples=100)
+    key = renderer.key('feature-importance', 'v1', 800, 600, 'svg')
+    assert renderer.etag(key) == renderer.etag(renderer.key('feature-importance', 'v1', 800, 600, 'svg'))
+    assert renderer.etag(key) != renderer.etag(renderer.key('feature-importance', 'v2', 800, 600, 'svg'))
+    # Data-only charts survive a deploy
+    assert renderer.key('class-distribution', 'v1', 800, 600, 'png') == \
+        renderer.key('class-distribution', 'v2', 800, 600, 'png')
+    for bad in (('pie', 'v1', 800, 600, 'svg'), ('class-distribution', 'v1', 800, 600, 'gif'),
+                ('class-distribution', 'v1', 10, 600, 'svg')):
+        with pytest.raises(ValueError):
+            renderer.key(*bad)
+    with pytest.raises(LookupError):
+        ChartRenderer(dataset_path='missing.csv').key('class-distribution', 'v1', 800, 600, 'svg')
+
+def test_memory_and_disk_cache(tmp_path):
+    renderer = CountingRenderer(samples=100, cache_dir=str(tmp_path), max_entries=2)
+    keys = [renderer.key('class-distribution', None, width, 600, 'svg') for width in (400, 500, 600)]
+    for key in keys + keys[-1:]:
+        assert renderer.get(key, None) == repr(key).encode()
+    assert renderer.renders == 3 and len(renderer._memory) == 2
+    assert sorted(os.listdir(tmp_path)) == sorted(f'{renderer.etag(k)}.svg' for k in keys)
+
+    # A new worker (or an LRU miss) reads the shared directory instead of rendering
+    other = CountingRenderer(samples=100, cache_dir=str(tmp_path))
+    assert other.get(keys[0], None) == repr(keys[0]).encode() and other.renders == 0
+
+def test_sizes_are_rounded_and_the_disk_cache_is_capped(tmp_path):
+    renderer = CountingRenderer(samples=100, cache_dir=str(tmp_path), max_disk_entries=2)
+    assert renderer.key('class-distribution', None, 849, 651, 'png') == \
+        renderer.key('class-distribution', None, 800, 700, 'png')
+
+    keys = [renderer.key('class-distribution', None, width, 600, 'svg') for width in (400, 500, 600)]
+    for i, key in enumerate(keys):
+        renderer.get(key, None)
+        os.utime(tmp_path / f'{renderer.etag(key)}.svg', (i, i))  # Distinct ages, oldest first
+    assert sorted(os.listdir(tmp_path)) == sorted(f'{renderer.etag(k)}.svg' for k in keys[1:])
+
+def test_revalidation_and_missing_dataset(monkeypatch):
+    import app
+    client = app.app.test_client()
+    response = client.get('/charts/class-distribution.svg?w=400&h=300')
+    assert response.status_code == 200 and response.headers['ETag']
+    revalidated = client.get('/charts/class-distribution.svg?w=400&h=300',
+                             headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304 and not revalidated.data
+
+    monkeypatch.setattr(app.chart_renderer, 'dataset_path', 'missing.csv')
+    assert client.get('/charts/class-distribution.svg').status_code == 503
@@ -0,0 +1,30 @@
+# test_cities.py - City names resolve offline: spelling variants, typos, and junk that never goes upstream
+from cities import CityIndex
+
+def test_resolve_and_complete():
+    index = CityIndex.from_env()
+
+    for query in ('London', '  london ', 'LONDON, gb'):
+        assert index.resolve(query)['query'] == 'London,GB', query
+    assert index.resolve('Bombay')['status'] == 'alias' and index.resolve('Bombay')['query'] == 'Mumbai,IN'
+    assert index.resolve('münchen')['query'] == index.resolve('Munich')['query'] == 'Munich,DE'
+    assert index.resolve('Portland, US')['query'] == 'Portland,US'
+
+    # A typo is only a suggestion: "Nome" is a real city one edit from "Rome"
+    for query, suggestion in (('Londn', 'London, GB'), ('Nome', 'Rome, IT')):
+        resolution = index.resolve(query)
+        assert resolution['status'] == 'fuzzy' and resolution['query'] == query and not resolution['rejected']
+        assert suggestion in [s['label'] for s in resolution['suggestions']]
+
+    for junk in ('', '12345', '<script>', 'x' * 90):
+        resolution = index.resolve(junk)
+        assert resolution['status'] == 'invalid' and resolution['rejected'], junk
+
+    # Off-list names and non-code qualifiers go upstream as typed unless the index is strict
+    assert index.resolve('Smallville')['query'] == 'Smallville'
+    assert index.resolve('Paris, France')['query'] == 'Paris, France'
+    index.strict = True
+    assert index.resolve('Smallville')['rejected'] and index.resolve('Nome')['rejected']
+
+    labels = [city['label'] for city in index.complete('lon')]
+    assert labels[0] == 'London, GB' and len(labels) <= 8
@@ -0,0 +1,22 @@
+# test_early_exit.py - Exact early exit never changes the forest's label
+import numpy as np
+from data_generator import generate_weather_data
+from model import WeatherPredictor, FEATURES
+
+def test_exact_mode_matches_full_forest():
+    model = WeatherPredictor(backend='random_forest')
+    model.train(generate_weather_data(800))
+    X = generate_weather_data(3000)[FEATURES].to_numpy()
+
+    full_labels, _ = model.predict_batch(X)
+    labels, proba, trees_used = model.early_exit_forest().predict(X, 'exact')
+    assert (labels == full_labels).all()
+    assert trees_used.mean() < len(model.model.estimators_)
+    assert np.allclose(proba.sum(axis=1), 1)
+
+    approx_labels, _, approx_used = model.early_exit_forest().predict(X, 'approx', delta=0.05)
+    assert approx_used.mean() <= trees_used.mean()
+    assert np.mean(approx_labels == full_labels) > 0.98
+
+    prediction, probabilities, used = model.predict_early(*X[0])
+    assert prediction == full_labels[0] and 0 < used <= len(model.model.estimators_)
@@ -0,0 +1,40 @@
+# test_evaluation.py - Streaming metrics must match the in-memory sklearn metrics
+import numpy as np
+import pytest
+from sklearn.metrics import accuracy_score, log_loss, precision_recall_fscore_support
+from data_generator import generate_weather_data
+from model import WeatherPredictor, FEATURES
+from evaluation import StreamingEvaluator, evaluate_stream
+
+def test_chunked_evaluation_matches_sklearn():
+    model = WeatherPredictor()
+    model.train(generate_weather_data(800))
+    df = generate_weather_data(1500)
+
+    chunks = (df.iloc[i:i + 256] for i in range(0, len(df), 256))
+    results = evaluate_stream(model, chunks)
+
+    y_pred, proba = model.predict_batch(df)
+    y_true = df['weather_condition']
+    precision, recall, f1, support = precision_recall_fscore_support(
+        y_true, y_pred, labels=model.model.classes_, zero_division=0
+    )
+    assert results['n'] == len(df)
+    assert results['accuracy'] == pytest.approx(accuracy_score(y_true, y_pred))
+    assert results['log_loss'] == pytest.approx(log_loss(y_true, np.clip(proba, 1e-15, 1), labels=model.model.classes_))
+    assert np.allclose(results['per_class']['precision'], precision)
+    assert np.allclose(results['per_class']['recall'], recall)
+    assert np.allclose(results['per_class']['f1'], f1)
+    assert list(results['per_class']['support']) == list(support)
+
+def test_merged_shards_equal_single_pass():
+    classes = ['a', 'b']
+    proba = np.array([[0.9, 0.1], [0.2, 0.8], [0.6, 0.4]])
+    whole = StreamingEvaluator(classes).update(['a', 'b', 'b'], proba)
+    left = StreamingEvaluator(classes).update(['a'], proba[:1])
+    right = StreamingEvaluator(classes).update(['b', 'b'], proba[1:])
+    assert (left.merge(right).confusion == whole.confusion).all()
+
+def test_unknown_label_rejected():
+    with pytest.raises(ValueError):
+        StreamingEvaluator(['a', 'b']).update(['c'], np.array([[0.5, 0.5]]))
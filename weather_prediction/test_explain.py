@@ -0,0 +1,19 @@
+# test_explain.py - Contributions add up to exactly what the forest predicts
+import numpy as np
+from data_generator import generate_weather_data
+from model import WeatherPredictor, FEATURES
+
+def test_contributions_sum_to_forest_probabilities():
+    model = WeatherPredictor(backend='random_forest')
+    model.train(generate_weather_data(800))
+    X = generate_weather_data(500)[FEATURES]
+
+    labels, probabilities, contributions = model.explain_batch(X)
+    expected_labels, expected = model.predict_batch(X)
+    assert contributions.shape == (500, len(FEATURES), len(model.model.classes_))
+    assert np.allclose(probabilities, expected)
+    assert (labels == expected_labels).all()
+
+    prediction, probs, explanation = model.predict_explained(*X.iloc[0])
+    assert prediction == expected_labels[0]
+    assert abs(explanation['bias'] + sum(explanation['contributions'].values()) - probs[prediction]) < 1e-9
@@ -0,0 +1,38 @@
+# test_grids.py - Regional grids match per-cell predictions and reuse cached tiles
+import io
+import numpy as np
+from backends import SimpleFallbackModel
+from grids import GridPredictor, StationField
+from model import FEATURES
+
+def test_grid_predictions_and_tile_cache():
+    model = SimpleFallbackModel()
+    grids = GridPredictor(tile_size=16)
+    window = grids.window('-10,35,10,50', 0.5)
+    assert grids.bounds(window) == (-10, 35, 10, 50)
+    shape = (window.r1 - window.r0, window.c1 - window.c0)
+
+    rng = np.random.default_rng(0)
+    fields = {'temperature': rng.uniform(0, 35, shape), 'humidity': rng.uniform(30, 95, shape),
+              'pressure': np.full(shape, 1010.0), 'wind_speed': np.full(shape, 10.0),
+              'cloud_cover': rng.uniform(0, 100, shape)}
+    buffer = io.BytesIO()
+    np.savez(buffer, **fields)
+    fields = grids.load_fields(buffer.getvalue(), window)
+
+    class_ids, confidence, info = grids.predict(window, model, 'v1', fields)
+    X = np.stack([fields[f].ravel() for f in FEATURES], axis=1)
+    labels, probabilities = model.predict_batch(X)
+    assert (model.rules.classes_[class_ids.ravel()] == labels).all()
+    assert (confidence.ravel() == np.round(probabilities.max(axis=1) * 255)).all()
+    assert info['tiles_computed'] == info['tiles'] == 6
+
+    # Same inputs: every tile from cache; a new model version recomputes
+    assert grids.predict(window, model, 'v1', fields)[2]['tiles_computed'] == 0
+    assert grids.predict(window, model, 'v2', fields)[2]['tiles_computed'] == 6
+
+def test_station_interpolation():
+    stations = StationField([50.0, 40.0], [0.0, 10.0], [[1.0, 10.0], [3.0, 30.0]])
+    values = stations.interpolate(np.array([50.0, 45.0, 40.0]), np.array([0.0, 5.0, 10.0]))
+    assert np.allclose(values[0], [1, 10]) and np.allclose(values[2], [3, 30])
+    assert 1 < values[1, 0] < 3
@@ -0,0 +1,54 @@
+# test_inference.py - Late or overloaded predictions fall back to the rules on time
+import threading
+import time
+import pytest
+from backends import SimpleFallbackModel
+from inference import DeadlineInference, request_budget
+
+class SlowModel:
+    def __init__(self, delay):
+        self.delay = delay
+        self.release = threading.Event()
+
+    def predict(self, *features):
+        self.release.wait(self.delay)
+        return 'Sunny', {'Sunny': 1.0}
+
+FEATURES = (20, 90, 1000, 5, 90)
+
+def test_fast_model_answers():
+    assert DeadlineInference().predict(SlowModel(0).predict, FEATURES, 1.0) == (('Sunny', {'Sunny': 1.0}), None)
+
+def test_deadline_miss_uses_fallback():
+    model = SlowModel(5)
+    start = time.perf_counter()
+    result, reason = DeadlineInference().predict(model.predict, FEATURES, 0.05)
+    assert time.perf_counter() - start < 1
+    assert (result, reason) == (SimpleFallbackModel().predict(*FEATURES), 'deadline')
+    model.release.set()
+
+def test_overload_and_budget():
+    inference = DeadlineInference(workers=1, max_pending=1)
+    model = SlowModel(5)
+    inference.predict(model.predict, FEATURES, 0.01)  # Abandoned, but still holds the only slot
+    assert inference.predict(SlowModel(0).predict, FEATURES, 1.0)[1] == 'overloaded'
+    model.release.set()
+
+    assert request_budget('100', None, 250, 0.02) == pytest.approx(0.08)
+    assert request_budget(None, 'bad', 250, 0) == 0.25
+    assert request_budget(None, None, 0, 0) is None
+
+def test_busy_worker_is_not_overloaded(monkeypatch):
+    # More concurrent requests than the old fixed limit of 8, with a model that keeps up
+    monkeypatch.setenv('WEB_THREADS', '24')
+    inference = DeadlineInference.from_env()
+    assert inference.max_pending == 24
+    model = SlowModel(0.02)
+    reasons = []
+    callers = [threading.Thread(target=lambda: reasons.append(inference.predict(model.predict, FEATURES, 5.0)[1]))
+               for _ in range(20)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+    assert reasons == [None] * 20
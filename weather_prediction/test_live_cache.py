@@ -0,0 +1,33 @@
+# test_live_cache.py - The SQLite cache is shared by processes, expires entries and compacts itself
+import multiprocessing
+import time
+from live_cache import SharedLiveCache
+
+def _writer(path, worker):
+    cache = SharedLiveCache(path, ttl=60, compact_interval=0)
+    for i in range(200):
+        cache.put(f'city-{i % 20}', {'weather': {'worker': worker, 'i': i}})
+        assert cache.get(f'city-{i % 20}') is not None
+
+def test_shared_across_processes_with_claims_and_compaction(tmp_path):
+    path = str(tmp_path / 'live.sqlite3')
+    processes = [multiprocessing.get_context('fork').Process(target=_writer, args=(path, w)) for w in range(4)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+    assert all(p.exitcode == 0 for p in processes)
+
+    # A new "worker" starts warm
+    cache = SharedLiveCache(path, ttl=60, max_entries=10, compact_interval=0)
+    assert len(cache) == 20 and cache.get('city-3')['weather']['i'] % 20 == 3
+    assert 55 < cache.expires_in('city-3') <= 60
+
+    # One claim per lease, whichever process asks
+    other = SharedLiveCache(path, ttl=60, compact_interval=0)
+    assert cache.claim('city-3', lease=30) and not other.claim('city-3', lease=30)
+
+    # Expired entries are invisible, then compacted away along with the overflow
+    cache.put('stale', {'weather': {}, 'fetched_at': time.time() - 120})
+    assert cache.get('stale') is None
+    assert cache.compact() == 11 and len(other) == 10
@@ -0,0 +1,33 @@
+# test_live_stream.py - One upstream poll per city, however many subscribers; slow ones are cut off
+import json
+import threading
+from live_stream import StreamHub
+
+def test_hub_polls_each_city_once_and_sheds_slow_subscribers():
+    calls = []
+    polled = threading.Event()
+    def observe(city):
+        calls.append(city)
+        polled.set()
+        return {'success': True, 'city': city}, {'prediction': 'Clear'}
+
+    hub = StreamHub(observe, interval=3600, queue_size=2, max_drops=3,
+                    max_subscribers=20)
+    first = hub.subscribe(['London'])
+    assert polled.wait(5)
+    event = json.loads(first.next(timeout=5))
+    assert event['city'] == 'london' and event['prediction'] == {'prediction': 'Clear'}
+
+    # Later subscribers get the latest event without another upstream call
+    others = [hub.subscribe([' london ']) for _ in range(10)]
+    assert all(json.loads(s.next(timeout=1))['city'] == 'london' for s in others)
+    assert calls == ['london']
+
+    # A subscriber that never reads keeps only the newest events, then gets closed
+    for i in range(5):
+        first.offer(f'event {i}')
+    assert first.closed and first.next(timeout=0) == 'event 3'
+
+    for subscription in [first] + others:
+        hub.unsubscribe(subscription)
+    assert hub.subscriber_count() == 0 and not hub._next_poll
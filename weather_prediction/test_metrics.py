@@ -0,0 +1,74 @@
+# test_metrics.py - Prometheus text output and merging of per-worker snapshots
+import json
+import os
+import subprocess
+import sys
+from metrics import Metrics
+
+def _registry(directory=None):
+    m = Metrics(directory)
+    m.counter('requests_total', 'Requests')
+    m.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    m.gauge('inflight', 'In flight')
+    return m
+
+def test_render():
+    m = _registry()
+    m.inc('requests_total', {'route': '/predict', 'status': '200'})
+    m.inc('requests_total', {'status': '200', 'route': '/predict'}, 2)  # Label order doesn't matter
+    m.inc('requests_total', {'route': 'say "hi"\n'})
+    for value in (0.05, 0.5, 5):
+        m.observe('latency_seconds', value)
+    m.add_gauge('inflight', 2)
+    m.add_gauge('inflight', -1)
+
+    lines = m.render().splitlines()
+    assert '# TYPE requests_total counter' in lines
+    assert 'requests_total{route="/predict",status="200"} 3' in lines
+    assert 'requests_total{route="say \\"hi\\"\\n"} 1' in lines
+    assert lines[lines.index('# TYPE latency_seconds histogram') + 1:][:5] == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        'latency_seconds_sum 5.55',
+        'latency_seconds_count 3',
+    ]
+    assert 'inflight 1' in lines
+
+def test_merge_worker_snapshots(tmp_path):
+    m = _registry(str(tmp_path))
+    m.inc('requests_total', {'route': '/'}, 2)
+    m.observe('latency_seconds', 0.5)
+    m.set_gauge('inflight', 1)
+
+    # Another worker's snapshot, from a process that has since exited
+    exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+    exited.wait()
+    other = _registry()
+    other.inc('requests_total', {'route': '/'}, 3)
+    other.observe('latency_seconds', 0.05)
+    other.set_gauge('inflight', 5)
+    snapshot = dict(other.snapshot(), pid=exited.pid)
+    with open(os.path.join(tmp_path, f'metrics_{exited.pid}.json'), 'w') as f:
+        json.dump(snapshot, f)
+
+    lines = m.render().splitlines()
+    assert 'requests_total{route="/"} 5' in lines  # Counters keep an exited worker's totals
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines and 'latency_seconds_count 2' in lines
+    assert 'inflight 1' in lines  # Gauges only count live workers
+
+def test_reused_pid_keeps_the_dead_workers_totals(tmp_path):
+    # A dead worker that had this process's pid, flushed under its own token
+    dead = _registry()
+    dead.inc('requests_total', {'route': '/'}, 4)
+    dead.set_gauge('inflight', 7)
+    snapshot = dict(dead.snapshot(), token='deadworker', started=0)
+    with open(os.path.join(tmp_path, f'metrics_{os.getpid()}_deadworker.json'), 'w') as f:
+        json.dump(snapshot, f)
+
+    m = _registry(str(tmp_path))
+    m.inc('requests_total', {'route': '/'})
+    m.set_gauge('inflight', 1)
+    lines = m.render().splitlines()
+    assert 'requests_total{route="/"} 5' in lines and 'inflight 1' in lines
+    assert len(os.listdir(tmp_path)) == 2  # Flushing didn't overwrite the dead worker's file
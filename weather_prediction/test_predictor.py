@@ -0,0 +1,27 @@
+# test_predictor.py - Batch scoring through the process pool keeps the input order
+import pickle
+import numpy as np
+import pandas as pd
+from data_generator import generate_weather_data
+from model import WeatherPredictor, FEATURES
+from predictor import BatchPredictor
+
+def test_batch_scoring_matches_predict_batch(tmp_path):
+    model = WeatherPredictor(backend='random_forest')
+    model.train(generate_weather_data(500))
+    with open(tmp_path / 'model.pkl', 'wb') as f:
+        pickle.dump(model, f)
+
+    df = generate_weather_data(2500)
+    df['station'] = np.arange(len(df))
+    df.to_csv(tmp_path / 'obs.csv', index=False)
+
+    batch = BatchPredictor(str(tmp_path / 'model.pkl'), workers=2, chunksize=300)
+    stats = batch.score(str(tmp_path / 'obs.csv'), str(tmp_path / 'out.csv'), keep=['station'])
+    out = pd.read_csv(tmp_path / 'out.csv')
+
+    labels, probabilities = model.predict_batch(df[FEATURES])
+    assert stats['rows'] == len(df)
+    assert (out['station'] == df['station']).all()
+    assert (out['prediction'] == labels).all()
+    assert np.allclose(out[[f'prob_{c}' for c in model.model.classes_]], probabilities)
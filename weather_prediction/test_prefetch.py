@@ -0,0 +1,50 @@
+# test_prefetch.py - Heavy hitters are found, and refreshes stay within the upstream budget
+import random
+from live_cache import LiveWeatherCache, SharedLiveCache
+from prefetch import SpaceSaving, Prefetcher
+
+def test_space_saving_keeps_heavy_hitters():
+    rng = random.Random(0)
+    sketch = SpaceSaving(capacity=16)
+    stream = ['london'] * 500 + ['paris'] * 300 + ['tokyo'] * 200 + [f'town-{rng.randrange(5000)}' for _ in range(3000)]
+    rng.shuffle(stream)
+    for city in stream:
+        sketch.add(city)
+    assert [key for key, _, _ in sketch.top(3)] == ['london', 'paris', 'tokyo']
+    assert len(sketch.counts) == 16
+
+def test_prefetcher_refreshes_top_cities_within_budget():
+    cache = LiveWeatherCache(ttl=300)
+    refreshed = []
+    def refresh(key):
+        refreshed.append(key)
+        if key == 'atlantis':
+            return False
+        cache.put(key, {'city': key})
+        return True
+
+    prefetcher = Prefetcher(refresh, cache, top_n=3, lead=30, budget=2)
+    for city, hits in [('london', 5), ('paris', 4), ('atlantis', 3), ('rome', 1)]:
+        for _ in range(hits):
+            prefetcher.record(city)
+
+    assert prefetcher.run_once() == 2 and refreshed == ['london', 'paris']
+    assert prefetcher.due() == ['atlantis']  # Warm entries aren't due until `lead` before expiry
+    cache.return_token(2)  # Instead of waiting for the refill
+    prefetcher.run_once()
+    assert refreshed[-1] == 'atlantis' and prefetcher.due() == []  # Failed, so backed off
+
+def test_workers_sharing_a_cache_share_the_budget(tmp_path):
+    path = str(tmp_path / 'live.sqlite3')
+    refreshed = []
+    first, second = (Prefetcher(lambda key: refreshed.append(key) or True, SharedLiveCache(path, compact_interval=0),
+                                budget=2) for _ in range(2))
+    for prefetcher in (first, second):
+        for city in ('london', 'paris', 'rome'):
+            prefetcher.record(city)
+
+    # Another worker is already refreshing London: its token goes back for Paris and Rome
+    assert first.cache.claim('london', lease=30)
+    assert first.run_once() == 2 and sorted(refreshed) == ['paris', 'rome']
+    # Two workers, but one budget of 2 per minute between them
+    assert second.run_once() == 0 and len(refreshed) == 2
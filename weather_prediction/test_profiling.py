@@ -0,0 +1,46 @@
+# test_profiling.py - Server-Timing stages and token-gated cProfile capture on the Flask app
+import cProfile
+import sys
+import pytest
+from profiling import RequestProfiler
+
+PAYLOAD = {'temperature': 20, 'humidity': 60, 'pressure': 1013, 'wind_speed': 5, 'cloud_cover': 50}
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    import app
+    monkeypatch.setattr(app, 'request_profiler', RequestProfiler(0, 'secret', str(tmp_path)))
+    return app.app.test_client()
+
+def test_server_timing_lists_predict_stages(client):
+    response = client.post('/predict', json=PAYLOAD)
+    assert response.status_code == 200
+    stages = [part.split(';')[0] for part in response.headers['Server-Timing'].split(', ')]
+    assert stages[-1] == 'total'
+    assert {'parse', 'validation', 'inference', 'serialize'} <= set(stages)
+
+def test_only_the_debug_token_profiles(client, tmp_path):
+    for token in ('wrong', 'sécret'):  # Non-ASCII must be a mismatch, not a TypeError
+        response = client.post('/predict', json=PAYLOAD, headers={'X-Debug-Profile': token})
+        assert response.status_code == 200 and 'X-Profile-File' not in response.headers
+    assert not list(tmp_path.iterdir())
+
+    response = client.post('/predict', json=PAYLOAD, headers={'X-Debug-Profile': 'secret'})
+    assert (tmp_path / response.headers['X-Profile-File']).stat().st_size > 0
+    assert sys.getprofile() is None
+
+def test_profiler_stops_when_the_view_raises(client, monkeypatch, tmp_path):
+    import app
+    def broken():
+        raise RuntimeError("scrape failed")
+    monkeypatch.setattr(app.metrics, 'render', broken)
+    monkeypatch.setitem(app.app.config, 'PROPAGATE_EXCEPTIONS', True)  # Skips after_request
+
+    with pytest.raises(RuntimeError):
+        client.get('/metrics', headers={'X-Debug-Profile': 'secret'})
+    # teardown_request wrote the profile and released the thread for the next profiler
+    assert len(list(tmp_path.glob('*_metrics_*.prof'))) == 1
+    assert sys.getprofile() is None
+    profile = cProfile.Profile()
+    profile.enable()
+    profile.disable()
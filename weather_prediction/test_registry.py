@@ -0,0 +1,49 @@
+# test_registry.py - Versions are published, activated and rolled back, and workers hot-swap to them
+import json
+import os
+import pickle
+import pytest
+from data_generator import generate_weather_data
+from model import WeatherPredictor, FEATURES
+from registry import ModelRegistry, RegistryWatcher
+
+def _artifact(tmp_path, name, n_estimators):
+    model = WeatherPredictor(n_estimators=n_estimators, random_state=0)
+    model.train(generate_weather_data(300))
+    path = tmp_path / f'{name}.pkl'
+    with open(path, 'wb') as f:
+        pickle.dump(model, f)
+    return str(path)
+
+def test_publish_activate_rollback_and_hot_swap(tmp_path):
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    first = registry.publish(_artifact(tmp_path, 'a', 5), 'v1', activate=True)
+    second = registry.publish(_artifact(tmp_path, 'b', 7), 'v2')
+    assert [v['version'] for v in registry.list_versions()] == ['v1', 'v2']
+    # Publishing records permutation importance, computed on the artifact's holdout split
+    assert set(registry.list_versions()[0]['permutation_importance']) == set(FEATURES)
+    assert registry.active_version() == first
+    with pytest.raises(ValueError):
+        registry.publish(_artifact(tmp_path, 'c', 5), 'v1')  # Versions are immutable
+
+    swaps = []
+    watcher = RegistryWatcher(registry, lambda model, version: swaps.append((model, version)),
+                              current_version=first)
+    assert not watcher.check_once()
+
+    # ACTIVE is replaced in one rename: always valid JSON, no temp files left behind
+    registry.activate(second)
+    assert sorted(os.listdir(registry.root)) == ['ACTIVE', 'versions']
+    with open(registry.pointer_path) as f:
+        assert json.load(f)['history'] == ['v1']
+
+    # The watcher hands over a loaded model with its per-tree tables already built
+    assert watcher.check_once()
+    model, version = swaps[-1]
+    assert version == 'v2' and len(model.model.estimators_) == 7
+    assert '_early_exit' in model.__dict__ and '_explainer' in model.__dict__
+
+    assert registry.rollback() == 'v1' and registry.active_version() == 'v1'
+    assert watcher.check_once() and swaps[-1][1] == 'v1'
+    with pytest.raises(ValueError):
+        registry.rollback()
@@ -0,0 +1,63 @@
+# test_replay.py - Captured traffic rotates into valid JSON lines and replays with matching statuses
+import glob
+import json
+import os
+import time
+from capture import TrafficCapture, read_capture
+from loadtest import summarize
+from replay import replay, compare_runs
+
+PAYLOAD = {'temperature': 20, 'humidity': 60, 'pressure': 1013, 'wind_speed': 5, 'cloud_cover': 50}
+
+class ClientSession:
+    """The slice of requests.Session that replay.send uses, backed by the Flask test client"""
+    def __init__(self):
+        import app
+        self.client = app.app.test_client()
+
+    def post(self, url, json=None, timeout=None):
+        return self.client.post(url, json=json)
+
+    def get(self, url, params=None, timeout=None):
+        return self.client.get(url, query_string=params)
+
+def test_capture_rotate_and_replay(tmp_path, monkeypatch):
+    import app
+    monkeypatch.setenv('TRAFFIC_CAPTURE_DIR', str(tmp_path))
+    monkeypatch.setenv('TRAFFIC_CAPTURE_RATE', '1')
+    monkeypatch.setenv('TRAFFIC_CAPTURE_MAX_BYTES', '400')
+    capture = TrafficCapture.from_env()
+    capture.backups = 100  # Keep every rotated file, so nothing captured is lost
+    monkeypatch.setattr(app, 'traffic_capture', capture)
+
+    client = app.app.test_client()
+    bad = {k: v for k, v in PAYLOAD.items() if k != 'cloud_cover'}
+    for i in range(30):
+        client.post('/predict', json=bad if i % 10 == 0 else dict(PAYLOAD, temperature=i))
+        time.sleep(0.002)  # Let the writer flush between requests, so files rotate
+
+    paths = sorted(glob.glob(os.path.join(str(tmp_path), 'capture-*.jsonl*')))
+    deadline = time.time() + 5
+    while len(read_capture(paths)) < 30 and time.time() < deadline:
+        time.sleep(0.05)
+        paths = sorted(glob.glob(os.path.join(str(tmp_path), 'capture-*.jsonl*')))
+    assert len(paths) > 1 and capture.dropped == 0
+    for path in paths:
+        with open(path) as f:
+            assert all(json.loads(line)['r'] == 'predict' for line in f)
+    records = read_capture(paths)
+    assert len(records) == 30 and [r['s'] for r in records].count(400) == 3
+    assert records[1]['b'] == [1, 60, 1013, 5, 50]
+
+    # Replaying at 50x keeps the spacing (a few ms) and reproduces every captured status
+    monkeypatch.setattr(app, 'traffic_capture', None)
+    results, elapsed = replay(records, '', speed=50, concurrency=4, session_factory=ClientSession)
+    assert elapsed >= (records[-1]['t'] - records[0]['t']) / 50
+    summary = summarize(results, elapsed)
+    assert summary['predict']['requests'] == summary['overall']['requests'] == 30
+    assert summary['predict']['error_rate'] == 0
+
+    assert compare_runs(summary, summary) == []
+    slower = {'predict': dict(summary['predict'], p99_ms=summary['predict']['p99_ms'] * 2)}
+    assert compare_runs(slower, summary) == [('predict', 'p99_ms', summary['predict']['p99_ms'],
+                                              slower['predict']['p99_ms'])]
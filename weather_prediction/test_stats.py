@@ -0,0 +1,30 @@
+# test_stats.py - Chunked and merged statistics match pandas over the whole frame
+import numpy as np
+import pytest
+from data_generator import generate_weather_data
+from stats import RunningStats, summarize_frame, FEATURES
+
+def test_chunks_and_shards_match_pandas():
+    df = generate_weather_data(5000)
+    stats = summarize_frame(df, chunk_rows=700)
+    assert stats.n == len(df)
+    assert np.allclose(stats.mean, df[FEATURES].mean())
+    assert np.allclose(stats.variance(), df[FEATURES].var())
+    assert np.allclose(stats.correlation(), df[FEATURES].corr())
+    assert stats.class_counts == df['weather_condition'].value_counts().to_dict()
+
+    # Two shards summarised separately, shipped as dicts and merged
+    left = summarize_frame(df.iloc[:1800])
+    right = RunningStats.from_dict(summarize_frame(df.iloc[1800:]).to_dict())
+    merged = left.merge(right)
+    assert np.allclose(merged.comoment, stats.comoment)
+    assert (merged.min == stats.min).all() and (merged.max == stats.max).all()
+    for cls, columns in stats.histograms.items():
+        for column, counts in columns.items():
+            assert (merged.histograms[cls][column] == counts).all()
+
+def test_merge_rejects_different_edges():
+    df = generate_weather_data(500)
+    coarse = {f: np.linspace(0, 100, 11) for f in FEATURES}
+    with pytest.raises(ValueError):
+        RunningStats().update(df).merge(RunningStats(edges=coarse).update(df))
@@ -0,0 +1,42 @@
+# test_structured_logging.py - JSON lines with extras, DEBUG sampling, per-template rate limits, flush on stop
+import io
+import json
+import logging
+import pytest
+import structured_logging
+from structured_logging import configure_logging, get_logger, _stop_listener
+
+@pytest.fixture
+def stream(monkeypatch):
+    """A fresh logging setup writing to a StringIO; the process's own setup is put back after"""
+    root = logging.getLogger('weather')
+    saved = list(root.handlers), root.level, root.propagate
+    monkeypatch.setattr(structured_logging, '_state', {'pid': None, 'listener': None, 'handler': None})
+    output = io.StringIO()
+    yield output
+    _stop_listener(structured_logging._state['listener'])
+    root.handlers[:], root.level, root.propagate = saved
+
+def test_json_sampling_rate_limit_and_flush(stream):
+    configure_logging(level='DEBUG', fmt='json', sample_rate=0, rate_limit=5, stream=stream)
+    log = get_logger('test')
+
+    log.info("Prediction served", extra={'city': 'Paris', 'latency_ms': 1.5})
+    log.debug("Sampled out")
+    log.debug("Always kept", extra={'sample': 1})
+    for i in range(50):
+        log.info("Tick %d", i)
+    log.warning("Warnings are never limited")
+    listener = structured_logging._state['listener']
+    _stop_listener(listener)  # Drains the queue before returning
+    _stop_listener(listener)
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    first = lines[0]
+    assert first['level'] == 'INFO' and first['logger'] == 'weather.test' and first['msg'] == "Prediction served"
+    assert first['city'] == 'Paris' and first['latency_ms'] == 1.5 and isinstance(first['ts'], float)
+    messages = [line['msg'] for line in lines]
+    assert "Sampled out" not in messages and "Always kept" in messages
+    ticks = [m for m in messages if m.startswith('Tick')]
+    assert ticks[:5] == [f'Tick {i}' for i in range(5)] and len(ticks) <= 6  # Burst of 5, maybe one refill
+    assert messages[-1] == "Warnings are never limited"
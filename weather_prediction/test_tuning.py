@@ -0,0 +1,40 @@
+# test_tuning.py - Successive halving keeps 1/eta per rung, resumes from its cache and refits the winner
+import os
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from data_generator import generate_weather_data
+from tuning import successive_halving, rank_candidates, export_best, _aligned_proba
+
+def test_successive_halving_rungs_and_refit(tmp_path):
+    df = generate_weather_data(600)
+    cache_dir = str(tmp_path / 'cache')
+    backend, trials = successive_halving(df, 'random_forest', n_candidates=9, eta=3, n_splits=2,
+                                         workers=2, cache_dir=cache_dir)
+
+    rungs = [[t for t in trials if t['rung'] == rung] for rung in range(3)]
+    assert [len(r) for r in rungs] == [9, 3, 1]
+    assert [r[0]['budget'] for r in rungs] == [50, 150, 300]  # The last rung uses every training row
+    promoted = {t['candidate'] for t in rungs[0] if t['rank'] <= 3}
+    assert {t['candidate'] for t in rungs[1]} == promoted
+
+    # A rerun is answered from the trial cache
+    _, again = successive_halving(df, 'random_forest', n_candidates=9, eta=3, n_splits=2,
+                                  workers=2, cache_dir=cache_dir)
+    assert all(t['cached'] for t in again)
+
+    best = rank_candidates(trials)[0]
+    assert best['rung'] == 2
+    model = export_best(df, backend, trials, str(tmp_path / 'tuned.pkl'))
+    assert model.is_trained and model.params == best['params']
+    assert os.path.exists(tmp_path / 'tuned.pkl') and os.path.exists(tmp_path / 'tuned_search.json')
+
+def test_aligned_proba_maps_columns_by_label():
+    X = np.array([[0.0], [1.0], [2.0]])
+    estimator = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, ['Rainy', 'Sunny', 'Sunny'])
+    proba = _aligned_proba(estimator, X, np.array(['Cloudy', 'Rainy', 'Snowy', 'Sunny']))
+    assert np.allclose(proba[:, [0, 2]], 0) and np.allclose(proba.sum(axis=1), 1)
+    assert proba[0, 1] > proba[0, 3]
+
+    with pytest.raises(ValueError):
+        _aligned_proba(estimator, X, np.array(['Cloudy', 'Sunny']))
@@ -0,0 +1,36 @@
+# test_visualizer.py - Aggregated plots are drawn from summaries that match the raw data
+import numpy as np
+from sklearn.preprocessing import LabelEncoder
+from data_generator import generate_weather_data
+from visualizer import distribution_summary, stratified_sample
+
+def test_summary_matches_raw_frame():
+    df = generate_weather_data(3000)
+    summary = distribution_summary(df, chunk_rows=700)
+
+    numeric = df.assign(weather_condition_encoded=LabelEncoder().fit_transform(df['weather_condition']))
+    assert np.allclose(summary['correlation'].to_numpy(), numeric.select_dtypes('number').corr().to_numpy())
+
+    medians = df.groupby('weather_condition')['humidity'].median()
+    step = (df['humidity'].max() - df['humidity'].min()) / 512
+    for box in summary['boxplots']['humidity']:
+        assert abs(box['med'] - medians[box['label']]) < 2 * step
+    assert summary['class_counts'] == df['weather_condition'].value_counts().to_dict()
+
+def test_histograms_when_bins_do_not_divide_resolution():
+    df = generate_weather_data(3000).sort_values('temperature', ignore_index=True)
+    summary = distribution_summary(df, bins=30, chunk_rows=500)
+
+    temperature = summary['histograms'][:, 0]
+    assert temperature.shape == (len(summary['classes']), 30)
+    assert temperature.sum(axis=1).tolist() == [summary['class_counts'][cls] for cls in summary['classes']]
+    edges = summary['bin_edges'][0]
+    assert edges[0] == df['temperature'].min() and edges[-1] == df['temperature'].max()
+    expected, _ = np.histogram(df['temperature'], bins=edges)
+    assert np.abs(temperature.sum(axis=0) - expected).sum() <= 0.05 * len(df)
+
+def test_stratified_sample_keeps_every_class():
+    df = generate_weather_data(3000)
+    sample = stratified_sample(df, 300)
+    assert 250 <= len(sample) <= 350
+    assert set(sample['weather_condition']) == set(df['weather_condition'])
@@ -1,10 +1,13 @@
 # train_and_save_model.py
+import argparse
 import pickle
 import os
 from data_generator import generate_weather_data
 from model import WeatherPredictor
+from backends import available_backends, get_backend_name
 
-def train_and_save_model():
+def train_and_save_model(backend=None, model_path='models/weather_model.pkl', permutation_repeats=5,
+                         permutation_max_samples=2000):
     """Train the model and save it to disk"""
     print("="*60)
     print("🚀 TRAINING AND SAVING WEATHER PREDICTION MODEL")
@@ -18,25 +21,39 @@ def train_and_save_model():
         
         # Create and train model
         print("Step 2: Creating and training model...")
-        model = WeatherPredictor()
-        results = model.train(df)
+        model = WeatherPredictor(backend=backend)
+        print(f"   Backend: {model.backend}")
+        results = model.train(df, permutation_repeats=permutation_repeats,
+                              permutation_max_samples=permutation_max_samples)
         print(f"✅ Model trained with {results['accuracy']:.1%} accuracy")
         
         # Create models directory if it doesn't exist
-        if not os.path.exists('models'):
-            os.makedirs('models')
+        model_dir = os.path.dirname(model_path)
+        if model_dir and not os.path.exists(model_dir):
+            os.makedirs(model_dir)
         
         # Save the trained model
-        model_path = 'models/weather_model.pkl'
         with open(model_path, 'wb') as f:
             pickle.dump(model, f)
         
         print(f"✅ Model saved to: {model_path}")
         
+        # The first artifact at a path becomes the regression gate's baseline
+        from gate import thresholds_path, measure_artifact, write_thresholds
+        if not os.path.exists(thresholds_path(model_path)):
+            path = write_thresholds(model_path, measure_artifact(model_path))
+            print(f"✅ Gate thresholds written to: {path}")
+        else:
+            print("   Check it against the regression gate: python test_model.py")
+        
         # Print model performance
         print("\n📊 MODEL PERFORMANCE:")
         print(f"   Accuracy: {results['accuracy']:.1%}")
         print(f"   Classes: {list(model.model.classes_)}")
+        if results['permutation_importance'] is not None:
+            print("   Permutation importance (accuracy drop):")
+            for row in results['permutation_importance'].itertuples():
+                print(f"     {row.feature:<12} {row.importance:.3f} ± {row.importance_std:.3f}")
         
         print("\n🎉 MODEL TRAINING COMPLETE!")
         print("   You can now run your Flask app with the pre-trained model.")
@@ -49,7 +66,18 @@ def train_and_save_model():
         return False
 
 if __name__ == "__main__":
-    success = train_and_save_model()
+    parser = argparse.ArgumentParser(description="Train and save the weather prediction model")
+    parser.add_argument('--backend', choices=available_backends(), default=get_backend_name(),
+                        help="Model backend (default: WEATHER_MODEL_BACKEND or random_forest)")
+    parser.add_argument('--output', default='models/weather_model.pkl', help="Where to save the model")
+    parser.add_argument('--permutation-repeats', type=int, default=5,
+                        help="Shuffles per feature for permutation importance (0 to skip)")
+    parser.add_argument('--permutation-max-samples', type=int, default=2000,
+                        help="Holdout rows used for permutation importance")
+    args = parser.parse_args()
+    
+    success = train_and_save_model(args.backend, args.output, args.permutation_repeats,
+                                   args.permutation_max_samples)
     if not success:
         print("Training failed!")
         exit(1)
\ No newline at end of file
@@ -0,0 +1,223 @@
+#tuning.py
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from backends import BACKENDS, available_backends, create_backend, get_backend_name
+from model import WeatherPredictor, FEATURES
+
+# Read-only data shared with pool workers (set once per worker by _init_worker)
+_SHARED = {}
+
+def _init_worker(X, y, classes, folds):
+    for array in (X, y):
+        array.setflags(write=False)
+    _SHARED.update(X=X, y=y, classes=classes, folds=folds)
+
+def make_folds(y, n_splits=3, seed=42):
+    """Precompute stratified folds; training indices are shuffled so any prefix is a fair subsample"""
+    from sklearn.model_selection import StratifiedKFold
+    rng = np.random.RandomState(seed)
+    folds = []
+    for train_idx, test_idx in StratifiedKFold(n_splits, shuffle=True, random_state=seed).split(np.zeros(len(y)), y):
+        folds.append((rng.permutation(train_idx), test_idx))
+    return folds
+
+def sample_candidates(backend, n_candidates, seed=42):
+    """Draw distinct hyperparameter combinations from the backend's search space"""
+    space = BACKENDS[backend]['param_space']
+    if not space:
+        return [{}]
+    names = sorted(space)
+    grid = list(itertools.product(*(space[n] for n in names)))
+    rng = np.random.RandomState(seed)
+    picks = rng.choice(len(grid), size=min(n_candidates, len(grid)), replace=False)
+    return [dict(zip(names, grid[i])) for i in picks]
+
+def _aligned_proba(estimator, X, classes):
+    """predict_proba with columns for every class, even ones missing from a small budget"""
+    proba = estimator.predict_proba(X)
+    if list(estimator.classes_) == list(classes):
+        return proba
+    column = {label: j for j, label in enumerate(classes)}
+    unknown = [label for label in estimator.classes_ if label not in column]
+    if unknown:
+        raise ValueError(f"Estimator predicts classes the dataset doesn't have: {unknown}")
+    full = np.zeros((len(X), len(classes)))
+    full[:, [column[label] for label in estimator.classes_]] = proba
+    return full
+
+def evaluate_trial(backend, params, budget):
+    """Cross-validate one candidate on the first `budget` training rows of every fold"""
+    X, y, classes = _SHARED['X'], _SHARED['y'], _SHARED['classes']
+    accuracies, losses = [], []
+    start = time.perf_counter()
+    for train_idx, test_idx in _SHARED['folds']:
+        subset = train_idx[:budget]
+        estimator = create_backend(backend, **params).fit(X[subset], y[subset])
+        proba = _aligned_proba(estimator, X[test_idx], classes)
+        truth = np.searchsorted(classes, y[test_idx])
+        accuracies.append(float(np.mean(proba.argmax(axis=1) == truth)))
+        losses.append(float(-np.mean(np.log(np.clip(proba[np.arange(len(truth)), truth], 1e-15, 1)))))
+    return {
+        'accuracy': float(np.mean(accuracies)),
+        'log_loss': float(np.mean(losses)),
+        'fit_seconds': time.perf_counter() - start,
+    }
+
+class TrialCache:
+    """Append-only JSON lines file of finished trials, so interrupted searches resume"""
+    def __init__(self, path):
+        self.path = path
+        self.results = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Partially written line from an interrupted run
+                    self.results[record['key']] = record['result']
+
+    @staticmethod
+    def key(**fields):
+        return hashlib.sha1(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key):
+        return self.results.get(key)
+
+    def put(self, key, result):
+        self.results[key] = result
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({'key': key, 'result': result}) + '\n')
+
+def data_fingerprint(X, y):
+    digest = hashlib.sha1(np.ascontiguousarray(X).tobytes())
+    digest.update('\n'.join(map(str, y)).encode())
+    return digest.hexdigest()
+
+def successive_halving(df, backend=None, n_candidates=27, eta=3, n_splits=3, min_budget=None,
+                       workers=None, cache_dir='models/tuning_cache', seed=42):
+    """Run successive halving and return the backend plus every trial with its per-rung rank"""
+    backend = backend or get_backend_name()
+    X = df[FEATURES].to_numpy(dtype=float)
+    y = df['weather_condition'].to_numpy()
+    classes = np.unique(y)
+    folds = make_folds(y, n_splits, seed)
+    max_budget = min(len(train_idx) for train_idx, _ in folds)
+
+    candidates = sample_candidates(backend, n_candidates, seed)
+    n_rungs = 1
+    while eta ** n_rungs <= len(candidates):
+        n_rungs += 1
+    budget = min_budget or max(50, int(max_budget / eta ** (n_rungs - 1)))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    cache = TrialCache(os.path.join(cache_dir, 'trials.jsonl'))
+    fingerprint = data_fingerprint(X, y)
+
+    trials = []
+    survivors = list(range(len(candidates)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(X, y, classes, folds)) as pool:
+        for rung in range(n_rungs):
+            budget = max_budget if rung == n_rungs - 1 else min(budget, max_budget)
+            rung_trials, pending = {}, {}
+            for i in survivors:
+                key = TrialCache.key(backend=backend, params=candidates[i], budget=budget,
+                                     data=fingerprint, folds=n_splits, seed=seed)
+                cached = cache.get(key)
+                if cached is not None:
+                    rung_trials[i] = dict(cached, cached=True)
+                else:
+                    pending[pool.submit(evaluate_trial, backend, candidates[i], budget)] = (i, key)
+
+            for future in as_completed(pending):
+                i, key = pending[future]
+                result = future.result()
+                cache.put(key, result)
+                rung_trials[i] = dict(result, cached=False)
+
+            ranked = sorted(rung_trials, key=lambda i: (-rung_trials[i]['accuracy'], rung_trials[i]['log_loss']))
+            for rank, i in enumerate(ranked, 1):
+                trials.append(dict(rung_trials[i], rung=rung, rank=rank, budget=budget,
+                                   candidate=i, params=candidates[i]))
+            print(f"Rung {rung}: {len(ranked)} candidates on {budget} rows, "
+                  f"best accuracy {rung_trials[ranked[0]]['accuracy']:.1%} "
+                  f"({sum(t['cached'] for t in rung_trials.values())} from cache)")
+
+            survivors = ranked[:max(1, math.ceil(len(ranked) / eta))]
+            budget *= eta
+
+    return backend, trials
+
+def rank_candidates(trials):
+    """Last trial of every candidate, ordered by how far it got and then by score"""
+    last = {}
+    for t in trials:
+        last[t['candidate']] = t
+    return sorted(last.values(), key=lambda t: (-t['rung'], t['rank']))
+
+def print_report(trials, top=10):
+    print("\n" + "="*80)
+    print("HYPERPARAMETER SEARCH RESULTS")
+    print("="*80)
+    for position, t in enumerate(rank_candidates(trials)[:top], 1):
+        print(f"#{position:<3} rung={t['rung']} rows={t['budget']:<6} acc={t['accuracy']:.3%} "
+              f"log_loss={t['log_loss']:.4f}  {t['params']}")
+    print("="*80)
+
+def export_best(df, backend, trials, model_path):
+    """Retrain the winning candidate on the full dataset and save it like train_and_save_model"""
+    best = rank_candidates(trials)[0]
+
+    model = WeatherPredictor(backend=backend, **best['params'])
+    results = model.train(df)
+
+    model_dir = os.path.dirname(model_path)
+    if model_dir and not os.path.exists(model_dir):
+        os.makedirs(model_dir)
+    with open(model_path, 'wb') as f:
+        pickle.dump(model, f)
+
+    report_path = os.path.splitext(model_path)[0] + '_search.json'
+    with open(report_path, 'w') as f:
+        json.dump({'backend': backend, 'best_params': best['params'],
+                   'holdout_accuracy': results['accuracy'], 'trials': trials}, f, indent=2, default=str)
+
+    print(f"✅ Best model saved to: {model_path} (holdout accuracy {results['accuracy']:.1%})")
+    print(f"📄 Search report saved to: {report_path}")
+    return model
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Successive-halving hyperparameter search")
+    parser.add_argument('--backend', choices=available_backends(), default=get_backend_name())
+    parser.add_argument('--data', help="CSV with feature columns and weather_condition (default: synthetic)")
+    parser.add_argument('--samples', type=int, default=5000, help="Synthetic rows when --data is not given")
+    parser.add_argument('--candidates', type=int, default=27)
+    parser.add_argument('--eta', type=int, default=3, help="Keep 1/eta of candidates per rung")
+    parser.add_argument('--folds', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=None, help="Process pool size (default: CPU count)")
+    parser.add_argument('--cache-dir', default='models/tuning_cache')
+    parser.add_argument('--output', default='models/weather_model_tuned.pkl')
+    args = parser.parse_args()
+
+    if args.data:
+        data = pd.read_csv(args.data)
+    else:
+        from data_generator import generate_weather_data
+        data = generate_weather_data(args.samples)
+
+    start = time.perf_counter()
+    backend, trials = successive_halving(data, args.backend, args.candidates, args.eta, args.folds,
+                                         workers=args.workers, cache_dir=args.cache_dir)
+    print_report(trials)
+    print(f"⏱️  Search finished in {time.perf_counter() - start:.1f}s")
+    export_best(data, backend, trials, args.output)
@@ -2,19 +2,169 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+import pandas as pd
 from sklearn.preprocessing import LabelEncoder
+from stats import RunningStats
+from model import FEATURES
+
+# Above this many rows 'auto' mode plots from summaries instead of raw rows
+AGGREGATE_ROWS = 200_000
+
+def distribution_summary(df, features=FEATURES, target='weather_condition', bins=32,
+                         resolution=512, chunk_rows=1_000_000):
+    """Per-class box-plot stats, per-class histograms and the correlation matrix in one chunked pass.
+    
+    Nothing the size of the frame is copied, and each row is read once: each chunk of
+    `chunk_rows` is converted on its own and folded into a stats.RunningStats (correlation,
+    including the label-encoded condition, and min/max) and into per-class counts over
+    `resolution` fine bins per feature. The fine bins widen as chunks extend the range, so
+    it doesn't have to be known up front (see _GrowingHistogram). The quantiles are read off
+    those counts, accurate to about 2 * (max - min) / resolution. The display histograms
+    are the fine bins regrouped into `bins` equal bins between the min and max. Box
+    whiskers are the 1st/99th percentiles.
+    """
+    if bins < 1 or resolution < 2:
+        raise ValueError("bins must be at least 1 and resolution at least 2")
+    labels = pd.Categorical(df[target])  # Sorted categories, so codes match LabelEncoder
+    classes = list(labels.categories)
+    
+    columns = list(features) + [f'{target}_encoded']
+    stats = RunningStats(columns, edges={})
+    fine_histograms = [_GrowingHistogram(len(classes), resolution) for _ in features]
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        codes = labels.codes[start:start + chunk_rows]
+        X = np.column_stack([chunk[features].to_numpy(dtype=float), codes])
+        stats.update(X, chunk[target].to_numpy())
+        for j, histogram in enumerate(fine_histograms):
+            histogram.add(X[:, j], codes)
+    
+    fine = np.stack([h.counts for h in fine_histograms], axis=1)
+    low = np.array([h.low for h in fine_histograms])
+    width = np.array([h.width for h in fine_histograms])
+    quantiles = _histogram_quantiles(fine, low, width, (0.01, 0.25, 0.5, 0.75, 0.99))
+    boxplots = {
+        feature: [{'label': cls, 'whislo': q[0], 'q1': q[1], 'med': q[2], 'q3': q[3], 'whishi': q[4],
+                   'fliers': []} for cls, q in zip(classes, quantiles[:, j])]
+        for j, feature in enumerate(features)
+    }
+    
+    # Regroup the fine bins, by their centres, into `bins` display bins over [min, max]
+    bin_edges, histograms = [], np.zeros((len(classes), len(features), bins), dtype=np.int64)
+    for j, histogram in enumerate(fine_histograms):
+        lo, hi = stats.min[j], stats.max[j]
+        centres = low[j] + width[j] * (np.arange(resolution) + 0.5)
+        span = hi - lo if hi > lo else 1.0
+        target_bin = np.clip(((centres - lo) / span * bins).astype(np.int64), 0, bins - 1)
+        histograms[:, j] = histogram.counts @ np.eye(bins, dtype=np.int64)[target_bin]
+        bin_edges.append(np.linspace(lo, hi if hi > lo else lo + 1.0, bins + 1))
+    return {
+        'rows': stats.n,
+        'classes': classes,
+        'class_counts': {cls: stats.class_counts.get(cls, 0) for cls in classes},
+        'boxplots': boxplots,
+        'histograms': histograms,
+        'bin_edges': bin_edges,
+        'correlation': stats.correlation(),
+    }
+
+class _GrowingHistogram:
+    """Per-class counts over `resolution` equal bins that widen to fit the values seen so far.
+    
+    Edges sit on multiples of the bin width (the first is offset * width). When a chunk
+    falls outside the current range, the width doubles and every old bin folds exactly
+    into one new bin. So the range never has to be found in a pass of its own.
+    """
+    def __init__(self, n_classes, resolution):
+        self.resolution = resolution
+        self.counts = np.zeros((n_classes, resolution), dtype=np.int64)
+        self.width = None
+        self.offset = 0
+    
+    @property
+    def low(self):
+        return self.offset * self.width
+    
+    def add(self, values, codes):
+        if not len(values):
+            return
+        lo, hi = values.min(), values.max()
+        if self.width is None:
+            span = hi - lo
+            # A constant first chunk gets tiny bins; they double as soon as the data spreads
+            self.width = span / (self.resolution - 1) if span > 0 else max(abs(lo), 1.0) * 2.0 ** -20
+            self.offset = int(np.floor(lo / self.width))
+        while lo < self.offset * self.width or hi >= (self.offset + self.resolution) * self.width:
+            offset = self.offset // 2
+            target = (self.offset + np.arange(self.resolution)) // 2 - offset
+            folded = np.zeros_like(self.counts)
+            np.add.at(folded.T, target, self.counts.T)
+            self.counts, self.offset, self.width = folded, offset, self.width * 2
+        index = np.clip(np.floor(values / self.width).astype(np.int64) - self.offset, 0, self.resolution - 1)
+        n_classes = len(self.counts)
+        self.counts += np.bincount(codes * self.resolution + index,
+                                   minlength=n_classes * self.resolution).reshape(n_classes, self.resolution)
+
+def _histogram_quantiles(fine, low, width, qs):
+    """Quantiles (classes, features, len(qs)) from fine bin counts, interpolating inside a bin"""
+    cumulative = fine.cumsum(axis=2)
+    totals = cumulative[:, :, -1:]
+    result = np.empty(fine.shape[:2] + (len(qs),))
+    for k, q in enumerate(qs):
+        target = q * totals
+        bin_index = (cumulative < target).sum(axis=2, keepdims=True).clip(0, fine.shape[2] - 1)
+        before = np.take_along_axis(cumulative, bin_index, axis=2) - np.take_along_axis(fine, bin_index, axis=2)
+        inside = np.take_along_axis(fine, bin_index, axis=2)
+        fraction = np.divide(target - before, inside, out=np.zeros_like(target, dtype=float), where=inside > 0)
+        result[:, :, k] = (low[None, :] + width[None, :] * (bin_index[:, :, 0] + fraction[:, :, 0]))
+    return result
+
+def stratified_sample(df, n, column='weather_condition', random_state=42):
+    """At most about `n` rows with each class kept in proportion (and at least one row per class)"""
+    if len(df) <= n:
+        return df
+    codes = pd.Categorical(df[column]).codes
+    rng = np.random.default_rng(random_state)
+    keep = []
+    for k in np.unique(codes):
+        members = np.flatnonzero(codes == k)
+        size = max(1, round(len(members) * n / len(df)))
+        keep.append(rng.choice(members, size, replace=False))
+    return df.iloc[np.sort(np.concatenate(keep))]
 
 class WeatherVisualizer:
-    def __init__(self, df):
+    def __init__(self, df, mode='auto', max_points=50_000):
+        """mode: 'raw' plots every row, 'aggregate' plots from distribution_summary(),
+        'auto' picks aggregate above AGGREGATE_ROWS. Point-level plots use a stratified
+        sample of at most `max_points` rows either way."""
         self.df = df
+        self.mode = mode
+        self.max_points = max_points
+        self._summary = None
+        
+    @property
+    def aggregate(self):
+        return self.mode == 'aggregate' or (self.mode == 'auto' and len(self.df) > AGGREGATE_ROWS)
+        
+    def summary(self):
+        """distribution_summary() of the data, computed once"""
+        if self._summary is None:
+            self._summary = distribution_summary(self.df)
+        return self._summary
         
     def plot_distributions(self):
         """Plot weather condition distributions by features"""
-        plt.figure(figsize=(15, 10))
+        self.distributions_figure()
+        plt.show()
+        
+    def distributions_figure(self):
+        """Build the plot_distributions figure without showing it"""
+        if self.aggregate:
+            return self._aggregated_distributions_figure()
         
-        features = ['temperature', 'humidity', 'pressure', 'wind_speed', 'cloud_cover']
+        fig = plt.figure(figsize=(15, 10))
         
-        for i, feature in enumerate(features, 1):
+        for i, feature in enumerate(FEATURES, 1):
             plt.subplot(2, 3, i)
             sns.boxplot(data=self.df, x='weather_condition', y=feature)
             plt.title(f'{feature.title()} by Weather Condition')
@@ -30,23 +180,77 @@ class WeatherVisualizer:
         plt.title('Feature Correlation Matrix')
         
         plt.tight_layout()
+        return fig
+        
+    def _aggregated_distributions_figure(self):
+        """Same layout as plot_distributions, drawn from summaries so cost doesn't grow with rows"""
+        summary = self.summary()
+        fig, axes = plt.subplots(2, 3, figsize=(15, 10))
+        for ax, feature in zip(axes.flat, FEATURES):
+            ax.bxp(summary['boxplots'][feature], showfliers=False)
+            ax.set_title(f'{feature.title()} by Weather Condition')
+            ax.set_xlabel('weather_condition')
+            ax.set_ylabel(feature)
+            ax.tick_params(axis='x', rotation=45)
+        
+        sns.heatmap(summary['correlation'], annot=True, cmap='coolwarm', center=0, ax=axes.flat[5])
+        axes.flat[5].set_title('Feature Correlation Matrix')
+        fig.tight_layout()
+        return fig
+        
+    def plot_histograms(self):
+        """Per-class histogram of each feature, from the summary"""
+        summary = self.summary()
+        fig, axes = plt.subplots(2, 3, figsize=(15, 10))
+        for j, (ax, feature) in enumerate(zip(axes.flat, FEATURES)):
+            edges = summary['bin_edges'][j]
+            for k, cls in enumerate(summary['classes']):
+                ax.stairs(summary['histograms'][k, j], edges, label=cls)
+            ax.set_title(f'{feature.title()} by Weather Condition')
+        axes.flat[0].legend()
+        axes.flat[5].axis('off')
+        fig.tight_layout()
         plt.show()
         
-    def plot_feature_importance(self, feature_importance_df):
-        """Plot feature importance from trained model"""
-        plt.figure(figsize=(10, 6))
-        sns.barplot(data=feature_importance_df, x='importance', y='feature')
-        plt.title('Feature Importance in Weather Prediction')
-        plt.xlabel('Importance Score')
+    def plot_feature_scatter(self, x='temperature', y='cloud_cover'):
+        """Point-level scatter of two features coloured by condition, on a stratified sample"""
+        sample = stratified_sample(self.df, self.max_points)
+        plt.figure(figsize=(10, 7))
+        sns.scatterplot(data=sample, x=x, y=y, hue='weather_condition', s=8, linewidth=0)
+        shown = f' ({len(sample):,} of {len(self.df):,} rows)' if len(sample) < len(self.df) else ''
+        plt.title(f'{x.title()} vs {y.title()}{shown}')
         plt.show()
         
+    def plot_feature_importance(self, feature_importance_df, title='Feature Importance in Weather Prediction',
+                                xlabel='Importance Score'):
+        """Plot feature importance from trained model (impurity or permutation)"""
+        self.feature_importance_figure(feature_importance_df, title, xlabel)
+        plt.show()
+        
+    def feature_importance_figure(self, feature_importance_df, title='Feature Importance in Weather Prediction',
+                                  xlabel='Importance Score'):
+        """Build the plot_feature_importance figure without showing it"""
+        fig = plt.figure(figsize=(10, 6))
+        sns.barplot(data=feature_importance_df, x='importance', y='feature')
+        if 'importance_std' in feature_importance_df:
+            plt.errorbar(feature_importance_df['importance'], range(len(feature_importance_df)),
+                         xerr=feature_importance_df['importance_std'], fmt='none', ecolor='black')
+        plt.title(title)
+        plt.xlabel(xlabel)
+        return fig
+        
     def plot_weather_distribution(self):
         """Plot the distribution of weather conditions"""
-        plt.figure(figsize=(8, 6))
+        self.weather_distribution_figure()
+        plt.show()
+        
+    def weather_distribution_figure(self):
+        """Build the plot_weather_distribution figure without showing it"""
+        fig = plt.figure(figsize=(8, 6))
         weather_counts = self.df['weather_condition'].value_counts()
         plt.pie(weather_counts.values, labels=weather_counts.index, autopct='%1.1f%%')
         plt.title('Distribution of Weather Conditions')
-        plt.show()
+        return fig
 
 if __name__ == "__main__":
     from data_generator import generate_weather_data